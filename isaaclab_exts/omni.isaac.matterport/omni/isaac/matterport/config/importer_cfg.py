@@ -79,3 +79,10 @@ class MatterportImporterCfg(TerrainImporterCfg):
     asset_converter: AssetConverterContext = asset_converter_cfg
 
     groundplane: bool = True
+
+    collision_proxy: bool = True
+    """Whether to bind the physics to the collision proxy ``<scene_id>_collision.usd`` next to the visual USD.
+
+    The proxy is a decimated copy of the scene mesh, created with ``scripts/build_collision_proxies.py``. If it does
+    not exist, the collisions are computed on the full-resolution mesh.
+    """
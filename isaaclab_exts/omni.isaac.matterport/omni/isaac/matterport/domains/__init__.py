@@ -11,14 +11,18 @@ DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../
 from .matterport_importer import MatterportImporter
 from .matterport_raycast_camera import MatterportRayCasterCamera
 from .matterport_raycaster import MatterportRayCaster
-from .raycaster_cfg import MatterportRayCasterCfg
+from .mesh_registry import MESH_REGISTRY, MeshRegistry
+from .raycaster_cfg import MatterportRayCasterCameraCfg, MatterportRayCasterCfg
 
 __all__ = [
     "MatterportRayCasterCamera",
+    "MatterportRayCasterCameraCfg",
     "MatterportImporter",
     "MatterportRayCaster",
     "MatterportRayCasterCfg",
     "DATA_DIR",
+    "MESH_REGISTRY",
+    "MeshRegistry",
 ]
 
 # EoF
@@ -0,0 +1,114 @@
+# Copyright (c) 2024 ETH Zurich (Robotic Systems Lab)
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Simplified collision meshes of the Matterport scenes.
+
+The scanned Matterport meshes have millions of small triangles, which PhysX has to test against in every step. The
+collision proxy is a decimated copy of the scene mesh, stored next to the visual USD as
+``<scene_id>/<scene_id>_collision.usd``. If it exists, the :class:`MatterportImporter` binds the physics to the proxy
+and renders the original mesh.
+
+The mesh is decimated by vertex clustering: all vertices within a grid cell are merged into their mean. Every point of
+the original surface is thereby moved by at most the cell diagonal, which is set to the tolerance, such that the
+proxy deviates from the scan by at most the tolerance.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, Tuple
+
+import numpy as np
+from pxr import Usd, UsdGeom, UsdPhysics, Vt
+
+from .mesh_cache import load_mesh
+
+
+def get_collision_proxy_path(usd_path: str) -> str:
+    """Returns the path of the collision proxy of a visual USD file."""
+    base_path, _ = os.path.splitext(usd_path)
+    return base_path + "_collision.usd"
+
+
+def decimate_mesh(vertices: np.ndarray, faces: np.ndarray, tolerance: float) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Simplifies a triangle mesh by clustering its vertices on a grid.
+
+    Args:
+        vertices: The vertex positions, shape (V, 3).
+        faces: The vertex indices of the triangles, shape (F, 3).
+        tolerance: Maximum distance in meters a vertex is moved.
+
+    Returns:
+        The vertices of the simplified mesh, shape (V', 3).
+        The faces of the simplified mesh, shape (F', 3).
+        The largest distance a vertex was moved.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+
+    # cells with a diagonal of the tolerance
+    cell_size = tolerance / np.sqrt(3.0)
+    cells = np.floor((vertices - vertices.min(axis=0)) / cell_size).astype(np.int64)
+    grid_size = cells.max(axis=0) + 1
+    cell_keys = (cells[:, 0] * grid_size[1] + cells[:, 1]) * grid_size[2] + cells[:, 2]
+    _, cluster_idx, cluster_size = np.unique(cell_keys, return_inverse=True, return_counts=True)
+    cluster_idx = cluster_idx.reshape(-1)
+
+    # each cluster is represented by the mean of its vertices, which lies inside the cell
+    cluster_vertices = np.stack(
+        [np.bincount(cluster_idx, weights=vertices[:, axis], minlength=len(cluster_size)) for axis in range(3)], axis=1
+    )
+    cluster_vertices /= cluster_size[:, None]
+    max_error = float(np.linalg.norm(cluster_vertices[cluster_idx] - vertices, axis=1).max(initial=0.0))
+
+    # drop the triangles that collapsed and the duplicates of triangles with the same vertices
+    cluster_faces = cluster_idx[faces]
+    valid = (
+        (cluster_faces[:, 0] != cluster_faces[:, 1])
+        & (cluster_faces[:, 1] != cluster_faces[:, 2])
+        & (cluster_faces[:, 0] != cluster_faces[:, 2])
+    )
+    cluster_faces = cluster_faces[valid]
+    _, unique_idx = np.unique(np.sort(cluster_faces, axis=1), axis=0, return_index=True)
+    cluster_faces = cluster_faces[np.sort(unique_idx)]
+
+    # remove the vertices that are no longer referenced
+    used_vertices, new_faces = np.unique(cluster_faces, return_inverse=True)
+    return cluster_vertices[used_vertices].astype(np.float32), new_faces.reshape(-1, 3).astype(np.int32), max_error
+
+
+def build_collision_proxy(mesh_path: str, usd_path: str, tolerance: float = 0.05) -> Dict[str, float]:
+    """Creates the collision proxy of a scene.
+
+    Args:
+        mesh_path: The ``.ply`` mesh of the scene, in the frame of the visual USD.
+        usd_path: Output path of the proxy, see :func:`get_collision_proxy_path`.
+        tolerance: Maximum deviation of the proxy from the mesh in meters. Defaults to 0.05.
+
+    Returns:
+        The number of faces of the mesh and the proxy and the largest deviation of the proxy.
+    """
+    mesh = load_mesh(mesh_path)
+    vertices, faces, max_error = decimate_mesh(mesh.vertices, mesh.faces, tolerance)
+
+    # write into a temporary file first, such that the importer never loads a partial proxy
+    tmp_path = f"{os.path.splitext(usd_path)[0]}.tmp{os.getpid()}.usd"
+    stage = Usd.Stage.CreateNew(tmp_path)
+    UsdGeom.SetStageUpAxis(stage, UsdGeom.Tokens.z)
+    UsdGeom.SetStageMetersPerUnit(stage, 1.0)
+    root = UsdGeom.Xform.Define(stage, "/World")
+    stage.SetDefaultPrim(root.GetPrim())
+
+    proxy = UsdGeom.Mesh.Define(stage, "/World/collision")
+    proxy.CreatePointsAttr(Vt.Vec3fArray.FromNumpy(vertices))
+    proxy.CreateFaceVertexCountsAttr(Vt.IntArray.FromNumpy(np.full(len(faces), 3, dtype=np.int32)))
+    proxy.CreateFaceVertexIndicesAttr(Vt.IntArray.FromNumpy(faces.reshape(-1)))
+    # collide against the triangles of the proxy, without further approximation by PhysX
+    UsdPhysics.CollisionAPI.Apply(proxy.GetPrim())
+    UsdPhysics.MeshCollisionAPI.Apply(proxy.GetPrim()).CreateApproximationAttr(UsdPhysics.Tokens.none)
+    stage.GetRootLayer().Save()
+    os.replace(tmp_path, usd_path)
+
+    return {"num_faces": len(mesh.faces), "num_proxy_faces": len(faces), "max_error": max_error}
@@ -21,6 +21,9 @@ import omni.isaac.core.utils.stage as stage_utils
 import omni.isaac.lab.sim as sim_utils
 from omni.isaac.core.simulation_context import SimulationContext
 from omni.isaac.lab.terrains import TerrainImporter
+from pxr import UsdGeom
+
+from .collision_proxy import get_collision_proxy_path
 
 if TYPE_CHECKING:
     from omni.isaac.matterport.config import MatterportImporterCfg
@@ -41,12 +44,15 @@ class MatterportConverter:
         self.task_manager = converter.extension.AssetImporterExtension()
         return
 
-    async def convert_asset_to_usd(self) -> None:
+    async def convert_asset_to_usd(self, output_usd: str | None = None) -> bool:
         # get usd file path and create directory
-        base_path, _ = os.path.splitext(self._input_obj)
+        if output_usd is None:
+            base_path, _ = os.path.splitext(self._input_obj)
+            output_usd = base_path + ".usd"
+        os.makedirs(os.path.dirname(os.path.abspath(output_usd)), exist_ok=True)
         # set task
         task = self.task_manager.create_converter_task(
-            self._input_obj, base_path + ".usd", asset_converter_context=self._context
+            self._input_obj, output_usd, asset_converter_context=self._context
         )
         success = await task.wait_until_finished()
 
@@ -55,10 +61,10 @@ class MatterportConverter:
             detailed_status_code = task.get_status()
             detailed_status_error_string = task.get_error_message()
             carb.log_error(
-                f"Failed to convert {self._input_obj} to {base_path + '.usd'} "
+                f"Failed to convert {self._input_obj} to {output_usd} "
                 f"with status {detailed_status_code} and error {detailed_status_error_string}"
             )
-        return
+        return success
 
 
 class MatterportImporter(TerrainImporter):
@@ -137,21 +143,33 @@ class MatterportImporter(TerrainImporter):
         assert os.path.exists(base_path + ".usd"), (
             "Matterport load sync can only handle '.usd' files not obj files. "
             "Please use the async function to convert the obj file to usd first (accessed over the extension in the GUI)"
+            " or convert all scenes with 'scripts/convert_matterport.py'"
         )
 
         self._xform_prim = prim_utils.create_prim(
             prim_path=self.cfg.prim_path + "/Matterport", translation=(0.0, 0.0, 0.0), usd_path=base_path + ".usd"
         )
 
+        # bind the physics to the simplified collision mesh if available, the scan mesh is only rendered
+        proxy_path = get_collision_proxy_path(base_path + ".usd")
+        if self.cfg.collision_proxy and os.path.exists(proxy_path):
+            collision_prim = prim_utils.create_prim(
+                prim_path=self.cfg.prim_path + "/MatterportCollision", translation=(0.0, 0.0, 0.0), usd_path=proxy_path
+            )
+            UsdGeom.Imageable(collision_prim).MakeInvisible()
+            carb.log_info(f"[INFO]: Using collision proxy {proxy_path}")
+        else:
+            collision_prim = self._xform_prim
+
         # apply collider properties
         collider_cfg = sim_utils.CollisionPropertiesCfg(collision_enabled=True)
-        sim_utils.define_collision_properties(self._xform_prim.GetPrimPath(), collider_cfg)
+        sim_utils.define_collision_properties(collision_prim.GetPrimPath(), collider_cfg)
 
         # create physics material
         physics_material_cfg: sim_utils.RigidBodyMaterialCfg = self.cfg.physics_material
         # spawn the material
         physics_material_cfg.func(f"{self.cfg.prim_path}/physicsMaterial", self.cfg.physics_material)
-        sim_utils.bind_physics_material(self._xform_prim.GetPrimPath(), f"{self.cfg.prim_path}/physicsMaterial")
+        sim_utils.bind_physics_material(collision_prim.GetPrimPath(), f"{self.cfg.prim_path}/physicsMaterial")
 
         # add colliders and physics material
         if self.cfg.groundplane:
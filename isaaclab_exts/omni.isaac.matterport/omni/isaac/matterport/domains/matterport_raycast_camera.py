@@ -6,23 +6,38 @@
 
 from __future__ import annotations
 
-import os
-from typing import ClassVar, Sequence
+from functools import partial
+from typing import TYPE_CHECKING, ClassVar, Sequence
 
-import carb
-import numpy as np
 import omni.isaac.lab.utils.math as math_utils
 import pandas as pd
 import torch
-import trimesh
 import warp as wp
 from omni.isaac.matterport.domains import DATA_DIR
 from omni.isaac.lab.sensors import RayCasterCamera, RayCasterCameraCfg
 from omni.isaac.lab.utils.warp import raycast_mesh
 from tensordict import TensorDict
 
+from .mesh_cache import resolve_mesh_path
+from .mesh_registry import MESH_REGISTRY
+from .raycast_utils import raycast_multi_mesh
+
+if TYPE_CHECKING:
+    from .raycaster_cfg import MatterportRayCasterCameraCfg
+
 
 class MatterportRayCasterCamera(RayCasterCamera):
+    """A ray-casting camera for matterport meshes.
+
+    The camera can ray-cast against several meshes, e.g. to simulate a different Matterport house in each
+    environment. The mesh of each environment is selected with :attr:`MatterportRayCasterCameraCfg.mesh_ids`, and
+    the rays of all environments are cast in a single kernel launch. With a single mesh, all environments ray-cast
+    against it.
+    """
+
+    cfg: MatterportRayCasterCameraCfg
+    """The configuration parameters."""
+
     UNSUPPORTED_TYPES: ClassVar[dict] = {
         "rgb",
         "instance_id_segmentation",
@@ -62,6 +77,7 @@ class MatterportRayCasterCamera(RayCasterCamera):
         mapping = pd.read_csv(DATA_DIR + "/mappings/category_mapping.tsv", sep="\t")
         self.mapping_mpcat40 = torch.tensor(mapping["mpcat40index"].to_numpy(), device=self._device, dtype=torch.long)
         self._color_mapping()
+        self._initialize_env_meshes()
 
     def _color_mapping(self):
         # load defined colors for mpcat40
@@ -73,48 +89,69 @@ class MatterportRayCasterCamera(RayCasterCamera):
             dtype=torch.uint8,
         )
 
+    def __del__(self):
+        super().__del__()
+        self.release_meshes()
+
     def _initialize_warp_meshes(self):
-        # check if mesh is already loaded
+        # release the meshes of a previous initialization
+        self.release_meshes()
+        # meshes are shared with all other sensors through the registry
         for mesh_prim_path in self.cfg.mesh_prim_paths:
-            if (
-                mesh_prim_path in MatterportRayCasterCamera.meshes
-                and mesh_prim_path in MatterportRayCasterCamera.face_id_category_mapping
-            ):
-                continue
-
-            # find ply
-            if os.path.isabs(mesh_prim_path):
-                file_path = mesh_prim_path
-                assert os.path.isfile(mesh_prim_path), f"No .ply file found under absolute path: {mesh_prim_path}"
+            registered_mesh = MESH_REGISTRY.acquire(resolve_mesh_path(mesh_prim_path), self._device)
+            self._registered_meshes.append(registered_mesh)
+            # save mesh and mapping from face id to semantic category id
+            MatterportRayCasterCamera.meshes[mesh_prim_path] = registered_mesh.mesh
+            MatterportRayCasterCamera.face_id_category_mapping[mesh_prim_path] = registered_mesh.get_face_categories()
+            registered_mesh.release_callbacks[f"{type(self).__name__}:{mesh_prim_path}"] = partial(
+                self._remove_mesh, mesh_prim_path
+            )
+
+    def release_meshes(self):
+        """Releases the meshes of the sensor in the :data:`MESH_REGISTRY`, e.g. when its environment is closed."""
+        for registered_mesh in getattr(self, "_registered_meshes", []):
+            MESH_REGISTRY.release(registered_mesh.key)
+        self._registered_meshes = []
+
+    @staticmethod
+    def _remove_mesh(mesh_prim_path: str):
+        MatterportRayCasterCamera.meshes.pop(mesh_prim_path, None)
+        MatterportRayCasterCamera.face_id_category_mapping.pop(mesh_prim_path, None)
+
+    def _initialize_env_meshes(self):
+        """Resolves the mesh of each environment and the face category lookup of all meshes."""
+        num_meshes = len(self.cfg.mesh_prim_paths)
+        mesh_ids = getattr(self.cfg, "mesh_ids", None)
+        if mesh_ids is None:
+            if num_meshes == 1:
+                mesh_ids = [0] * self._view.count
+            elif num_meshes == self._view.count:
+                mesh_ids = list(range(num_meshes))
             else:
-                file_path = os.path.join(DATA_DIR, mesh_prim_path)
-                assert os.path.isfile(
-                    file_path
-                ), f"No .ply file found under relative path to extension data: {file_path}"
-
-            # load ply
-            curr_trimesh = trimesh.load(file_path)
-
-            if mesh_prim_path not in MatterportRayCasterCamera.meshes:
-                # Convert trimesh into wp mesh
-                mesh_wp = wp.Mesh(
-                    points=wp.array(curr_trimesh.vertices.astype(np.float32), dtype=wp.vec3, device=self._device),
-                    indices=wp.array(curr_trimesh.faces.astype(np.int32).flatten(), dtype=int, device=self._device),
-                )
-                # save mesh
-                MatterportRayCasterCamera.meshes[mesh_prim_path] = mesh_wp
-
-            if mesh_prim_path not in MatterportRayCasterCamera.face_id_category_mapping:
-                # create mapping from face id to semantic categroy id
-                # get raw face information
-                faces_raw = curr_trimesh.metadata["_ply_raw"]["face"]["data"]
-                carb.log_info(f"Raw face information of type {faces_raw.dtype}")
-                # get face categories
-                face_id_category_mapping = torch.tensor(
-                    [single_face[3] for single_face in faces_raw], device=self._device
+                raise ValueError(
+                    f"Got {num_meshes} meshes for {self._view.count} environments. Set 'mesh_ids' to assign a mesh to"
+                    " each environment."
                 )
-                # save mapping
-                MatterportRayCasterCamera.face_id_category_mapping[mesh_prim_path] = face_id_category_mapping
+        if len(mesh_ids) != self._view.count or not all(0 <= mesh_id < num_meshes for mesh_id in mesh_ids):
+            raise ValueError(f"Invalid 'mesh_ids' {mesh_ids} for {self._view.count} environments and {num_meshes} meshes.")
+        # index into the mesh prim paths of each environment
+        self._env_mesh_idx = torch.tensor(mesh_ids, dtype=torch.int32, device=self._device)
+        self._mesh_ids_wp = wp.array(
+            [MatterportRayCasterCamera.meshes[path].id for path in self.cfg.mesh_prim_paths],
+            dtype=wp.uint64,
+            device=self._device,
+        )
+
+        # face colors of all meshes in one table, with the offset of the first face of each mesh
+        # note: the category index of a face is from the unreduced set (~1600 classes) and is mapped to the color
+        #   of its mpcat40 class
+        face_categories = [
+            MatterportRayCasterCamera.face_id_category_mapping[path] for path in self.cfg.mesh_prim_paths
+        ]
+        num_faces = torch.tensor([len(categories) for categories in face_categories], device=self._device)
+        self._face_colors = self.color[self.mapping_mpcat40[torch.cat(face_categories).long() - 1]]
+        self._face_offsets = torch.cumsum(num_faces, dim=0) - num_faces
+        self._num_faces = num_faces
 
     def _update_buffers_impl(self, env_ids: Sequence[int]):
         """Fills the buffers of the sensor data."""
@@ -132,19 +169,32 @@ class MatterportRayCasterCamera(RayCasterCamera):
         ray_starts_w += pos_w.unsqueeze(1)
         ray_directions_w = math_utils.quat_apply(quat_w.repeat(1, self.num_rays), self.ray_directions[env_ids])
         # ray cast and store the hits
-        # TODO: Make ray-casting work for multiple meshes?
-        # necessary for regular dictionaries.
-        self.ray_hits_w, ray_depth, ray_normal, ray_face_ids = raycast_mesh(
-            ray_starts_w,
-            ray_directions_w,
-            mesh=RayCasterCamera.meshes[self.cfg.mesh_prim_paths[0]],
-            max_dist=self.cfg.max_distance,
-            return_distance=any(
-                [name in self.cfg.data_types for name in ["distance_to_image_plane", "distance_to_camera"]]
-            ),
-            return_normal="normals" in self.cfg.data_types,
-            return_face_id="semantic_segmentation" in self.cfg.data_types,
+        return_distance = any(
+            [name in self.cfg.data_types for name in ["distance_to_image_plane", "distance_to_camera"]]
         )
+        if len(self.cfg.mesh_prim_paths) == 1:
+            self.ray_hits_w, ray_depth, ray_normal, ray_face_ids = raycast_mesh(
+                ray_starts_w,
+                ray_directions_w,
+                mesh=RayCasterCamera.meshes[self.cfg.mesh_prim_paths[0]],
+                max_dist=self.cfg.max_distance,
+                return_distance=return_distance,
+                return_normal="normals" in self.cfg.data_types,
+                return_face_id="semantic_segmentation" in self.cfg.data_types,
+            )
+        else:
+            # each environment against its own mesh, in a single launch
+            env_mesh_idx = self._env_mesh_idx[env_ids]
+            self.ray_hits_w, ray_depth, ray_normal, ray_face_ids = raycast_multi_mesh(
+                ray_starts_w,
+                ray_directions_w,
+                mesh_ids=self._mesh_ids_wp,
+                env_mesh_idx=env_mesh_idx,
+                max_dist=self.cfg.max_distance,
+                return_distance=return_distance,
+                return_normal="normals" in self.cfg.data_types,
+                return_face_id="semantic_segmentation" in self.cfg.data_types,
+            )
         # update output buffers
         if "distance_to_image_plane" in self.cfg.data_types:
             # note: data is in camera frame so we only take the first component (z-axis of camera frame)
@@ -160,14 +210,12 @@ class MatterportRayCasterCamera(RayCasterCamera):
         if "normals" in self.cfg.data_types:
             self._data.output["normals"][env_ids] = ray_normal.view(-1, *self.image_shape, 3)
         if "semantic_segmentation" in self._data.output.keys():  # noqa: SIM118
-            # get the category index of the hit faces (category index from unreduced set = ~1600 classes)
-            face_id = MatterportRayCasterCamera.face_id_category_mapping[self.cfg.mesh_prim_paths[0]][
-                ray_face_ids.flatten().type(torch.long)
-            ]
-            # map category index to reduced set
-            face_id_mpcat40 = self.mapping_mpcat40[face_id.type(torch.long) - 1]
-            # get the color of the face
-            face_color = self.color[face_id_mpcat40]
+            # get the color of the hit faces
+            # note: misses (face id -1) index from the end, i.e. the last face of the mesh of the environment
+            mesh_idx = self._env_mesh_idx[env_ids].long().unsqueeze(1)
+            ray_face_ids = ray_face_ids.view(len(mesh_idx), -1).long()
+            ray_face_ids = torch.where(ray_face_ids < 0, ray_face_ids + self._num_faces[mesh_idx], ray_face_ids)
+            face_color = self._face_colors[(ray_face_ids + self._face_offsets[mesh_idx]).flatten()]
             # reshape and transpose to get the correct orientation
             self._data.output["semantic_segmentation"][env_ids] = face_color.view(-1, *self.image_shape, 3)
 
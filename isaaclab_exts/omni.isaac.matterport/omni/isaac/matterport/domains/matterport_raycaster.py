@@ -6,15 +6,14 @@
 
 from __future__ import annotations
 
-import os
+from functools import partial
 from typing import TYPE_CHECKING
 
-import numpy as np
-import trimesh
-import warp as wp
-from omni.isaac.matterport.domains import DATA_DIR
 from omni.isaac.lab.sensors.ray_caster import RayCaster
 
+from .mesh_cache import resolve_mesh_path
+from .mesh_registry import MESH_REGISTRY
+
 if TYPE_CHECKING:
     from .raycaster_cfg import MatterportRayCasterCfg
 
@@ -27,8 +26,8 @@ class MatterportRayCaster(RayCaster):
     a set of meshes with a given ray pattern.
 
     The meshes are parsed from the list of primitive paths provided in the configuration. These are then
-    converted to warp meshes and stored in the `warp_meshes` list. The ray-caster then ray-casts against
-    these warp meshes using the ray pattern provided in the configuration.
+    converted to warp meshes, which are shared with the other sensors through the :data:`MESH_REGISTRY`. The
+    ray-caster then ray-casts against these warp meshes using the ray pattern provided in the configuration.
 
     .. note::
         Currently, only static meshes are supported. Extending the warp mesh to support dynamic meshes
@@ -47,29 +46,25 @@ class MatterportRayCaster(RayCaster):
         # initialize base class
         super().__init__(cfg)
 
+    def __del__(self):
+        super().__del__()
+        self.release_meshes()
+
     def _initialize_warp_meshes(self):
-        # check if mesh is already loaded
+        # release the meshes of a previous initialization
+        self.release_meshes()
+        # meshes are shared with all other sensors through the registry
         for mesh_prim_path in self.cfg.mesh_prim_paths:
-            if mesh_prim_path in MatterportRayCaster.meshes:
-                continue
-
-            # find ply
-            if os.path.isabs(mesh_prim_path):
-                file_path = mesh_prim_path
-                assert os.path.isfile(mesh_prim_path), f"No .ply file found under absolute path: {mesh_prim_path}"
-            else:
-                file_path = os.path.join(DATA_DIR, mesh_prim_path)
-                assert os.path.isfile(
-                    file_path
-                ), f"No .ply file found under relative path to extension data: {file_path}"
-
-            # load ply
-            curr_trimesh = trimesh.load(file_path)
-
-            # Convert trimesh into wp mesh
-            mesh_wp = wp.Mesh(
-                points=wp.array(curr_trimesh.vertices.astype(np.float32), dtype=wp.vec3, device=self._device),
-                indices=wp.array(curr_trimesh.faces.astype(np.int32).flatten(), dtype=int, device=self._device),
-            )
+            registered_mesh = MESH_REGISTRY.acquire(resolve_mesh_path(mesh_prim_path), self._device)
+            self._registered_meshes.append(registered_mesh)
             # save mesh
-            MatterportRayCaster.meshes[mesh_prim_path] = mesh_wp
+            MatterportRayCaster.meshes[mesh_prim_path] = registered_mesh.mesh
+            registered_mesh.release_callbacks[f"{type(self).__name__}:{mesh_prim_path}"] = partial(
+                MatterportRayCaster.meshes.pop, mesh_prim_path, None
+            )
+
+    def release_meshes(self):
+        """Releases the meshes of the sensor in the :data:`MESH_REGISTRY`, e.g. when its environment is closed."""
+        for registered_mesh in getattr(self, "_registered_meshes", []):
+            MESH_REGISTRY.release(registered_mesh.key)
+        self._registered_meshes = []
@@ -0,0 +1,178 @@
+# Copyright (c) 2024 ETH Zurich (Robotic Systems Lab)
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Binary cache of the Matterport ``.ply`` meshes used by the ray casters.
+
+Parsing a Matterport ``.ply`` with trimesh takes seconds to minutes per house. The cache converts each mesh once into
+plain ``.npy`` files, which are memory-mapped on the next start:
+
+.. code-block:: none
+
+    <cache_dir>/
+    ├─ index.json                   # file path -> size, mtime and content hash of the converted files
+    └─ <hash>/
+        ├─ vertices.npy             # float32, shape (V, 3)
+        ├─ faces.npy                # int32, shape (F, 3)
+        └─ face_categories.npy      # int32 category id of each face, shape (F,)
+
+The entries are keyed by the content hash of the ``.ply``, such that copies of the same mesh share an entry and a
+modified mesh is converted again. The hash of a file is only recomputed if its size or modification time changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import dataclass
+
+import numpy as np
+import trimesh
+import warp as wp
+
+from omni.isaac.matterport.domains import DATA_DIR
+
+MESH_CACHE_DIR = os.path.join(DATA_DIR, "mesh_cache")
+"""Default directory of the mesh cache."""
+
+
+@dataclass
+class MeshData:
+    """Arrays of a cached mesh. The arrays are read-only memory maps of the cache files."""
+
+    vertices: np.ndarray
+    """Vertex positions, shape (V, 3)."""
+    faces: np.ndarray
+    """Vertex indices of the triangles, shape (F, 3)."""
+    face_categories: np.ndarray
+    """Semantic category id of each face, shape (F,). Zero for meshes without face categories."""
+
+    def to_warp(self, device: str) -> wp.Mesh:
+        """Uploads the mesh to the device as warp mesh."""
+        return wp.Mesh(
+            points=wp.array(np.ascontiguousarray(self.vertices), dtype=wp.vec3, device=device),
+            indices=wp.array(np.ascontiguousarray(self.faces).reshape(-1), dtype=wp.int32, device=device),
+        )
+
+
+def resolve_mesh_path(mesh_prim_path: str) -> str:
+    """Returns the path of a mesh given either as absolute path or relative to the extension data directory."""
+    if os.path.isabs(mesh_prim_path):
+        file_path = mesh_prim_path
+        assert os.path.isfile(mesh_prim_path), f"No .ply file found under absolute path: {mesh_prim_path}"
+    else:
+        file_path = os.path.join(DATA_DIR, mesh_prim_path)
+        assert os.path.isfile(file_path), f"No .ply file found under relative path to extension data: {file_path}"
+    return file_path
+
+
+def get_file_hash(file_path: str, cache_dir: str = MESH_CACHE_DIR) -> str:
+    """Returns the content hash of a file.
+
+    The hash is stored in the index of the cache and only recomputed if the size or modification time of the
+    file changed.
+    """
+    file_path = os.path.abspath(file_path)
+    stat = os.stat(file_path)
+    index = _read_index(cache_dir)
+    entry = index.get(file_path)
+    if entry is not None and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+        return entry["hash"]
+
+    sha1 = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 24), b""):
+            sha1.update(chunk)
+    file_hash = sha1.hexdigest()
+
+    # re-read the index, another process may have added entries in the meantime
+    index = _read_index(cache_dir)
+    index[file_path] = {"size": stat.st_size, "mtime": stat.st_mtime, "hash": file_hash}
+    _write_index(cache_dir, index)
+    return file_hash
+
+
+def load_mesh(file_path: str, cache_dir: str = MESH_CACHE_DIR) -> MeshData:
+    """Loads a ``.ply`` mesh from the cache and converts it first if necessary.
+
+    Args:
+        file_path: Path to the ``.ply`` mesh.
+        cache_dir: Directory of the cache. Defaults to :data:`MESH_CACHE_DIR`.
+
+    Returns:
+        The memory-mapped arrays of the mesh.
+    """
+    entry_dir = os.path.join(cache_dir, get_file_hash(file_path, cache_dir))
+    if not os.path.isfile(os.path.join(entry_dir, "face_categories.npy")):
+        print(f"[INFO]: Converting mesh '{file_path}' into the mesh cache '{entry_dir}'...")
+        _convert_mesh(file_path, entry_dir)
+
+    return MeshData(
+        vertices=np.load(os.path.join(entry_dir, "vertices.npy"), mmap_mode="r"),
+        faces=np.load(os.path.join(entry_dir, "faces.npy"), mmap_mode="r"),
+        face_categories=np.load(os.path.join(entry_dir, "face_categories.npy"), mmap_mode="r"),
+    )
+
+
+def get_face_categories(faces_raw: np.ndarray | dict) -> np.ndarray:
+    """Extracts the semantic category of each face from the raw ``.ply`` face records.
+
+    The Matterport face records are ``(vertex_indices, material_id, segment_id, category_id)``. The category is
+    read as a column of the structured array, without creating a Python object per face.
+
+    Args:
+        faces_raw: The raw face data parsed by trimesh, either a structured array or a dict of columns.
+
+    Returns:
+        The category id of each face, shape (F,).
+    """
+    if isinstance(faces_raw, dict):
+        category_name = list(faces_raw.keys())[3]
+    else:
+        category_name = faces_raw.dtype.names[3]
+    return np.ascontiguousarray(faces_raw[category_name], dtype=np.int32).reshape(-1)
+
+
+"""
+Helper functions.
+"""
+
+
+def _convert_mesh(file_path: str, entry_dir: str):
+    """Parses the mesh with trimesh and writes the arrays of the cache entry."""
+    mesh = trimesh.load(file_path)
+    if "_ply_raw" in mesh.metadata:
+        face_categories = get_face_categories(mesh.metadata["_ply_raw"]["face"]["data"])
+    else:
+        face_categories = np.zeros(len(mesh.faces), dtype=np.int32)
+
+    # write into a temporary directory first, such that concurrent processes never read a partial entry
+    tmp_dir = f"{entry_dir}.tmp{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+    np.save(os.path.join(tmp_dir, "vertices.npy"), np.asarray(mesh.vertices, dtype=np.float32))
+    np.save(os.path.join(tmp_dir, "faces.npy"), np.asarray(mesh.faces, dtype=np.int32))
+    np.save(os.path.join(tmp_dir, "face_categories.npy"), face_categories)
+    try:
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        # another process finished the conversion first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _read_index(cache_dir: str) -> dict:
+    try:
+        with open(os.path.join(cache_dir, "index.json")) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_index(cache_dir: str, index: dict):
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_file = os.path.join(cache_dir, f"index.json.tmp{os.getpid()}")
+    with open(tmp_file, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_file, os.path.join(cache_dir, "index.json"))
@@ -0,0 +1,156 @@
+# Copyright (c) 2024 ETH Zurich (Robotic Systems Lab)
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Process-wide registry of the warp meshes of the Matterport ray casters.
+
+Without the registry, the height scanner, the lidar and the ray-cast camera each upload their own copy of the same
+scene mesh, and the meshes of a scene stay on the GPU after the scene is closed. The registry keys the meshes by the
+content hash of their ``.ply`` file and the device, such that all sensors share one copy:
+
+.. code-block:: python
+
+    from omni.isaac.matterport.domains import MESH_REGISTRY
+
+    mesh = MESH_REGISTRY.acquire(file_path, device="cuda:0")
+    ...
+    MESH_REGISTRY.release(mesh.key)
+    # after closing the scene
+    MESH_REGISTRY.evict_unused()
+
+The sensors release their meshes with ``release_meshes()`` when their environment is closed. Meshes that are no longer
+used by any sensor stay loaded until :meth:`MeshRegistry.evict_unused` is called, such that re-creating the sensors of
+the same scene does not upload the mesh again. Across processes, the host side of the meshes is shared through the
+memory-mapped files of the mesh cache.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+import torch
+import warp as wp
+
+from .mesh_cache import MeshData, get_file_hash, load_mesh
+
+
+@dataclass
+class RegisteredMesh:
+    """A mesh on the device, shared by all sensors that ray-cast against it."""
+
+    key: Tuple[str, str]
+    """The content hash of the mesh file and the device."""
+    file_path: str
+    """The file the mesh was first loaded from."""
+    data: MeshData
+    """The memory-mapped arrays of the mesh."""
+    mesh: wp.Mesh
+    """The warp mesh."""
+    ref_count: int = 0
+    """Number of sensors using the mesh."""
+    face_categories: torch.Tensor | None = None
+    """Semantic category id of each face on the device, shape (F,). Uploaded on first request."""
+    release_callbacks: Dict[str, Callable[[], None]] = field(default_factory=dict)
+    """Functions called when the mesh is evicted, e.g. to drop references held by the sensors. Keyed by user, such
+    that re-acquiring the mesh does not add the same callback twice."""
+
+    @property
+    def memory_bytes(self) -> int:
+        """Device memory of the mesh arrays in bytes. The bounding volume hierarchy of warp is not included."""
+        num_bytes = self.data.vertices.shape[0] * 3 * 4 + self.data.faces.shape[0] * 3 * 4
+        if self.face_categories is not None:
+            num_bytes += self.face_categories.numel() * self.face_categories.element_size()
+        return num_bytes
+
+    def get_face_categories(self) -> torch.Tensor:
+        """Returns the face categories on the device of the mesh."""
+        if self.face_categories is None:
+            self.face_categories = torch.from_numpy(np.array(self.data.face_categories)).to(self.key[1])
+        return self.face_categories
+
+
+class MeshRegistry:
+    """Reference-counted warp meshes, deduplicated by file content and device."""
+
+    def __init__(self):
+        self._meshes: Dict[Tuple[str, str], RegisteredMesh] = {}
+        self._lock = threading.Lock()
+
+    """
+    Operations.
+    """
+
+    def acquire(self, file_path: str, device: str) -> RegisteredMesh:
+        """Returns the mesh of a file on the device and increments its reference count.
+
+        The mesh is loaded from the mesh cache and uploaded if it is not registered yet.
+
+        Args:
+            file_path: Path to the ``.ply`` mesh.
+            device: Device to ray-cast on.
+
+        Returns:
+            The registered mesh. Release it with :meth:`release` once it is no longer used.
+        """
+        key = (get_file_hash(file_path), str(device))
+        with self._lock:
+            entry = self._meshes.get(key)
+            if entry is None:
+                data = load_mesh(file_path)
+                entry = RegisteredMesh(key=key, file_path=file_path, data=data, mesh=data.to_warp(str(device)))
+                self._meshes[key] = entry
+            entry.ref_count += 1
+            return entry
+
+    def release(self, key: Tuple[str, str]):
+        """Decrements the reference count of a mesh. The mesh stays loaded until it is evicted."""
+        with self._lock:
+            entry = self._meshes.get(key)
+            if entry is not None and entry.ref_count > 0:
+                entry.ref_count -= 1
+
+    def evict_unused(self) -> int:
+        """Frees all meshes that are not used by any sensor.
+
+        Returns:
+            The freed device memory in bytes.
+        """
+        with self._lock:
+            unused = [key for key, entry in self._meshes.items() if entry.ref_count == 0]
+            entries = [self._meshes.pop(key) for key in unused]
+        num_bytes = 0
+        for entry in entries:
+            num_bytes += entry.memory_bytes
+            for callback in entry.release_callbacks.values():
+                callback()
+            entry.release_callbacks.clear()
+            entry.mesh, entry.face_categories = None, None
+        if entries:
+            print(f"[INFO]: Evicted {len(entries)} unused meshes ({num_bytes / 1e6:.1f} MB).")
+        return num_bytes
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Returns the device memory in bytes of each registered mesh, keyed by file path and device."""
+        with self._lock:
+            return {f"{entry.file_path} ({entry.key[1]})": entry.memory_bytes for entry in self._meshes.values()}
+
+    def __len__(self) -> int:
+        return len(self._meshes)
+
+    def __str__(self) -> str:
+        msg = f"<MeshRegistry> with {len(self)} meshes\n"
+        with self._lock:
+            for entry in self._meshes.values():
+                msg += (
+                    f"\t{entry.file_path} ({entry.key[1]}): {entry.memory_bytes / 1e6:.1f} MB,"
+                    f" {entry.ref_count} users\n"
+                )
+        return msg
+
+
+MESH_REGISTRY = MeshRegistry()
+"""The process-wide mesh registry."""
@@ -0,0 +1,147 @@
+# Copyright (c) 2024 ETH Zurich (Robotic Systems Lab)
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Batched ray-casting against a different mesh per environment."""
+
+from __future__ import annotations
+
+import torch
+import warp as wp
+
+# disable warp module initialization messages
+wp.config.quiet = True
+# initialize the warp module
+wp.init()
+
+
+@wp.kernel(enable_backward=False)
+def raycast_multi_mesh_kernel(
+    mesh_ids: wp.array(dtype=wp.uint64),
+    env_mesh_idx: wp.array(dtype=wp.int32),
+    ray_starts: wp.array2d(dtype=wp.vec3),
+    ray_directions: wp.array2d(dtype=wp.vec3),
+    ray_hits: wp.array2d(dtype=wp.vec3),
+    ray_distance: wp.array2d(dtype=wp.float32),
+    ray_normal: wp.array2d(dtype=wp.vec3),
+    ray_face_id: wp.array2d(dtype=wp.int32),
+    max_dist: float,
+    return_distance: int,
+    return_normal: int,
+    return_face_id: int,
+):
+    """Ray-casts each ray of an environment against the mesh of the environment.
+
+    Launched with dimension (num_envs, num_rays). Hits are only written for rays that hit the mesh, such that the
+    output arrays keep their initial values for misses.
+
+    Args:
+        mesh_ids: The ids of the warp meshes. Shape is (M,).
+        env_mesh_idx: The index into :obj:`mesh_ids` of the mesh of each environment. Shape is (N,).
+        ray_starts: The starting positions of the rays. Shape is (N, R).
+        ray_directions: The ray directions. Shape is (N, R).
+        ray_hits: The output hit positions. Shape is (N, R).
+        ray_distance: The output distances. Shape is (N, R). Only written if :obj:`return_distance` is 1.
+        ray_normal: The output hit normals. Shape is (N, R). Only written if :obj:`return_normal` is 1.
+        ray_face_id: The output hit face ids. Shape is (N, R). Only written if :obj:`return_face_id` is 1.
+        max_dist: The maximum ray-cast distance.
+        return_distance: Whether to write the distances (1) or not (0).
+        return_normal: Whether to write the normals (1) or not (0).
+        return_face_id: Whether to write the face ids (1) or not (0).
+    """
+    env_id, ray_id = wp.tid()
+
+    t = float(0.0)  # hit distance along ray
+    u = float(0.0)  # hit face barycentric u
+    v = float(0.0)  # hit face barycentric v
+    sign = float(0.0)  # hit face sign
+    n = wp.vec3()  # hit face normal
+    f = int(0)  # hit face index
+
+    mesh = mesh_ids[env_mesh_idx[env_id]]
+    start = ray_starts[env_id, ray_id]
+    direction = ray_directions[env_id, ray_id]
+    hit_success = wp.mesh_query_ray(mesh, start, direction, max_dist, t, u, v, sign, n, f)
+
+    if hit_success:
+        ray_hits[env_id, ray_id] = start + t * direction
+        if return_distance == 1:
+            ray_distance[env_id, ray_id] = t
+        if return_normal == 1:
+            ray_normal[env_id, ray_id] = n
+        if return_face_id == 1:
+            ray_face_id[env_id, ray_id] = f
+
+
+def raycast_multi_mesh(
+    ray_starts: torch.Tensor,
+    ray_directions: torch.Tensor,
+    mesh_ids: wp.array,
+    env_mesh_idx: torch.Tensor,
+    max_dist: float = 1e6,
+    return_distance: bool = False,
+    return_normal: bool = False,
+    return_face_id: bool = False,
+) -> tuple[torch.Tensor, torch.Tensor | None, torch.Tensor | None, torch.Tensor | None]:
+    """Ray-casts the rays of each environment against its own mesh in a single kernel launch.
+
+    Counterpart of :func:`omni.isaac.lab.utils.warp.raycast_mesh` with a batch of meshes.
+
+    Args:
+        ray_starts: The starting positions of the rays. Shape is (N, R, 3).
+        ray_directions: The ray directions. Shape is (N, R, 3).
+        mesh_ids: The ids of the warp meshes (:attr:`wp.Mesh.id`). Shape is (M,).
+        env_mesh_idx: The index into :obj:`mesh_ids` of the mesh of each environment. Shape is (N,).
+        max_dist: The maximum distance to ray-cast. Defaults to 1e6.
+        return_distance: Whether to return the distance of the ray until it hits the mesh. Defaults to False.
+        return_normal: Whether to return the normal of the mesh face the ray hits. Defaults to False.
+        return_face_id: Whether to return the face id of the mesh face the ray hits. Defaults to False.
+
+    Returns:
+        The ray hit positions. Shape is (N, R, 3). Rays that miss have the position inf.
+        The ray hit distances. Shape is (N, R), if :obj:`return_distance` is True. Otherwise, None.
+        The ray hit normals. Shape is (N, R, 3), if :obj:`return_normal` is True. Otherwise, None.
+        The ray hit face ids. Shape is (N, R), if :obj:`return_face_id` is True. Otherwise, None.
+    """
+    num_envs, num_rays = ray_starts.shape[:2]
+    # the meshes and the rays have to be on the same device
+    device = wp.device_to_torch(mesh_ids.device)
+
+    ray_starts = ray_starts.to(device).contiguous()
+    ray_directions = ray_directions.to(device).contiguous()
+    env_mesh_idx = env_mesh_idx.to(device, dtype=torch.int32).contiguous()
+
+    ray_hits = torch.full((num_envs, num_rays, 3), float("inf"), device=device)
+    ray_distance = torch.full((num_envs, num_rays), float("inf"), device=device)
+    ray_normal = torch.full((num_envs, num_rays, 3), float("inf"), device=device)
+    ray_face_id = torch.full((num_envs, num_rays), -1, dtype=torch.int32, device=device)
+
+    wp.launch(
+        kernel=raycast_multi_mesh_kernel,
+        dim=(num_envs, num_rays),
+        inputs=[
+            mesh_ids,
+            wp.from_torch(env_mesh_idx, dtype=wp.int32),
+            wp.from_torch(ray_starts, dtype=wp.vec3),
+            wp.from_torch(ray_directions, dtype=wp.vec3),
+            wp.from_torch(ray_hits, dtype=wp.vec3),
+            wp.from_torch(ray_distance, dtype=wp.float32),
+            wp.from_torch(ray_normal, dtype=wp.vec3),
+            wp.from_torch(ray_face_id, dtype=wp.int32),
+            float(max_dist),
+            int(return_distance),
+            int(return_normal),
+            int(return_face_id),
+        ],
+        device=mesh_ids.device,
+    )
+    # warp launches on its own stream, the outputs are read on the torch stream
+    wp.synchronize_device(mesh_ids.device)
+
+    return (
+        ray_hits,
+        ray_distance if return_distance else None,
+        ray_normal if return_normal else None,
+        ray_face_id if return_face_id else None,
+    )
@@ -4,9 +4,10 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
-from omni.isaac.lab.sensors.ray_caster import RayCasterCfg
+from omni.isaac.lab.sensors.ray_caster import RayCasterCameraCfg, RayCasterCfg
 from omni.isaac.lab.utils import configclass
 
+from .matterport_raycast_camera import MatterportRayCasterCamera
 from .matterport_raycaster import MatterportRayCaster
 
 
@@ -16,3 +17,18 @@ class MatterportRayCasterCfg(RayCasterCfg):
 
     class_type = MatterportRayCaster
     """Name of the specific matterport ray caster class."""
+
+
+@configclass
+class MatterportRayCasterCameraCfg(RayCasterCameraCfg):
+    """Configuration for the ray-cast camera for Matterport Environments."""
+
+    class_type = MatterportRayCasterCamera
+    """Name of the specific matterport ray caster camera class."""
+
+    mesh_ids: list[int] | None = None
+    """Index into :attr:`mesh_prim_paths` of the mesh each environment ray-casts against. Defaults to None.
+
+    If None, all environments use the mesh if a single mesh is given, and environment i uses mesh i if one mesh per
+    environment is given. To share a house between several environments, assign the same index to them.
+    """
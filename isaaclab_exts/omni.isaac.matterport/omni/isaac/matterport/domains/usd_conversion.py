@@ -0,0 +1,166 @@
+# Copyright (c) 2024 ETH Zurich (Robotic Systems Lab)
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Batch conversion of the Matterport ``.obj`` meshes to ``.usd``.
+
+The scenes are searched in the layout of the Matterport download and written in the layout expected by the
+environment configurations:
+
+.. code-block:: none
+
+    <matterport_dir>/<scene_id>/matterport_mesh/<mesh_id>/<mesh_id>.obj  ->  <usd_dir>/<scene_id>/<scene_id>.usd
+
+Scenes whose ``.usd`` is newer than the source ``.obj`` are skipped. The outcome of each scene is recorded in a
+JSON manifest next to the converted scenes, which is updated after every scene such that an interrupted run can be
+resumed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import glob
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+
+from omni.kit.asset_converter.impl import AssetConverterContext
+
+from .matterport_importer import MatterportConverter
+
+
+@dataclass
+class ConversionJob:
+    """A scene to convert."""
+
+    scene_id: str
+    """The Matterport scene id."""
+    obj_path: str
+    """The source ``.obj`` mesh."""
+    usd_path: str
+    """The converted ``.usd`` file."""
+
+    def is_up_to_date(self) -> bool:
+        """Whether the ``.usd`` exists and is newer than the ``.obj`` and its material file."""
+        if not os.path.isfile(self.usd_path):
+            return False
+        source_files = [self.obj_path, os.path.splitext(self.obj_path)[0] + ".mtl"]
+        source_mtime = max(os.path.getmtime(path) for path in source_files if os.path.isfile(path))
+        return os.path.getmtime(self.usd_path) >= source_mtime
+
+
+@dataclass
+class ConversionRecord:
+    """Outcome of the conversion of a scene, as stored in the manifest."""
+
+    scene_id: str
+    obj_path: str
+    usd_path: str
+    status: str
+    """One of ``"converted"``, ``"skipped"`` or ``"failed"``."""
+    duration: float
+    """Conversion time in seconds."""
+    obj_size: int
+    """Size of the source ``.obj`` in bytes."""
+    usd_size: int
+    """Size of the ``.usd`` in bytes. Zero if the conversion failed."""
+
+
+def find_conversion_jobs(
+    matterport_dir: str, usd_dir: str, scene_ids: List[str] | None = None
+) -> List[ConversionJob]:
+    """Returns the conversion jobs of all scenes found in a Matterport directory.
+
+    Args:
+        matterport_dir: Directory with one sub-directory per scene, as downloaded from Matterport.
+        usd_dir: Output directory of the ``.usd`` files.
+        scene_ids: Scenes to convert. Defaults to None, in which case all scenes are converted.
+
+    Returns:
+        The jobs, sorted by scene id.
+    """
+    jobs = []
+    for obj_path in sorted(glob.glob(os.path.join(matterport_dir, "*", "matterport_mesh", "*", "*.obj"))):
+        scene_id = os.path.relpath(obj_path, matterport_dir).split(os.sep)[0]
+        if scene_ids is not None and scene_id not in scene_ids:
+            continue
+        usd_path = os.path.join(usd_dir, scene_id, f"{scene_id}.usd")
+        jobs.append(ConversionJob(scene_id=scene_id, obj_path=obj_path, usd_path=usd_path))
+
+    if scene_ids is not None:
+        missing = set(scene_ids) - {job.scene_id for job in jobs}
+        if missing:
+            print(f"[WARN]: No .obj mesh found for scenes: {sorted(missing)}")
+    return jobs
+
+
+async def convert_scenes(
+    jobs: List[ConversionJob],
+    context: AssetConverterContext,
+    num_workers: int = 4,
+    manifest_path: str | None = None,
+    overwrite: bool = False,
+) -> List[ConversionRecord]:
+    """Converts the scenes with at most :obj:`num_workers` conversions running at the same time.
+
+    Args:
+        jobs: The scenes to convert.
+        context: Settings of the asset converter.
+        num_workers: Maximum number of concurrent conversions. Defaults to 4.
+        manifest_path: JSON file the records are merged into. Defaults to None, in which case no manifest is written.
+        overwrite: Convert scenes whose ``.usd`` is up to date. Defaults to False.
+
+    Returns:
+        The record of each job, in the order of the jobs.
+    """
+    semaphore = asyncio.Semaphore(num_workers)
+    manifest = load_manifest(manifest_path) if manifest_path is not None else {}
+
+    async def convert(job: ConversionJob) -> ConversionRecord:
+        if not overwrite and job.is_up_to_date():
+            status, duration = "skipped", 0.0
+        else:
+            async with semaphore:
+                print(f"[INFO]: Converting scene {job.scene_id}...")
+                start_time = time.time()
+                success = await MatterportConverter(job.obj_path, context).convert_asset_to_usd(job.usd_path)
+                status, duration = "converted" if success else "failed", time.time() - start_time
+
+        record = ConversionRecord(
+            scene_id=job.scene_id,
+            obj_path=job.obj_path,
+            usd_path=job.usd_path,
+            status=status,
+            duration=duration,
+            obj_size=os.path.getsize(job.obj_path),
+            usd_size=os.path.getsize(job.usd_path) if status != "failed" and os.path.isfile(job.usd_path) else 0,
+        )
+        print(f"[INFO]: Scene {job.scene_id}: {status} ({duration:.1f}s, {record.usd_size / 1e6:.1f} MB).")
+        # a skipped scene keeps the timings of its last conversion
+        if manifest_path is not None and not (status == "skipped" and job.scene_id in manifest):
+            manifest[job.scene_id] = asdict(record)
+            save_manifest(manifest_path, manifest)
+        return record
+
+    return await asyncio.gather(*[convert(job) for job in jobs])
+
+
+def load_manifest(manifest_path: str) -> Dict[str, dict]:
+    """Returns the records of a manifest keyed by scene id, or an empty dict if it does not exist."""
+    try:
+        with open(manifest_path) as f:
+            return {record["scene_id"]: record for record in json.load(f)["scenes"]}
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(manifest_path: str, manifest: Dict[str, dict]):
+    """Writes the records of a manifest, sorted by scene id."""
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+    tmp_file = f"{manifest_path}.tmp{os.getpid()}"
+    with open(tmp_file, "w") as f:
+        json.dump({"scenes": [manifest[scene_id] for scene_id in sorted(manifest)]}, f, indent=2)
+    os.replace(tmp_file, manifest_path)
@@ -1,2 +1,3 @@
+from .rsl_rl_ppo_cfg import VLNPpoAlgorithmCfg
 from .go2 import *
 from .h1 import *
\ No newline at end of file
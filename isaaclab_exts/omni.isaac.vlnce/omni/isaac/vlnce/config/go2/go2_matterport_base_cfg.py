@@ -1,7 +1,6 @@
 import os
 import math
 
-from omni.isaac.lab.envs import ManagerBasedRLEnvCfg
 from omni.isaac.lab.assets import ArticulationCfg, AssetBaseCfg
 from omni.isaac.lab.managers import ObservationGroupCfg as ObsGroup
 from omni.isaac.lab.managers import ObservationTermCfg as ObsTerm
@@ -25,6 +24,7 @@ from omni.isaac.lab.sensors.ray_caster import RayCasterCameraCfg, patterns
 
 from omni.isaac.vlnce.utils import ASSETS_DIR
 import omni.isaac.vlnce.vlnce.mdp as mdp
+from omni.isaac.vlnce.vlnce.vln_env_cfg import VLNEnvCfg
 
 ##
 # Pre-defined configs
@@ -32,8 +32,8 @@ import omni.isaac.vlnce.vlnce.mdp as mdp
 from omni.isaac.lab_tasks.utils.wrappers.rsl_rl import (
     RslRlOnPolicyRunnerCfg,
     RslRlPpoActorCriticCfg,
-    RslRlPpoAlgorithmCfg,
 )
+from omni.isaac.vlnce.config.rsl_rl_ppo_cfg import VLNPpoAlgorithmCfg
 
 
 @configclass
@@ -49,7 +49,7 @@ class Go2RoughPPORunnerCfg(RslRlOnPolicyRunnerCfg):
         critic_hidden_dims=[512, 256, 128],
         activation="elu",
     )
-    algorithm = RslRlPpoAlgorithmCfg(
+    algorithm = VLNPpoAlgorithmCfg(
         value_loss_coef=1.0,
         use_clipped_value_loss=True,
         clip_param=0.2,
@@ -347,7 +347,7 @@ class TerrainSceneCfg(InteractiveSceneCfg):
 ##
 
 @configclass
-class Go2MatterportBaseCfg(ManagerBasedRLEnvCfg):
+class Go2MatterportBaseCfg(VLNEnvCfg):
     """Configuration for the locomotion velocity-tracking environment."""
 
     # Basic settings
@@ -366,6 +366,8 @@ class Go2MatterportBaseCfg(ManagerBasedRLEnvCfg):
         # general settings
         self.decimation = 4  # 4->50 Hz
         self.sim.render_interval = 4
+        # camera observations are only computed for the high-level planner
+        self.lazy_obs_groups = ["camera_obs", "viz_camera_obs"]
         self.episode_length_s = 200000.0
         # simulation settings
         self.sim.dt = 0.005
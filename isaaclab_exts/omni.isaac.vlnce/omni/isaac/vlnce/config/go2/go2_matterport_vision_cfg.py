@@ -173,3 +173,4 @@ class Go2MatterportVisionCfg(Go2MatterportBaseCfg):
         # general settings
         self.scene.lidar_sensor.update_period = 4*self.sim.dt
         self.scene.height_scanner.pattern_cfg.size = [3.0, 2.0]
+        self.lazy_obs_groups = ["camera_obs", "viz_camera_obs", "depth_obs"]
@@ -1,7 +1,6 @@
 import os
 import math
 
-from omni.isaac.lab.envs import ManagerBasedRLEnvCfg
 from omni.isaac.lab.managers import ObservationGroupCfg as ObsGroup
 from omni.isaac.lab.managers import ObservationTermCfg as ObsTerm
 from omni.isaac.lab.managers import RewardTermCfg as RewTerm
@@ -22,13 +21,14 @@ from omni.isaac.lab.sensors.ray_caster import RayCasterCameraCfg, patterns
 
 from omni.isaac.lab_assets import H1_MINIMAL_CFG  # isort: skip
 import omni.isaac.vlnce.vlnce.mdp as mdp
+from omni.isaac.vlnce.vlnce.vln_env_cfg import VLNEnvCfg
 from omni.isaac.vlnce.utils import ASSETS_DIR
 
 from omni.isaac.lab_tasks.utils.wrappers.rsl_rl import (
     RslRlOnPolicyRunnerCfg,
     RslRlPpoActorCriticCfg,
-    RslRlPpoAlgorithmCfg,
 )
+from omni.isaac.vlnce.config.rsl_rl_ppo_cfg import VLNPpoAlgorithmCfg
 
 
 @configclass
@@ -45,7 +45,7 @@ class H1RoughPPORunnerCfg(RslRlOnPolicyRunnerCfg):
         activation="elu",
         class_name="ActorCritic",
     )
-    algorithm = RslRlPpoAlgorithmCfg(
+    algorithm = VLNPpoAlgorithmCfg(
         value_loss_coef=1.0,
         use_clipped_value_loss=True,
         clip_param=0.2,
@@ -320,7 +320,7 @@ class TerrainSceneCfg(InteractiveSceneCfg):
 ##
 
 @configclass
-class H1MatterportBaseCfg(ManagerBasedRLEnvCfg):
+class H1MatterportBaseCfg(VLNEnvCfg):
     """Configuration for the locomotion velocity-tracking environment."""
 
     # Basic settings
@@ -341,6 +341,8 @@ class H1MatterportBaseCfg(ManagerBasedRLEnvCfg):
         self.episode_length_s = 200000.0
         # simulation settings
         self.sim.render_interval = 4
+        # camera observations are only computed for the high-level planner
+        self.lazy_obs_groups = ["camera_obs", "viz_camera_obs"]
         self.sim.dt = 0.005
         self.sim.disable_contact_processing = True
         self.sim.physics_material.static_friction = 1.0
@@ -1,7 +1,6 @@
 import os
 import math
 
-from omni.isaac.lab.envs import ManagerBasedRLEnvCfg
 from omni.isaac.lab.managers import ObservationGroupCfg as ObsGroup
 from omni.isaac.lab.managers import ObservationTermCfg as ObsTerm
 from omni.isaac.lab.managers import RewardTermCfg as RewTerm
@@ -20,6 +19,7 @@ from omni.isaac.lab.sensors.ray_caster import RayCasterCameraCfg, patterns
 
 from omni.isaac.lab_assets import H1_MINIMAL_CFG  # isort: skip
 import omni.isaac.vlnce.vlnce.mdp as mdp
+from omni.isaac.vlnce.vlnce.vln_env_cfg import VLNEnvCfg
 from omni.isaac.vlnce.utils import ASSETS_DIR
 
 from .h1_matterport_base_cfg import H1RoughPPORunnerCfg
@@ -347,7 +347,7 @@ class TerrainSceneCfg(InteractiveSceneCfg):
 ##
 
 @configclass
-class H1MatterportVisionCfg(ManagerBasedRLEnvCfg):
+class H1MatterportVisionCfg(VLNEnvCfg):
     """Configuration for the locomotion velocity-tracking environment."""
 
     # Basic settings
@@ -368,6 +368,8 @@ class H1MatterportVisionCfg(ManagerBasedRLEnvCfg):
         self.episode_length_s = 200000.0
         # simulation settings
         self.sim.render_interval = 4
+        # camera observations are only computed for the high-level planner
+        self.lazy_obs_groups = ["camera_obs", "viz_camera_obs", "depth_obs"]
         self.sim.dt = 0.005
         self.sim.disable_contact_processing = True
         self.sim.physics_material.static_friction = 1.0
@@ -0,0 +1,27 @@
+from omni.isaac.lab.utils import configclass
+
+from omni.isaac.lab_tasks.utils.wrappers.rsl_rl import RslRlPpoAlgorithmCfg
+
+
+@configclass
+class VLNPpoAlgorithmCfg(RslRlPpoAlgorithmCfg):
+    """Configuration for the PPO algorithm of the rsl_rl version in ``scripts/rsl_rl``.
+
+    Adds the update options of :class:`rsl_rl.algorithms.PPO` to the Isaac Lab configuration. All options are disabled
+    by default, which gives the update of the stock PPO.
+    """
+
+    packed_storage: bool = False
+    """Whether to pack the rollout into one buffer that is reshuffled once per epoch. Defaults to False.
+
+    Only used for feed-forward policies.
+    """
+
+    amp: bool = False
+    """Whether to run the forward passes of the update in mixed precision. Defaults to False."""
+
+    amp_dtype: str = "bfloat16"
+    """Data type of the mixed precision update, ``"bfloat16"`` or ``"float16"``. Defaults to ``"bfloat16"``."""
+
+    fused_optimizer: bool = False
+    """Whether to use the fused Adam kernel on CUDA. Defaults to False."""
@@ -2,10 +2,19 @@ import os
 
 ASSETS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../assets"))
 
-from .wrappers import RslRlVecEnvHistoryWrapper, VLNEnvWrapper
+from .episode_store import EpisodeStore, load_episode_store
+from .frame_export import ExportedFrame, FrameExporter
+from .scene_prefetch import ScenePrefetcher
+from .wrappers import RslRlVecEnvHistoryWrapper, VLNBatchEnvWrapper, VLNEnvWrapper
 
 __all__ = [
     "ASSETS_DIR",
+    "EpisodeStore",
+    "load_episode_store",
+    "ExportedFrame",
+    "FrameExporter",
     "RslRlVecEnvHistoryWrapper",
+    "ScenePrefetcher",
+    "VLNBatchEnvWrapper",
     "VLNEnvWrapper",
 ]
\ No newline at end of file
@@ -0,0 +1,287 @@
+"""Indexed episode store for the VLN-CE Isaac dataset.
+
+The dataset ships as a single gzipped json file (``vln_ce_isaac_v1.json.gz``) which has to be fully parsed to
+access a single episode. The :class:`EpisodeStore` converts the dataset once into a compact indexed format and
+afterwards serves single episodes in O(1) without touching the rest of the file:
+
+.. code-block:: none
+
+    <store_dir>/
+    ├─ index.json                  # source info, episode_id -> index, scene_id -> indices
+    ├─ records.jsonl               # one json record per episode (without the paths)
+    ├─ record_offsets.npy          # int64 byte offsets of the records, shape (N + 1,)
+    ├─ reference_path.npy          # float32 points of all reference paths, shape (P, 3)
+    ├─ reference_path_offsets.npy  # int64 row offsets into reference_path.npy, shape (N + 1,)
+    ├─ gt_locations.npy            # float32 points of all gt locations, shape (G, 3)
+    └─ gt_locations_offsets.npy    # int64 row offsets into gt_locations.npy, shape (N + 1,)
+
+All files are memory-mapped and only opened on first access.
+
+.. code-block:: python
+
+    from omni.isaac.vlnce.utils import load_episode_store
+
+    store = load_episode_store(os.path.join(ASSETS_DIR, "vln_ce_isaac_v1.json.gz"))
+    episode = store[episode_idx]
+    scene_episodes = store.get_scene_indices("5q7pvUzZiYa")
+
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import mmap
+import os
+import shutil
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+STORE_VERSION = 1
+"""Version of the on-disk layout. Stores written with a different version are rebuilt."""
+
+PATH_KEYS = ("reference_path", "gt_locations")
+"""Episode entries that are stored as float32 point arrays instead of json."""
+
+
+def scene_key(scene_id: str) -> str:
+    """Returns the scene name used for the matterport assets from a dataset scene id.
+
+    The dataset stores scene ids as ``mp3d/<scene>/<scene>.glb`` while the USD assets are located under
+    ``matterport_usd/<scene>/<scene>.usd``. Plain scene names are returned unchanged.
+    """
+    parts = scene_id.split("/")
+    return parts[1] if len(parts) > 1 else parts[0]
+
+
+def default_store_dir(dataset_file: str) -> str:
+    """Returns the default store directory next to the dataset file."""
+    base_path = dataset_file
+    for ext in (".gz", ".json"):
+        if base_path.endswith(ext):
+            base_path = base_path[: -len(ext)]
+    return base_path + "_store"
+
+
+class EpisodeStore:
+    """Random access to the episodes of a converted VLN-CE dataset.
+
+    Episodes are returned as dictionaries with the same keys as in the json dataset. The entries
+    ``reference_path`` and ``gt_locations`` are returned as read-only float32 arrays of shape (N, 3)
+    that are views into the memory-mapped point files.
+    """
+
+    def __init__(self, store_dir: str):
+        """Opens a converted episode store.
+
+        Args:
+            store_dir: Directory written by :meth:`EpisodeStore.build`.
+        """
+        self.store_dir = store_dir
+
+        with open(os.path.join(store_dir, "index.json")) as f:
+            index = json.load(f)
+        if index.get("version") != STORE_VERSION:
+            raise ValueError(
+                f"Episode store '{store_dir}' has version {index.get('version')}, expected {STORE_VERSION}."
+            )
+        self.source = index["source"]
+        self._episode_id_to_index: Dict[str, int] = index["episode_ids"]
+        self._scene_to_indices: Dict[str, List[int]] = index["scenes"]
+
+        self._record_offsets = np.load(os.path.join(store_dir, "record_offsets.npy"))
+        self._num_episodes = len(self._record_offsets) - 1
+
+        # opened lazily
+        self._records_file = None
+        self._records: Optional[mmap.mmap] = None
+        self._paths: Dict[str, np.ndarray] = {}
+        self._path_offsets: Dict[str, np.ndarray] = {}
+
+    """
+    Construction.
+    """
+
+    @staticmethod
+    def build(dataset_file: str, store_dir: str) -> "EpisodeStore":
+        """Converts a gzipped json dataset into an episode store.
+
+        The store is first written into a temporary directory which is renamed once complete, such that
+        concurrently launched evaluation runs never observe a partially written store.
+
+        Args:
+            dataset_file: Path to the ``.json.gz`` (or plain ``.json``) dataset.
+            store_dir: Output directory of the store.
+
+        Returns:
+            The opened episode store.
+        """
+        open_fn = gzip.open if dataset_file.endswith(".gz") else open
+        with open_fn(dataset_file, "rt") as f:
+            episodes = json.load(f)["episodes"]
+
+        tmp_dir = f"{store_dir}.tmp{os.getpid()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        record_offsets = np.zeros(len(episodes) + 1, dtype=np.int64)
+        paths = {key: [] for key in PATH_KEYS}
+        path_offsets = {key: np.zeros(len(episodes) + 1, dtype=np.int64) for key in PATH_KEYS}
+        episode_ids: Dict[str, int] = {}
+        scenes: Dict[str, List[int]] = {}
+
+        with open(os.path.join(tmp_dir, "records.jsonl"), "wb") as f:
+            for idx, episode in enumerate(episodes):
+                record = {key: value for key, value in episode.items() if key not in PATH_KEYS}
+                line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+                f.write(line)
+                record_offsets[idx + 1] = record_offsets[idx] + len(line)
+
+                for key in PATH_KEYS:
+                    points = np.asarray(episode.get(key, []), dtype=np.float32).reshape(-1, 3)
+                    paths[key].append(points)
+                    path_offsets[key][idx + 1] = path_offsets[key][idx] + len(points)
+
+                episode_ids[str(episode["episode_id"])] = idx
+                scenes.setdefault(scene_key(episode["scene_id"]), []).append(idx)
+
+        np.save(os.path.join(tmp_dir, "record_offsets.npy"), record_offsets)
+        for key in PATH_KEYS:
+            points = np.concatenate(paths[key]) if paths[key] else np.zeros((0, 3), dtype=np.float32)
+            np.save(os.path.join(tmp_dir, f"{key}.npy"), points)
+            np.save(os.path.join(tmp_dir, f"{key}_offsets.npy"), path_offsets[key])
+
+        stat = os.stat(dataset_file)
+        index = {
+            "version": STORE_VERSION,
+            "source": {"file": os.path.abspath(dataset_file), "size": stat.st_size, "mtime": stat.st_mtime},
+            "episode_ids": episode_ids,
+            "scenes": scenes,
+        }
+        with open(os.path.join(tmp_dir, "index.json"), "w") as f:
+            json.dump(index, f)
+
+        # replace a stale store
+        if os.path.isdir(store_dir):
+            shutil.rmtree(store_dir)
+        try:
+            os.rename(tmp_dir, store_dir)
+        except OSError:
+            # another process finished the conversion first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        return EpisodeStore(store_dir)
+
+    def is_up_to_date(self, dataset_file: str) -> bool:
+        """Checks whether the store was converted from the current version of the dataset file."""
+        stat = os.stat(dataset_file)
+        return self.source["size"] == stat.st_size and self.source["mtime"] == stat.st_mtime
+
+    """
+    Properties.
+    """
+
+    def __len__(self) -> int:
+        return self._num_episodes
+
+    @property
+    def scene_ids(self) -> List[str]:
+        """Scene names contained in the store, in order of first appearance."""
+        return list(self._scene_to_indices.keys())
+
+    """
+    Operations.
+    """
+
+    def __getitem__(self, idx: int) -> Dict[str, Any]:
+        """Returns the episode at the given index of the dataset."""
+        if idx < 0:
+            idx += self._num_episodes
+        if not 0 <= idx < self._num_episodes:
+            raise IndexError(f"Episode index {idx} out of range for store with {self._num_episodes} episodes.")
+
+        start, end = self._record_offsets[idx], self._record_offsets[idx + 1]
+        episode = json.loads(self._get_records()[start:end])
+        for key in PATH_KEYS:
+            points, offsets = self._get_path(key)
+            episode[key] = points[offsets[idx] : offsets[idx + 1]]
+        return episode
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for idx in range(self._num_episodes):
+            yield self[idx]
+
+    def get_index(self, episode_id: int | str) -> int:
+        """Returns the dataset index of the episode with the given id."""
+        try:
+            return self._episode_id_to_index[str(episode_id)]
+        except KeyError:
+            raise KeyError(f"Episode id '{episode_id}' not found in episode store '{self.store_dir}'.") from None
+
+    def get_by_episode_id(self, episode_id: int | str) -> Dict[str, Any]:
+        """Returns the episode with the given id."""
+        return self[self.get_index(episode_id)]
+
+    def get_scene_indices(self, scene_id: str) -> List[int]:
+        """Returns the dataset indices of all episodes in a scene.
+
+        Args:
+            scene_id: Either the scene name or the scene id as stored in the dataset.
+        """
+        return list(self._scene_to_indices.get(scene_key(scene_id), []))
+
+    def get_scene_episodes(self, scene_id: str) -> List[Dict[str, Any]]:
+        """Returns all episodes in a scene."""
+        return [self[idx] for idx in self.get_scene_indices(scene_id)]
+
+    def close(self):
+        """Releases the memory maps of the store."""
+        if self._records is not None:
+            self._records.close()
+            self._records_file.close()
+            self._records, self._records_file = None, None
+        self._paths.clear()
+        self._path_offsets.clear()
+
+    """
+    Helper functions.
+    """
+
+    def _get_records(self) -> mmap.mmap:
+        if self._records is None:
+            self._records_file = open(os.path.join(self.store_dir, "records.jsonl"), "rb")
+            self._records = mmap.mmap(self._records_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._records
+
+    def _get_path(self, key: str) -> tuple[np.ndarray, np.ndarray]:
+        if key not in self._paths:
+            self._paths[key] = np.load(os.path.join(self.store_dir, f"{key}.npy"), mmap_mode="r")
+            self._path_offsets[key] = np.load(os.path.join(self.store_dir, f"{key}_offsets.npy"))
+        return self._paths[key], self._path_offsets[key]
+
+
+def load_episode_store(dataset_file: str, store_dir: Optional[str] = None) -> EpisodeStore:
+    """Opens the episode store of a dataset and converts the dataset first if necessary.
+
+    The store is (re-)built if it does not exist yet or if the dataset file changed since the conversion.
+
+    Args:
+        dataset_file: Path to the ``.json.gz`` dataset.
+        store_dir: Directory of the store. Defaults to ``<dataset>_store`` next to the dataset file.
+
+    Returns:
+        The opened episode store.
+    """
+    if store_dir is None:
+        store_dir = default_store_dir(dataset_file)
+
+    if os.path.isfile(os.path.join(store_dir, "index.json")):
+        try:
+            store = EpisodeStore(store_dir)
+        except ValueError:
+            store = None
+        if store is not None and (not os.path.isfile(dataset_file) or store.is_up_to_date(dataset_file)):
+            return store
+
+    print(f"[INFO]: Converting dataset '{dataset_file}' into episode store '{store_dir}'...")
+    return EpisodeStore.build(dataset_file, store_dir)
@@ -0,0 +1,265 @@
+"""Asynchronous export of camera frames from the simulation device to the host.
+
+Reading a camera frame with ``.cpu().numpy()`` blocks the simulation thread until all queued GPU work and the
+device-to-host copy are done. The :class:`FrameExporter` moves this off the simulation thread:
+
+1. :meth:`FrameExporter.submit` enqueues the rotation, resize and dtype conversion of the frame on a side CUDA
+   stream, followed by a non-blocking copy into one of a few pinned host buffers. It returns immediately.
+2. A worker thread waits for the copy to finish and puts the frame into a bounded queue.
+3. The consumer (e.g. the high-level planner) takes frames from the queue with :meth:`FrameExporter.get` and
+   hands the host buffer back with :meth:`ExportedFrame.release`.
+
+The simulation thread never waits: if all host buffers are in use, the submitted frame is dropped, and if the
+consumer falls behind, the oldest frame in the queue is dropped. :meth:`FrameExporter.close` hands the frames still in
+flight to the consumer and then ends the stream, after which :meth:`FrameExporter.get` returns None.
+
+.. code-block:: python
+
+    exporter = FrameExporter(device=env.unwrapped.device, rotation=-1, dtype=torch.uint8)
+    exporter.submit(obs["camera_obs"][0, :, :, :3], step=it)
+
+    # consumer thread
+    while (frame := exporter.get()) is not None:
+        with frame:
+            cv2.imwrite(f"rgb_{frame.step}.png", frame.image)
+
+    # simulation thread, after the last frame
+    exporter.close()
+
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+
+@dataclass
+class ExportedFrame:
+    """A frame on the host, backed by one of the pinned buffers of the exporter."""
+
+    image: np.ndarray
+    """The frame, shape (..., H, W, C). The array is only valid until the frame is released."""
+    step: Any
+    """The tag passed to :meth:`FrameExporter.submit`."""
+    buffer_idx: int
+    """Index of the host buffer holding the frame."""
+    exporter: "FrameExporter"
+
+    def release(self):
+        """Hands the host buffer back to the exporter. The image must not be used afterwards."""
+        if self.buffer_idx >= 0:
+            self.exporter._release_buffer(self.buffer_idx)
+            self.buffer_idx = -1
+
+    def __enter__(self) -> "ExportedFrame":
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+class FrameExporter:
+    """Copies camera frames to the host on a side stream and hands them to a consumer through a bounded queue.
+
+    Frames are tensors of shape (..., H, W, C) on the simulation device. All frames passed to one exporter must have
+    the same shape. Without CUDA, the frames are transformed and copied synchronously, but are still handed over
+    through the queue.
+    """
+
+    def __init__(
+        self,
+        device: str | torch.device = "cuda",
+        num_buffers: int = 4,
+        queue_size: int = 2,
+        rotation: int = 0,
+        resize: Optional[Tuple[int, int]] = None,
+        dtype: Optional[torch.dtype] = None,
+    ):
+        """Initializes the exporter. The host buffers are allocated on the first submitted frame.
+
+        Args:
+            device: Device of the submitted frames.
+            num_buffers: Number of pinned host buffers, i.e. the maximum number of frames in flight.
+            queue_size: Maximum number of finished frames waiting for the consumer.
+            rotation: Number of counter-clockwise 90 degree rotations of the frame, e.g. -1 to rotate clockwise.
+            resize: Output size (H, W) of the frame after rotation. Defaults to None (no resize).
+            dtype: Output data type of the frame. Defaults to None (the type of the submitted frames).
+        """
+        if num_buffers < 1 or queue_size < 1:
+            raise ValueError(f"Number of buffers ({num_buffers}) and queue size ({queue_size}) must be positive.")
+        self.device = torch.device(device)
+        self.num_buffers = num_buffers
+        self.rotation = rotation % 4
+        self.resize = resize
+        self.dtype = dtype
+
+        self.use_cuda = self.device.type == "cuda" and torch.cuda.is_available()
+        self.stream = torch.cuda.Stream(device=self.device) if self.use_cuda else None
+
+        # allocated on the first frame
+        self._host_buffers: list[torch.Tensor] = []
+        self._free_buffers: queue.SimpleQueue = queue.SimpleQueue()
+        # frames whose copy is in flight, and frames ready for the consumer
+        self._pending: queue.SimpleQueue = queue.SimpleQueue()
+        self._ready: queue.Queue = queue.Queue(maxsize=queue_size)
+
+        self.num_submitted = 0
+        self.num_dropped = 0
+        self._closed = False
+        self._flush = True
+
+        self._worker = threading.Thread(target=self._run_worker, name="FrameExporter", daemon=True)
+        self._worker.start()
+
+    """
+    Operations.
+    """
+
+    def submit(self, frame: torch.Tensor, step: Any = None) -> bool:
+        """Enqueues the export of a frame without waiting for it.
+
+        The frame is read on the side stream after all work queued so far on the current stream, so the caller may
+        overwrite it right away (e.g. with the next sensor update).
+
+        Args:
+            frame: The frame on the simulation device, shape (..., H, W, C).
+            step: Tag handed to the consumer with the frame, e.g. the step counter.
+
+        Returns:
+            Whether the frame was enqueued. False if all host buffers are in use and the frame was dropped.
+        """
+        if not self._host_buffers:
+            self._allocate_buffers(frame)
+        try:
+            buffer_idx = self._free_buffers.get_nowait()
+        except queue.Empty:
+            self.num_dropped += 1
+            return False
+        self.num_submitted += 1
+
+        if self.use_cuda:
+            self.stream.wait_stream(torch.cuda.current_stream(self.device))
+            with torch.cuda.stream(self.stream):
+                # keep the frame alive until the side stream read it
+                frame.record_stream(self.stream)
+                self._host_buffers[buffer_idx].copy_(self._transform(frame), non_blocking=True)
+                event = torch.cuda.Event()
+                event.record(self.stream)
+        else:
+            self._host_buffers[buffer_idx].copy_(self._transform(frame))
+            event = None
+        self._pending.put((buffer_idx, event, step))
+        return True
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Optional[ExportedFrame]:
+        """Takes the oldest finished frame from the queue.
+
+        Args:
+            block: Whether to wait for a frame. Defaults to True.
+            timeout: Maximum time to wait in seconds. Defaults to None (wait forever).
+
+        Returns:
+            The frame, or None if no frame is available or the exporter was closed and all frames were taken. The
+            frame has to be released after use.
+        """
+        try:
+            item = self._ready.get(block=block, timeout=timeout)
+        except queue.Empty:
+            return None
+        if item is None:
+            # keep the end of the stream for the next call
+            self._ready.put(None)
+            return None
+        buffer_idx, step = item
+        image = self._host_buffers[buffer_idx].numpy()
+        return ExportedFrame(image=image, step=step, buffer_idx=buffer_idx, exporter=self)
+
+    def close(self, flush: bool = True):
+        """Stops the worker thread and ends the stream of frames for the consumer.
+
+        Args:
+            flush: Whether to hand the frames still in flight to the consumer. The call then waits until the consumer
+                took them from the queue. Defaults to True. Otherwise, the frames are discarded.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._flush = flush
+        self._pending.put(None)
+        self._worker.join()
+
+    """
+    Helper functions.
+    """
+
+    def _transform(self, frame: torch.Tensor) -> torch.Tensor:
+        """Rotates, resizes and converts the frame on the device."""
+        if self.rotation != 0:
+            frame = torch.rot90(frame, k=self.rotation, dims=(-3, -2))
+        if self.resize is not None:
+            lead_shape = frame.shape[:-3]
+            images = frame.reshape(-1, *frame.shape[-3:]).permute(0, 3, 1, 2).float()
+            images = F.interpolate(images, size=self.resize, mode="bilinear", align_corners=False)
+            frame = images.permute(0, 2, 3, 1).reshape(*lead_shape, *self.resize, frame.shape[-1])
+        if self.dtype is not None and frame.dtype != self.dtype:
+            if not self.dtype.is_floating_point:
+                frame = frame.round().clamp(torch.iinfo(self.dtype).min, torch.iinfo(self.dtype).max)
+            frame = frame.to(self.dtype)
+        return frame
+
+    def _allocate_buffers(self, frame: torch.Tensor):
+        shape = list(frame.shape)
+        if self.rotation % 2 == 1:
+            shape[-3], shape[-2] = shape[-2], shape[-3]
+        if self.resize is not None:
+            shape[-3], shape[-2] = self.resize
+        dtype = self.dtype if self.dtype is not None else frame.dtype
+        for buffer_idx in range(self.num_buffers):
+            self._host_buffers.append(torch.empty(shape, dtype=dtype, pin_memory=self.use_cuda))
+            self._free_buffers.put(buffer_idx)
+
+    def _release_buffer(self, buffer_idx: int):
+        self._free_buffers.put(buffer_idx)
+
+    def _run_worker(self):
+        """Waits for the copies in submission order and moves the finished frames to the consumer queue."""
+        while True:
+            item = self._pending.get()
+            if item is None:
+                # end of the stream
+                self._put_ready(None, block=self._flush)
+                return
+            buffer_idx, event, step = item
+            if event is not None:
+                event.synchronize()
+            if self._closed and not self._flush:
+                self._release_buffer(buffer_idx)
+                self.num_dropped += 1
+            else:
+                # frames flushed on close are not dropped
+                self._put_ready((buffer_idx, step), block=self._closed)
+
+    def _put_ready(self, item: Optional[Tuple[int, Any]], block: bool):
+        """Puts an item into the consumer queue, dropping the oldest frame if the queue is full and not blocking."""
+        if block:
+            self._ready.put(item)
+            return
+        while True:
+            try:
+                self._ready.put_nowait(item)
+                return
+            except queue.Full:
+                # the consumer fell behind, drop the oldest frame
+                try:
+                    dropped_idx, _ = self._ready.get_nowait()
+                except queue.Empty:
+                    continue
+                self._release_buffer(dropped_idx)
+                self.num_dropped += 1
@@ -0,0 +1,333 @@
+"""Precomputed geodesic distance fields for the VLN-CE episodes.
+
+The distance to the goal of an episode is the length of the shortest path on the navigable floor of the scene. For
+each episode, the navigable floor is rasterized from the Matterport ``.ply`` mesh into a 2D grid, and the geodesic
+distance from every cell to the goal is computed with Dijkstra's algorithm on the 8-connected grid. The fields are
+cached on disk and looked up with bilinear interpolation, so computing the distance to the goal at runtime is O(1):
+
+.. code-block:: none
+
+    <field_dir>/
+    └─ <scene>/
+        └─ <episode_id>.npz   # field (H, W) float32, origin (2,), resolution
+
+All fields of a scene share the same grid, which spans the bounds of the scene mesh.
+
+.. code-block:: python
+
+    from omni.isaac.vlnce.utils.geodesic import load_geodesic_field
+
+    field = load_geodesic_field(episode)
+    distance_to_goal = field.distance(robot_pos_w[:, :2])
+
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import torch
+from scipy import ndimage
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from .episode_store import scene_key
+
+GEODESIC_FIELD_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../assets/geodesic_fields"))
+"""Default directory of the cached distance fields."""
+
+
+class GeodesicDistanceField:
+    """Geodesic distance to a goal, sampled on a 2D grid.
+
+    The value of a cell is the distance from the cell center to the goal. Cells that are not navigable or not
+    connected to the goal carry the value of the closest reachable cell plus the euclidean distance to it, such that
+    positions close to walls (and slightly outside the navigable floor) still return meaningful distances.
+    """
+
+    def __init__(self, field: np.ndarray, origin: np.ndarray, resolution: float):
+        """Initializes the distance field.
+
+        Args:
+            field: Distances of the cells, shape (H, W). The first axis corresponds to x, the second to y.
+            origin: Position of the lower corner of the grid (x, y).
+            resolution: Size of a cell in meters.
+        """
+        self.field = np.asarray(field, dtype=np.float32)
+        self.origin = np.asarray(origin, dtype=np.float32)
+        self.resolution = float(resolution)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.field.shape
+
+    def distance(self, points: np.ndarray) -> np.ndarray:
+        """Bilinear lookup of the distance to the goal.
+
+        Args:
+            points: Positions of shape (N, 2) or (N, 3). Only the x and y coordinates are used.
+
+        Returns:
+            The distances of shape (N,).
+        """
+        points = np.asarray(points, dtype=np.float32)[:, :2]
+        cell = (points - self.origin) / self.resolution - 0.5
+        upper = np.array(self.shape, dtype=np.float32) - 1
+        cell_clipped = np.clip(cell, 0.0, upper)
+
+        lower_idx = np.minimum(np.floor(cell_clipped).astype(np.int64), np.array(self.shape) - 2)
+        lower_idx = np.maximum(lower_idx, 0)
+        weights = cell_clipped - lower_idx
+        x0, y0 = lower_idx[:, 0], lower_idx[:, 1]
+        x1, y1 = np.minimum(x0 + 1, self.shape[0] - 1), np.minimum(y0 + 1, self.shape[1] - 1)
+        wx, wy = weights[:, 0], weights[:, 1]
+
+        distance = (
+            self.field[x0, y0] * (1 - wx) * (1 - wy)
+            + self.field[x1, y0] * wx * (1 - wy)
+            + self.field[x0, y1] * (1 - wx) * wy
+            + self.field[x1, y1] * wx * wy
+        )
+        # positions outside of the grid
+        return distance + np.linalg.norm(cell - cell_clipped, axis=1) * self.resolution
+
+    def save(self, file_path: str):
+        """Saves the field to a ``.npz`` file."""
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        np.savez(file_path, field=self.field, origin=self.origin, resolution=self.resolution)
+
+    @staticmethod
+    def load(file_path: str) -> "GeodesicDistanceField":
+        """Loads a field written by :meth:`save`."""
+        data = np.load(file_path)
+        return GeodesicDistanceField(data["field"], data["origin"], float(data["resolution"]))
+
+
+def batch_distance(
+    fields: torch.Tensor, origin: torch.Tensor, resolution: float, points: torch.Tensor
+) -> torch.Tensor:
+    """Bilinear lookup of the distance fields of a batch of environments on the device.
+
+    Same as :meth:`GeodesicDistanceField.distance` for one field per environment.
+
+    Args:
+        fields: Distance fields of shape (N, H, W). All fields have to share the same grid.
+        origin: Position of the lower corner of the grid (x, y).
+        resolution: Size of a cell in meters.
+        points: One position per environment, shape (N, 2) or (N, 3).
+
+    Returns:
+        The distances of shape (N,).
+    """
+    shape = torch.tensor(fields.shape[1:], device=fields.device)
+    cell = (points[:, :2] - origin) / resolution - 0.5
+    cell_clipped = torch.minimum(cell.clamp(min=0.0), (shape - 1).float())
+
+    lower_idx = torch.minimum(cell_clipped.floor().long(), (shape - 2).clamp(min=0))
+    weights = cell_clipped - lower_idx
+    x0, y0 = lower_idx[:, 0], lower_idx[:, 1]
+    x1, y1 = torch.minimum(x0 + 1, shape[0] - 1), torch.minimum(y0 + 1, shape[1] - 1)
+    wx, wy = weights[:, 0], weights[:, 1]
+
+    env_ids = torch.arange(fields.shape[0], device=fields.device)
+    distance = (
+        fields[env_ids, x0, y0] * (1 - wx) * (1 - wy)
+        + fields[env_ids, x1, y0] * wx * (1 - wy)
+        + fields[env_ids, x0, y1] * (1 - wx) * wy
+        + fields[env_ids, x1, y1] * wx * wy
+    )
+    return distance + torch.norm(cell - cell_clipped, dim=1) * resolution
+
+
+"""
+Field computation.
+"""
+
+
+class SceneRasterizer:
+    """Rasterizes the navigable floor of a scene mesh into occupancy grids.
+
+    The mesh is subdivided once such that each triangle is smaller than half a cell. A cell is navigable if it
+    contains an upward facing triangle within the floor height band, and no triangle between the step height and
+    the clearance height above the floor.
+    """
+
+    def __init__(
+        self,
+        mesh_file: str,
+        resolution: float = 0.1,
+        max_slope: float = np.deg2rad(30.0),
+        step_height: float = 0.3,
+        clearance_height: float = 1.0,
+    ):
+        """Loads and subdivides the scene mesh.
+
+        Args:
+            mesh_file: Path to the ``.ply`` mesh of the scene.
+            resolution: Size of a cell in meters.
+            max_slope: Maximum slope of a floor triangle in radians.
+            step_height: Height above the floor up to which geometry does not block a cell.
+            clearance_height: Height above the floor up to which geometry blocks a cell.
+        """
+        self.resolution = resolution
+        self.step_height = step_height
+        self.clearance_height = clearance_height
+
+        # only needed to compute the fields offline, loading them does not require trimesh
+        import trimesh
+
+        mesh = trimesh.load(mesh_file, force="mesh")
+        vertices, faces = trimesh.remesh.subdivide_to_size(mesh.vertices, mesh.faces, max_edge=resolution / 2)
+        triangles = vertices[faces]
+        centers = triangles.mean(axis=1)
+        normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        normals /= np.linalg.norm(normals, axis=1, keepdims=True) + 1e-12
+
+        self.origin = mesh.bounds[0, :2].astype(np.float32)
+        self.shape = tuple(np.ceil((mesh.bounds[1, :2] - mesh.bounds[0, :2]) / resolution).astype(np.int64) + 1)
+
+        self._cells = self._to_cells(centers[:, :2])
+        self._heights = centers[:, 2]
+        self._is_floor = normals[:, 2] > np.cos(max_slope)
+
+    def rasterize(self, min_height: float, max_height: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Rasterizes the navigable floor within a height band.
+
+        Args:
+            min_height: Lowest floor height that is considered.
+            max_height: Highest floor height that is considered.
+
+        Returns:
+            The navigable cells (bool) and the floor height of each cell, both of shape (H, W).
+        """
+        floor_height = np.full(self.shape, np.inf, dtype=np.float32)
+        floor = self._is_floor & (self._heights >= min_height) & (self._heights <= max_height)
+        np.minimum.at(floor_height, tuple(self._cells[floor].T), self._heights[floor])
+
+        # geometry above the floor of the cell that blocks the robot
+        cell_floor_height = floor_height[tuple(self._cells.T)]
+        height_above_floor = self._heights - cell_floor_height
+        blocking = (height_above_floor > self.step_height) & (height_above_floor < self.clearance_height)
+        obstacle = np.zeros(self.shape, dtype=bool)
+        obstacle[tuple(self._cells[blocking].T)] = True
+
+        navigable = np.isfinite(floor_height) & ~obstacle
+        return navigable, floor_height
+
+    def rasterize_layers(self, max_layers: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+        """Rasterizes the navigable floors of all levels of the scene.
+
+        The first layer of a cell is its lowest floor, each further layer is the lowest floor at least the clearance
+        height above the previous layer, e.g. the upper storey above a room or the stairs above a corridor.
+
+        Args:
+            max_layers: Maximum number of floors stacked in a cell.
+
+        Returns:
+            The navigable cells (bool) and the floor height of each cell (inf if the layer has no floor in the cell),
+            both of shape (L, H, W).
+        """
+        cells = tuple(self._cells.T)
+        lower_height = np.full(self.shape, -np.inf, dtype=np.float32)
+        navigable_layers, floor_height_layers = [], []
+        for _ in range(max_layers):
+            floor_height = np.full(self.shape, np.inf, dtype=np.float32)
+            floor = self._is_floor & (self._heights > lower_height[cells] + self.clearance_height)
+            np.minimum.at(floor_height, tuple(self._cells[floor].T), self._heights[floor])
+            if navigable_layers and not np.isfinite(floor_height).any():
+                break
+
+            height_above_floor = self._heights - floor_height[cells]
+            blocking = (height_above_floor > self.step_height) & (height_above_floor < self.clearance_height)
+            obstacle = np.zeros(self.shape, dtype=bool)
+            obstacle[tuple(self._cells[blocking].T)] = True
+
+            navigable_layers.append(np.isfinite(floor_height) & ~obstacle)
+            floor_height_layers.append(floor_height)
+            lower_height = np.where(np.isfinite(floor_height), floor_height, lower_height)
+        return np.stack(navigable_layers), np.stack(floor_height_layers)
+
+    def compute_field(self, goal: np.ndarray, min_height: float, max_height: float) -> GeodesicDistanceField:
+        """Computes the geodesic distance field to a goal on the floor within the height band."""
+        navigable, _ = self.rasterize(min_height, max_height)
+        field = compute_geodesic_distance(navigable, self._to_cells(np.asarray(goal)[None, :2])[0])
+        return GeodesicDistanceField(field * self.resolution, self.origin, self.resolution)
+
+    def _to_cells(self, points: np.ndarray) -> np.ndarray:
+        cells = np.floor((points - self.origin) / self.resolution).astype(np.int64)
+        return np.clip(cells, 0, np.array(self.shape) - 1)
+
+
+def compute_geodesic_distance(navigable: np.ndarray, goal_cell: np.ndarray) -> np.ndarray:
+    """Computes the shortest path distance (in cells) from each cell of a grid to the goal cell.
+
+    Paths are restricted to the navigable cells with 8-connectivity. If the goal cell is not navigable, the
+    closest navigable cell is used. Cells that are not reachable get the distance of the closest reachable cell
+    plus the euclidean distance to it.
+
+    Args:
+        navigable: Navigable cells, shape (H, W).
+        goal_cell: Index of the goal cell (x, y).
+
+    Returns:
+        The distances of shape (H, W).
+    """
+    if not navigable.any():
+        raise ValueError("Grid has no navigable cells.")
+
+    # snap the goal onto the navigable floor
+    _, nearest = ndimage.distance_transform_edt(~navigable, return_indices=True)
+    goal_cell = nearest[:, goal_cell[0], goal_cell[1]]
+
+    # graph over the navigable cells
+    node_ids = np.full(navigable.shape, -1, dtype=np.int64)
+    node_ids[navigable] = np.arange(navigable.sum())
+    height, width = navigable.shape
+    rows, cols, weights = [], [], []
+    for dx, dy in ((1, 0), (0, 1), (1, 1), (1, -1)):
+        src = node_ids[: height - dx, max(0, -dy) : width - max(0, dy)]
+        dst = node_ids[dx:, max(0, dy) : width + min(0, dy)]
+        valid = (src >= 0) & (dst >= 0)
+        rows.append(src[valid])
+        cols.append(dst[valid])
+        weights.append(np.full(valid.sum(), np.hypot(dx, dy)))
+    rows, cols, weights = np.concatenate(rows), np.concatenate(cols), np.concatenate(weights)
+    graph = coo_matrix((weights, (rows, cols)), shape=(navigable.sum(),) * 2).tocsr()
+
+    node_distance = dijkstra(graph, directed=False, indices=node_ids[goal_cell[0], goal_cell[1]])
+    distance = np.full(navigable.shape, np.inf)
+    distance[navigable] = node_distance
+
+    # fill the remaining cells from the closest reachable cell
+    reachable = np.isfinite(distance)
+    offset, nearest = ndimage.distance_transform_edt(~reachable, return_indices=True)
+    return (distance[nearest[0], nearest[1]] + offset).astype(np.float32)
+
+
+def get_field_file(episode: Dict[str, Any], field_dir: Optional[str] = None) -> str:
+    """Returns the path of the cached distance field of an episode."""
+    if field_dir is None:
+        field_dir = GEODESIC_FIELD_DIR
+    return os.path.join(field_dir, scene_key(episode["scene_id"]), f"{episode['episode_id']}.npz")
+
+
+def get_floor_height_band(episode: Dict[str, Any], step_height: float = 0.3) -> Tuple[float, float]:
+    """Returns the floor heights traversed by the reference path of an episode."""
+    heights = np.asarray(episode["reference_path"], dtype=np.float32).reshape(-1, 3)[:, 2]
+    return float(heights.min()) - step_height, float(heights.max()) + step_height
+
+
+def load_geodesic_field(episode: Dict[str, Any], field_dir: Optional[str] = None) -> GeodesicDistanceField:
+    """Loads the cached distance field of an episode.
+
+    The fields are computed offline with ``scripts/compute_geodesic_fields.py``.
+    """
+    file_path = get_field_file(episode, field_dir)
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(
+            f"No geodesic distance field found for episode {episode['episode_id']}: {file_path}. Please run"
+            " scripts/compute_geodesic_fields.py first."
+        )
+    return GeodesicDistanceField.load(file_path)
@@ -0,0 +1,281 @@
+"""Voxelization of lidar hits into a 2.5D height map around the robot.
+
+The :class:`HeightMapVoxelizer` computes the height map observation of the vision policies with fixed-shape tensor
+operations only. The constants (bin edges, sensor mounting and index offsets) are precomputed once and the large
+intermediate tensors are written into preallocated buffers, so a call neither synchronizes with the host nor
+depends on the number of valid hits. This also makes it capturable in a CUDA graph.
+
+For each environment, the lidar hits are transformed into the sensor frame and bucketed into a grid over the x-y
+plane. The height of a cell is the lowest hit in the cell, and the map is dilated with a 3x3 max pooling.
+
+Single lidar scans are sparse and noisy. The :class:`HeightMapHistory` keeps the last maps of each environment in a
+ring buffer on the device and fuses them into a denser map.
+
+.. code-block:: python
+
+    voxelizer = HeightMapVoxelizer(num_envs, num_rays, device=env.device)
+    height_map = voxelizer.compute(sensor.data.ray_hits_w, sensor.data.pos_w, robot.data.root_quat_w, offset=0.0)
+
+    history = HeightMapHistory(num_envs, height_map.shape[1], history_length=5, reduction="max", device=env.device)
+    history.append(height_map)
+    fused_height_map = history.compute()
+
+"""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+import torch
+import torch.nn.functional as F
+
+import omni.isaac.lab.utils.math as math_utils
+
+VOXEL_SIZE_XY = 0.06
+"""Size of a cell in the x and y dimension."""
+
+RANGE_X = (-0.8, 0.2 + 1e-9)
+"""Range of the map along the x-axis of the sensor frame."""
+
+RANGE_Y = (-0.8, 0.8 + 1e-9)
+"""Range of the map along the y-axis of the sensor frame."""
+
+RANGE_Z = (0.0, 5.0)
+"""Range of valid hit heights along the z-axis of the sensor frame."""
+
+SENSOR_QUAT_DEFAULT = (-0.131, 0.0, -0.991, 0.0)
+"""Orientation (w, x, y, z) of the lidar w.r.t. the robot base."""
+
+
+class HeightMapVoxelizer:
+    """Fixed-shape height map computation for a batch of lidar scans.
+
+    Hits outside the map ranges, as well as invalid (inf or nan) hits, are redirected into a single dump cell behind
+    the maps instead of being filtered out, such that all tensors keep their shape.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        num_rays: int,
+        device: str | torch.device = "cuda",
+        voxel_size_xy: float = VOXEL_SIZE_XY,
+        range_x: Sequence[float] = RANGE_X,
+        range_y: Sequence[float] = RANGE_Y,
+        range_z: Sequence[float] = RANGE_Z,
+        sensor_quat_default: Sequence[float] = SENSOR_QUAT_DEFAULT,
+    ):
+        """Precomputes the constants and allocates the buffers.
+
+        Args:
+            num_envs: Number of environments.
+            num_rays: Number of rays per lidar scan.
+            device: Device of the lidar data.
+            voxel_size_xy: Size of a cell in the x and y dimension.
+            range_x: Range of the map along the x-axis of the sensor frame.
+            range_y: Range of the map along the y-axis of the sensor frame.
+            range_z: Range of valid hit heights along the z-axis of the sensor frame.
+            sensor_quat_default: Orientation (w, x, y, z) of the lidar w.r.t. the robot base.
+        """
+        self.num_envs = num_envs
+        self.num_rays = num_rays
+        self.device = torch.device(device)
+        self.range_x = tuple(range_x)
+        self.range_y = tuple(range_y)
+        self.range_z = tuple(range_z)
+
+        # bin edges, a hit in (bins[i], bins[i + 1]] falls into cell i
+        self.x_bins = torch.arange(range_x[0], range_x[1], voxel_size_xy, device=self.device)
+        self.y_bins = torch.arange(range_y[0], range_y[1], voxel_size_xy, device=self.device)
+        self.map_shape = (len(self.x_bins), len(self.y_bins))
+        num_cells = self.map_shape[0] * self.map_shape[1]
+
+        self.sensor_quat_default = torch.tensor(sensor_quat_default, device=self.device).expand(num_envs, 4)
+        # linear index of cell (-1, -1) of each env, bucketize returns the cell index plus one
+        self.env_offsets = (torch.arange(num_envs, device=self.device) * num_cells - self.map_shape[1] - 1).unsqueeze(1)
+        self.dump_idx = num_envs * num_cells
+
+        # buffers
+        self.hit_vec = torch.zeros(num_envs, num_rays, 3, device=self.device)
+        self.hit_vec_sensor = torch.zeros(num_envs, num_rays, 3, device=self.device)
+        self.x_idx = torch.zeros(num_envs, num_rays, dtype=torch.long, device=self.device)
+        self.y_idx = torch.zeros(num_envs, num_rays, dtype=torch.long, device=self.device)
+        self.linear_idx = torch.zeros(num_envs, num_rays, dtype=torch.long, device=self.device)
+        self.points = torch.zeros(3, num_envs, num_rays, device=self.device)
+        self.valid = torch.zeros(num_envs, num_rays, dtype=torch.bool, device=self.device)
+        self.in_range = torch.zeros(num_envs, num_rays, dtype=torch.bool, device=self.device)
+        self.height_map = torch.zeros(self.dump_idx + 1, device=self.device)
+        self.invalid_cells = torch.zeros(self.dump_idx + 1, dtype=torch.bool, device=self.device)
+        self.low_cells = torch.zeros(self.dump_idx + 1, dtype=torch.bool, device=self.device)
+
+    """
+    Operations.
+    """
+
+    def compute(
+        self, ray_hits_w: torch.Tensor, sensor_pos_w: torch.Tensor, base_quat_w: torch.Tensor, offset: float = 0.5
+    ) -> torch.Tensor:
+        """Computes the height maps of all environments.
+
+        Args:
+            ray_hits_w: Lidar hits in the world frame, shape (num_envs, num_rays, 3).
+            sensor_pos_w: Position of the lidar in the world frame, shape (num_envs, 3).
+            base_quat_w: Orientation (w, x, y, z) of the robot base in the world frame, shape (num_envs, 4).
+            offset: Value subtracted from the heights. Defaults to 0.5.
+
+        Returns:
+            The flattened height maps, shape (num_envs, num_x_cells * num_y_cells). Empty cells and cells with a
+            height below 0.05 are zero.
+        """
+        # hit vectors in the sensor frame, invalid hits are moved to the sensor origin
+        torch.sub(ray_hits_w, sensor_pos_w.unsqueeze(1), out=self.hit_vec)
+        self.hit_vec.nan_to_num_(nan=0.0, posinf=0.0, neginf=0.0)
+        sensor_quat_w = math_utils.quat_mul(base_quat_w, self.sensor_quat_default)
+        torch.bmm(self.hit_vec, self._inverse_rotation_matrix(sensor_quat_w).transpose(1, 2), out=self.hit_vec_sensor)
+        # contiguous coordinates for the bucketing
+        self.points.copy_(self.hit_vec_sensor.permute(2, 0, 1))
+        x, y, z = self.points
+
+        # hits within the map bounds
+        torch.gt(x, self.range_x[0], out=self.valid)
+        self.valid.logical_and_(torch.le(x, self.range_x[1], out=self.in_range))
+        self.valid.logical_and_(torch.gt(y, self.range_y[0], out=self.in_range))
+        self.valid.logical_and_(torch.le(y, self.range_y[1], out=self.in_range))
+        self.valid.logical_and_(torch.ge(z, self.range_z[0], out=self.in_range))
+        self.valid.logical_and_(torch.le(z, self.range_z[1], out=self.in_range))
+
+        # linear cell index of each hit, hits outside the bounds go to the dump cell
+        torch.bucketize(x, self.x_bins, out=self.x_idx)
+        torch.bucketize(y, self.y_bins, out=self.y_idx)
+        torch.mul(self.x_idx, self.map_shape[1], out=self.linear_idx)
+        self.linear_idx.add_(self.y_idx).add_(self.env_offsets)
+        self.linear_idx.masked_fill_(torch.logical_not(self.valid, out=self.in_range), self.dump_idx)
+
+        # lowest hit per cell
+        self.height_map.fill_(float("inf"))
+        self.height_map.scatter_reduce_(0, self.linear_idx.view(-1), z.view(-1), reduce="amin")
+        self.height_map.sub_(offset)
+        torch.eq(self.height_map, float("inf"), out=self.invalid_cells)
+        self.invalid_cells.logical_or_(torch.lt(self.height_map, 0.05, out=self.low_cells))
+        self.height_map.masked_fill_(self.invalid_cells, 0.0)
+
+        height_map = self.height_map[: self.dump_idx].view(self.num_envs, *self.map_shape)
+        return F.max_pool2d(height_map, kernel_size=3, stride=1, padding=1).view(self.num_envs, -1)
+
+    """
+    Helper functions.
+    """
+
+    def _inverse_rotation_matrix(self, quat: torch.Tensor) -> torch.Tensor:
+        """Matrix form of :func:`math_utils.quat_rotate_inverse`, shape (num_envs, 3, 3).
+
+        The quaternion is not normalized, such that the result matches the rotation of each hit with
+        :func:`math_utils.quat_rotate_inverse` (the default sensor orientation is not exactly a unit quaternion).
+        """
+        q_w, q_vec = quat[:, 0], quat[:, 1:]
+        x, y, z = q_vec.unbind(dim=-1)
+        zeros = torch.zeros_like(x)
+        skew = torch.stack([zeros, -z, y, z, zeros, -x, -y, x, zeros], dim=-1).view(-1, 3, 3)
+        eye = torch.eye(3, device=quat.device).unsqueeze(0)
+        return (
+            (2.0 * q_w**2 - 1.0)[:, None, None] * eye
+            - 2.0 * q_w[:, None, None] * skew
+            + 2.0 * q_vec.unsqueeze(2) * q_vec.unsqueeze(1)
+        )
+
+
+class HeightMapHistory:
+    """Ring buffer of the last height maps of each environment, fused with a single reduction.
+
+    The supported reductions over the stored maps are:
+
+    * ``"max"``: the highest value of each cell.
+    * ``"min"``: the lowest value of each cell.
+    * ``"decay"``: average weighted with ``decay ** age``, where the newest map has age 0.
+
+    All environments append a map at the same time, so they share the write position. After a reset, the maps
+    recorded before the reset are excluded from the reduction. The write position is kept on the device, such that
+    appending and fusing never synchronizes with the host.
+    """
+
+    REDUCTIONS = ("max", "min", "decay")
+    """Supported reductions over the stored maps."""
+
+    def __init__(
+        self,
+        num_envs: int,
+        num_cells: int,
+        history_length: int,
+        reduction: str = "max",
+        decay: float = 0.8,
+        device: str | torch.device = "cuda",
+    ):
+        """Allocates the ring buffer.
+
+        Args:
+            num_envs: Number of environments.
+            num_cells: Number of cells of a flattened height map.
+            history_length: Number of stored maps per environment.
+            reduction: Reduction over the stored maps. Defaults to "max".
+            decay: Decay factor per step of the "decay" reduction. Defaults to 0.8.
+            device: Device of the height maps.
+        """
+        if reduction not in self.REDUCTIONS:
+            raise ValueError(f"Unknown height map reduction '{reduction}', expected one of {self.REDUCTIONS}.")
+        if history_length < 1:
+            raise ValueError(f"History length must be positive, got {history_length}.")
+        self.num_envs = num_envs
+        self.history_length = history_length
+        self.reduction = reduction
+        self.device = torch.device(device)
+
+        self.buffer = torch.zeros(num_envs, history_length, num_cells, device=self.device)
+        self.num_frames = torch.zeros(num_envs, dtype=torch.long, device=self.device)
+        self.ptr = torch.zeros(1, dtype=torch.long, device=self.device)
+        # age of each slot for each write position, the slot before the write position holds the newest map
+        slots = torch.arange(history_length, device=self.device)
+        self.slot_ages = (slots.unsqueeze(1) - 1 - slots.unsqueeze(0)).remainder(history_length)
+        self.decay_weights = decay ** self.slot_ages.float()
+
+    """
+    Operations.
+    """
+
+    def reset(self, env_ids: Sequence[int] | torch.Tensor | None = None):
+        """Excludes the stored maps of the given environments from the reduction.
+
+        Args:
+            env_ids: The environments to reset. Defaults to None (all environments).
+        """
+        if env_ids is None:
+            self.num_frames.zero_()
+        else:
+            self.num_frames[env_ids] = 0
+
+    def append(self, height_map: torch.Tensor):
+        """Stores the newest map of all environments, overwriting the oldest one.
+
+        Args:
+            height_map: The flattened height maps, shape (num_envs, num_cells).
+        """
+        self.buffer.index_copy_(1, self.ptr, height_map.unsqueeze(1))
+        self.ptr.add_(1).remainder_(self.history_length)
+        self.num_frames.add_(1).clamp_(max=self.history_length)
+
+    def compute(self) -> torch.Tensor:
+        """Fuses the stored maps of each environment since its last reset.
+
+        Returns:
+            The fused height maps, shape (num_envs, num_cells).
+        """
+        # (num_envs, history_length), whether a slot holds a map recorded after the last reset
+        slot_ages = self.slot_ages[self.ptr]
+        valid = slot_ages < self.num_frames.unsqueeze(1)
+        if self.reduction == "max":
+            return self.buffer.masked_fill(~valid.unsqueeze(2), float("-inf")).amax(dim=1)
+        elif self.reduction == "min":
+            return self.buffer.masked_fill(~valid.unsqueeze(2), float("inf")).amin(dim=1)
+        else:
+            weights = self.decay_weights[self.ptr] * valid
+            weights = weights / weights.sum(dim=1, keepdim=True)
+            return torch.einsum("nk,nkc->nc", weights, self.buffer)
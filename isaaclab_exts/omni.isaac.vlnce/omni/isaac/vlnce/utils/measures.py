@@ -2,8 +2,11 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 from numpy import ndarray
 
 import numpy as np
+import torch
 from scipy.spatial import KDTree
 
+from .geodesic import batch_distance, load_geodesic_field
+
 
 def euclidean_distance(
     pos_a: Union[List[float], ndarray], pos_b: Union[List[float], ndarray]
@@ -27,9 +30,10 @@ class Measure:
     _metric: Any
     uuid: str
 
-    def __init__(self, env, episode, **kwargs: Any) -> None:
+    def __init__(self, env, episode, env_id: int = 0, **kwargs: Any) -> None:
         self._env = env
         self._episode = episode
+        self._env_id = env_id
         self._metric = None
 
     def _get_uuid(self, *args: Any, **kwargs: Any) -> str:
@@ -53,7 +57,7 @@ class Measure:
         return self._metric
     
     def get_robot_position(self):
-        robot_pos_w = self._env.unwrapped.scene["robot"].data.root_pos_w[0].detach().cpu().numpy()
+        robot_pos_w = self._env.unwrapped.scene["robot"].data.root_pos_w[self._env_id].detach().cpu().numpy()
         return robot_pos_w
     
 
@@ -176,6 +180,22 @@ class DistanceToGoal(Measure):
             self._metric = distance_to_target
 
 
+class GeodesicDistanceToGoal(DistanceToGoal):
+    """The measure calculates the geodesic distance towards the goal from the precomputed distance field of the
+    episode (see :mod:`omni.isaac.vlnce.utils.geodesic`). It replaces :class:`DistanceToGoal` for the dependent
+    measures.
+    """
+
+    def __init__(
+        self, env, episode, *args: Any, field_dir: Optional[str] = None, **kwargs: Any
+    ):
+        super().__init__(env, episode, **kwargs)
+        self._field = load_geodesic_field(episode, field_dir)
+
+    def distance_to_goal(self, current_position):
+        return float(self._field.distance(np.asarray(current_position)[None])[0])
+
+
 class SPL(Measure):
     r"""SPL (Success weighted by Path Length)
 
@@ -189,7 +209,7 @@ class SPL(Measure):
     cls_uuid: str = "spl"
 
     def __init__(self, env, episode, measure_manager: MeasureManager, *args: Any, **kwargs: Any):
-        super().__init__(env, episode)
+        super().__init__(env, episode, **kwargs)
         self.measure_manager = measure_manager
         self._previous_position: Union[None, np.ndarray, List[float]] = None
         self._start_end_episode_distance: Optional[float] = None
@@ -245,7 +265,7 @@ class Success(Measure):
     cls_uuid: str = "success"
 
     def __init__(self, env, episode, measure_manager, *args: Any, **kwargs: Any):
-        super().__init__(env, episode)
+        super().__init__(env, episode, **kwargs)
         self._success_distance = episode["goals"][0]["radius"]
         self.measure_manager = measure_manager
 
@@ -254,7 +274,17 @@ class Success(Measure):
 
     def reset_metric(self, *args: Any, **kwargs: Any):
         self.update_metric(*args, **kwargs)  # type: ignore
-        setattr(self._env, "is_stop_called", False)
+        # the stop flag is either a single bool or one flag per environment
+        if np.ndim(getattr(self._env, "is_stop_called", False)) > 0:
+            self._env.is_stop_called[self._env_id] = False
+        else:
+            setattr(self._env, "is_stop_called", False)
+
+    def is_stop_called(self) -> bool:
+        is_stop_called = getattr(self._env, "is_stop_called", False)
+        if np.ndim(is_stop_called) > 0:
+            return bool(is_stop_called[self._env_id])
+        return bool(is_stop_called)
 
     def update_metric(self, *args: Any, **kwargs: Any):
         distance_to_target = self.measure_manager.measures[
@@ -262,8 +292,7 @@ class Success(Measure):
         ].get_metric()
 
         if (
-            hasattr(self._env, "is_stop_called")
-            and self._env.is_stop_called  # type: ignore
+            self.is_stop_called()
             and distance_to_target < self._success_distance
         ):
             self._metric = 1.0
@@ -280,7 +309,7 @@ class OracleNavigationError(Measure):
     cls_uuid: str = "oracle_navigation_error"
 
     def __init__(self, env, episode, measure_manager, *args: Any, **kwargs: Any):
-        super().__init__(env, episode)
+        super().__init__(env, episode, **kwargs)
         self.measure_manager = measure_manager
 
     def _get_uuid(self, *args: Any, **kwargs: Any) -> str:
@@ -306,7 +335,7 @@ class OracleSuccess(Measure):
     cls_uuid: str = "oracle_success"
 
     def __init__(self, env, episode, measure_manager: MeasureManager, *args: Any, **kwargs: Any):
-        super().__init__(env, episode)
+        super().__init__(env, episode, **kwargs)
         self.measure_manager = measure_manager
         self._success_distance = episode["goals"][0]["radius"]
 
@@ -325,10 +354,163 @@ class OracleSuccess(Measure):
         self._metric = float(self._metric or d < self._success_distance)
 
 
-def add_measurement(env, episode, measure_names=["PathLength", "DistanceToGoal", "Success", "SPL", "OracleNavigationError", "OracleSuccess"]):
+class BatchMeasures:
+    """Tensorized version of the measures for a batch of environments.
+
+    Computes the same metrics as :class:`PathLength`, :class:`DistanceToGoal`, :class:`Success`, :class:`SPL`,
+    :class:`OracleNavigationError` and :class:`OracleSuccess` for all environments at once. All metrics are kept as
+    tensors of shape (num_envs,) on the simulation device and the robot positions are read once per update, so
+    updating the measures never synchronizes with the host.
+
+    The remaining length of the reference path from each waypoint to the goal is precomputed as suffix sum of the
+    segment lengths when an episode is set, which replaces the loop over the remaining waypoints of
+    :meth:`DistanceToGoal.distance_to_goal`.
+
+    The measures cover the first :obj:`num_envs` environments, e.g. ``num_envs=1`` for the single episode of
+    :class:`VLNEnvWrapper`.
+    """
+
+    uuids: Tuple[str, ...] = (
+        PathLength.cls_uuid,
+        DistanceToGoal.cls_uuid,
+        Success.cls_uuid,
+        SPL.cls_uuid,
+        OracleNavigationError.cls_uuid,
+        OracleSuccess.cls_uuid,
+    )
+
+    def __init__(
+        self,
+        env,
+        num_envs: int,
+        device: str,
+        measure_names: Optional[List[str]] = None,
+        field_dir: Optional[str] = None,
+    ):
+        self._env = env
+        self.num_envs = num_envs
+        self.device = device
+        # subset of the metrics that is reported, all metrics are computed as they depend on each other
+        if measure_names is None:
+            self.reported_uuids = list(self.uuids)
+        else:
+            self.reported_uuids = [eval(measure_name).cls_uuid for measure_name in measure_names]
+        # geodesic distance to goal from the precomputed distance fields
+        self.use_geodesic = measure_names is not None and "GeodesicDistanceToGoal" in measure_names
+        self.field_dir = field_dir
+        self.fields: Optional[torch.Tensor] = None
+        self.field_origin: Optional[torch.Tensor] = None
+        self.field_resolution = 0.0
+
+        # padded gt waypoints and remaining path length from each waypoint to the goal
+        self.waypoints = torch.zeros(num_envs, 1, 3, device=device)
+        self.waypoint_mask = torch.zeros(num_envs, 1, dtype=torch.bool, device=device)
+        self.remaining_length = torch.zeros(num_envs, 1, device=device)
+        self.success_distance = torch.zeros(num_envs, device=device)
+
+        self.previous_position = torch.zeros(num_envs, 3, device=device)
+        self.path_length = torch.zeros(num_envs, device=device)
+        self.distance_to_goal = torch.zeros(num_envs, device=device)
+        self.success = torch.zeros(num_envs, device=device)
+        self.start_end_episode_distance = torch.zeros(num_envs, device=device)
+        self.spl = torch.zeros(num_envs, device=device)
+        self.oracle_navigation_error = torch.zeros(num_envs, device=device)
+        self.oracle_success = torch.zeros(num_envs, device=device)
+
+    def set_episodes(self, env_ids: List[int], episodes: List[Dict]):
+        """Set the reference paths and goals of new episodes. This is done once per episode on the host."""
+        max_num_waypoints = max([len(episode["gt_locations"]) for episode in episodes] + [self.waypoints.shape[1]])
+        if max_num_waypoints > self.waypoints.shape[1]:
+            num_padding = max_num_waypoints - self.waypoints.shape[1]
+            self.waypoints = torch.nn.functional.pad(self.waypoints, (0, 0, 0, num_padding))
+            self.waypoint_mask = torch.nn.functional.pad(self.waypoint_mask, (0, num_padding))
+            self.remaining_length = torch.nn.functional.pad(self.remaining_length, (0, num_padding))
+
+        for env_id, episode in zip(env_ids, episodes):
+            waypoints = np.asarray(episode["gt_locations"], dtype=np.float32).reshape(-1, 3)
+            segment_lengths = np.linalg.norm(np.diff(waypoints, axis=0), axis=1)
+            remaining_length = np.concatenate([np.cumsum(segment_lengths[::-1])[::-1], [0.0]])
+
+            num_waypoints = len(waypoints)
+            self.waypoints[env_id] = 0.0
+            self.waypoints[env_id, :num_waypoints] = torch.from_numpy(waypoints).to(self.device)
+            self.waypoint_mask[env_id] = False
+            self.waypoint_mask[env_id, :num_waypoints] = True
+            self.remaining_length[env_id] = 0.0
+            self.remaining_length[env_id, :num_waypoints] = torch.from_numpy(remaining_length).to(self.device)
+            self.success_distance[env_id] = episode["goals"][0]["radius"]
+
+            if self.use_geodesic:
+                field = load_geodesic_field(episode, self.field_dir)
+                if self.fields is None or self.fields.shape[1:] != field.shape:
+                    self.fields = torch.zeros(self.num_envs, *field.shape, device=self.device)
+                self.fields[env_id] = torch.from_numpy(field.field).to(self.device)
+                self.field_origin = torch.from_numpy(field.origin).to(self.device)
+                self.field_resolution = field.resolution
+
+    def reset(self, env_ids: Union[torch.Tensor, List[int]], is_stop_called: torch.Tensor):
+        """Reset the metrics of the given envs at the start of their episodes."""
+        robot_pos_w = self._env.unwrapped.scene["robot"].data.root_pos_w[: self.num_envs].detach()
+        self.previous_position[env_ids] = robot_pos_w[env_ids]
+        self.path_length[env_ids] = 0.0
+
+        distance_to_goal = self._compute_distance_to_goal(robot_pos_w)
+        self.distance_to_goal[env_ids] = distance_to_goal[env_ids]
+        self.start_end_episode_distance[env_ids] = distance_to_goal[env_ids]
+        self.success[env_ids] = 0.0
+        self.spl[env_ids] = 0.0
+        self.oracle_navigation_error[env_ids] = distance_to_goal[env_ids]
+        self.oracle_success[env_ids] = (distance_to_goal[env_ids] < self.success_distance[env_ids]).float()
+        is_stop_called[env_ids] = False
+
+    def update(self, env_mask: torch.Tensor, is_stop_called: torch.Tensor):
+        """Update the metrics of the envs in the mask.
+
+        Args:
+            env_mask: Envs with a running episode, shape (num_envs,).
+            is_stop_called: Whether the agent of each env called stop, shape (num_envs,).
+        """
+        robot_pos_w = self._env.unwrapped.scene["robot"].data.root_pos_w[: self.num_envs].detach()
+
+        path_length = self.path_length + torch.norm(robot_pos_w - self.previous_position, dim=1)
+        distance_to_goal = self._compute_distance_to_goal(robot_pos_w)
+        success = (is_stop_called & (distance_to_goal < self.success_distance)).float()
+        spl = success * self.start_end_episode_distance / torch.maximum(self.start_end_episode_distance, path_length)
+        oracle_navigation_error = torch.minimum(self.oracle_navigation_error, distance_to_goal)
+        oracle_success = torch.maximum(self.oracle_success, (distance_to_goal < self.success_distance).float())
+
+        self.path_length = torch.where(env_mask, path_length, self.path_length)
+        self.previous_position = torch.where(env_mask.unsqueeze(1), robot_pos_w, self.previous_position)
+        self.distance_to_goal = torch.where(env_mask, distance_to_goal, self.distance_to_goal)
+        self.success = torch.where(env_mask, success, self.success)
+        self.spl = torch.where(env_mask, spl, self.spl)
+        self.oracle_navigation_error = torch.where(env_mask, oracle_navigation_error, self.oracle_navigation_error)
+        self.oracle_success = torch.where(env_mask, oracle_success, self.oracle_success)
+
+    def get_measurements(self) -> Dict[str, torch.Tensor]:
+        """Get the metrics of all envs as tensors of shape (num_envs,)."""
+        return {uuid: getattr(self, uuid) for uuid in self.reported_uuids}
+
+    def get_measurements_cpu(self, env_ids: List[int]) -> List[Dict[str, float]]:
+        """Get the metrics of the given envs as python floats, e.g. at the end of their episodes."""
+        measurements = torch.stack([getattr(self, uuid) for uuid in self.reported_uuids], dim=1)[env_ids].cpu().tolist()
+        return [dict(zip(self.reported_uuids, values)) for values in measurements]
+
+    def _compute_distance_to_goal(self, robot_pos_w: torch.Tensor) -> torch.Tensor:
+        """Distance to the closest gt waypoint plus the remaining path length from this waypoint to the goal,
+        or the geodesic distance if the distance fields are used."""
+        if self.use_geodesic:
+            return batch_distance(self.fields, self.field_origin, self.field_resolution, robot_pos_w)
+        distances = torch.norm(self.waypoints - robot_pos_w.unsqueeze(1), dim=2)
+        distances = distances.masked_fill(~self.waypoint_mask, float("inf"))
+        closest_distance, closest_waypoint_idx = distances.min(dim=1)
+        return closest_distance + self.remaining_length.gather(1, closest_waypoint_idx.unsqueeze(1)).squeeze(1)
+
+
+def add_measurement(env, episode, measure_names=["PathLength", "DistanceToGoal", "Success", "SPL", "OracleNavigationError", "OracleSuccess"], env_id=0, field_dir=None):
     measure_manager = MeasureManager()
     for measure_name in measure_names:
-        measure = eval(measure_name)(env, episode, measure_manager)
+        measure = eval(measure_name)(env, episode, measure_manager, env_id=env_id, field_dir=field_dir)
         measure_manager.register_measure(measure)
     
     return measure_manager
\ No newline at end of file
@@ -0,0 +1,236 @@
+"""Background prefetching of the scene assets of an evaluation sweep.
+
+Loading a Matterport scene reads a few hundred megabytes of USD, textures and meshes. On network storage, these
+reads dominate the time between two scenes. The :class:`ScenePrefetcher` reads the assets of the next scenes in a
+background thread while the current scene is evaluated:
+
+* Without a cache directory, the files are read once, such that they are in the page cache of the OS when the scene
+  is loaded.
+* With a cache directory (e.g. on a local SSD), the scene directories are copied into it and the scene is loaded
+  from the copy. Copies are kept across runs and only refreshed if the size or modification time of the source
+  changed.
+
+If a file of a scene cannot be read or copied, the scene is loaded from the assets directory.
+
+.. code-block:: python
+
+    prefetcher = ScenePrefetcher(scene_ids, cache_dir="/tmp/scene_cache")
+    for scene_id in scene_ids:
+        assets_dir = prefetcher.get_scene(scene_id)  # waits if the scene is still being prefetched
+        usd_file = os.path.join(assets_dir, f"matterport_usd/{scene_id}/{scene_id}.usd")
+        ...
+    print(prefetcher)
+    prefetcher.close()
+
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import shutil
+import threading
+import time
+from typing import Dict, List, Sequence
+
+from . import ASSETS_DIR
+
+SCENE_ASSET_DIRS = ("matterport_usd",)
+"""Directories below the assets directory with one sub-directory of files per scene.
+
+Only the USD scenes are prefetched by default, since the ``.ply`` meshes are not resolved against the returned
+directory.
+"""
+
+
+class ScenePrefetcher:
+    """Warms the assets of the upcoming scenes in a background thread.
+
+    The scenes are expected to be requested with :meth:`get_scene` in the order given at construction. A scene counts
+    as hit if its prefetch finished before it was requested, and as miss otherwise or if its prefetch failed.
+    """
+
+    def __init__(
+        self,
+        scene_ids: Sequence[str],
+        assets_dir: str = ASSETS_DIR,
+        cache_dir: str | None = None,
+        lookahead: int = 1,
+        asset_dirs: Sequence[str] = SCENE_ASSET_DIRS,
+        chunk_size: int = 1 << 24,
+    ):
+        """Initializes the prefetcher and starts prefetching the first scenes.
+
+        Args:
+            scene_ids: The scenes in order of evaluation.
+            assets_dir: Directory with the scene assets. Defaults to :data:`ASSETS_DIR`.
+            cache_dir: Local directory the scenes are copied into. Defaults to None, in which case the assets are only
+                read into the page cache.
+            lookahead: Number of scenes prefetched ahead of the current scene. Defaults to 1.
+            asset_dirs: Directories below :obj:`assets_dir` with one sub-directory per scene.
+                Defaults to :data:`SCENE_ASSET_DIRS`.
+            chunk_size: Read size in bytes. Defaults to 16 MB.
+        """
+        self.scene_ids = list(scene_ids)
+        self.assets_dir = assets_dir
+        self.cache_dir = cache_dir
+        self.lookahead = lookahead
+        self.asset_dirs = list(asset_dirs)
+        self.chunk_size = chunk_size
+
+        # statistics
+        self.num_hits = 0
+        self.num_misses = 0
+        self.num_bytes_read = 0
+        self.num_bytes_cached = 0
+        self.prefetch_time = 0.0
+        self.wait_time = 0.0
+
+        # prefetch state of each scene: queued -> ready, and the scenes with files that could not be prefetched
+        self._queued: Dict[str, bool] = {}
+        self._ready: Dict[str, bool] = {}
+        self.failed_scenes: List[str] = []
+        self._condition = threading.Condition()
+        self._queue: queue.Queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+        self._schedule(0)
+
+    """
+    Operations.
+    """
+
+    def get_scene(self, scene_id: str) -> str:
+        """Returns the assets directory to load a scene from and schedules the prefetch of the next scenes.
+
+        Waits until the scene is prefetched if its prefetch is still running. A scene that was not scheduled or whose
+        prefetch failed is loaded from :attr:`assets_dir`.
+
+        Args:
+            scene_id: The scene to load.
+
+        Returns:
+            The directory to resolve the asset paths of the scene against, either the cache or the assets directory.
+        """
+        if scene_id in self.scene_ids:
+            self._schedule(self.scene_ids.index(scene_id))
+
+        with self._condition:
+            if not self._queued.get(scene_id, False):
+                self.num_misses += 1
+                return self.assets_dir
+            is_hit = self._ready.get(scene_id, False)
+            if not is_hit:
+                start_time = time.time()
+                self._condition.wait_for(lambda: self._ready.get(scene_id, False))
+                self.wait_time += time.time() - start_time
+            if scene_id in self.failed_scenes:
+                # the cached copy may be incomplete
+                self.num_misses += 1
+                return self.assets_dir
+            if is_hit:
+                self.num_hits += 1
+            else:
+                self.num_misses += 1
+        return self.cache_dir if self.cache_dir is not None else self.assets_dir
+
+    def stats(self) -> Dict[str, float]:
+        """Returns the hit and miss counts, the prefetched bytes and the prefetch and wait times in seconds."""
+        with self._condition:
+            return {
+                "hits": self.num_hits,
+                "misses": self.num_misses,
+                "failures": len(self.failed_scenes),
+                "bytes_read": self.num_bytes_read,
+                "bytes_cached": self.num_bytes_cached,
+                "prefetch_time": self.prefetch_time,
+                "wait_time": self.wait_time,
+            }
+
+    def close(self):
+        """Stops the background thread after the running prefetch."""
+        self._queue.put(None)
+        self._worker.join()
+
+    def __str__(self) -> str:
+        stats = self.stats()
+        return (
+            f"<ScenePrefetcher> {stats['hits']} hits, {stats['misses']} misses, {stats['failures']} failed scenes,"
+            f" {stats['bytes_read'] / 1e9:.2f} GB read, {stats['bytes_cached'] / 1e9:.2f} GB copied to the cache,"
+            f" {stats['prefetch_time']:.1f}s prefetching, {stats['wait_time']:.1f}s waiting"
+        )
+
+    """
+    Helper functions.
+    """
+
+    def _schedule(self, scene_idx: int):
+        """Queues the scene at the index and the next :attr:`lookahead` scenes."""
+        with self._condition:
+            for scene_id in self.scene_ids[scene_idx : scene_idx + self.lookahead + 1]:
+                if not self._queued.get(scene_id, False):
+                    self._queued[scene_id] = True
+                    self._queue.put(scene_id)
+
+    def _get_scene_files(self, scene_id: str) -> List[str]:
+        """Returns the asset files of a scene relative to the assets directory."""
+        files = []
+        for asset_dir in self.asset_dirs:
+            scene_dir = os.path.join(self.assets_dir, asset_dir, scene_id)
+            for root, _, file_names in os.walk(scene_dir):
+                files += [os.path.relpath(os.path.join(root, name), self.assets_dir) for name in sorted(file_names)]
+        return files
+
+    def _run(self):
+        while True:
+            scene_id = self._queue.get()
+            if scene_id is None:
+                return
+            start_time = time.time()
+            num_bytes_read, num_bytes_cached, failed = 0, 0, False
+            for file in self._get_scene_files(scene_id):
+                try:
+                    if self.cache_dir is None:
+                        num_bytes_read += self._read_file(os.path.join(self.assets_dir, file))
+                    else:
+                        num_bytes_cached += self._copy_file(file)
+                except OSError as e:
+                    print(f"[WARN]: Failed to prefetch '{file}' of scene {scene_id}: {e}")
+                    failed = True
+            with self._condition:
+                if failed:
+                    self.failed_scenes.append(scene_id)
+                self.num_bytes_read += num_bytes_read
+                self.num_bytes_cached += num_bytes_cached
+                self.prefetch_time += time.time() - start_time
+                self._ready[scene_id] = True
+                self._condition.notify_all()
+
+    def _read_file(self, file_path: str) -> int:
+        """Reads a file into the page cache and returns the number of bytes read."""
+        num_bytes = 0
+        with open(file_path, "rb", buffering=0) as f:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    return num_bytes
+                num_bytes += len(chunk)
+
+    def _copy_file(self, file: str) -> int:
+        """Copies a file into the cache if the cached copy is missing or outdated and returns the copied bytes."""
+        src_path = os.path.join(self.assets_dir, file)
+        dst_path = os.path.join(self.cache_dir, file)
+        src_stat = os.stat(src_path)
+        if os.path.isfile(dst_path):
+            dst_stat = os.stat(dst_path)
+            if dst_stat.st_size == src_stat.st_size and dst_stat.st_mtime == src_stat.st_mtime:
+                return 0
+
+        # copy to a temporary file first, such that an interrupted copy is never loaded
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        tmp_path = f"{dst_path}.tmp{os.getpid()}"
+        shutil.copy2(src_path, tmp_path)
+        os.replace(tmp_path, dst_path)
+        return src_stat.st_size
@@ -0,0 +1,266 @@
+"""Precomputed 2.5D traversability maps of the Matterport scenes.
+
+The map of a scene stores, for each cell of a 2D grid, the heights of up to a few stacked floors (e.g. a room and the
+storey above it) and whether the robot can stand there. It is rasterized once from the ``.ply`` mesh with the same
+slope, step height and clearance rules as the geodesic distance fields, and answers queries for planners, reset
+sampling and measures without ray-casting at runtime:
+
+.. code-block:: none
+
+    <map_dir>/
+    └─ <scene>.npz   # floor heights (L, H, W) int16 in millimeters, traversable cells (L, H, W) bit-packed,
+                     # origin (2,), resolution, step_height
+
+.. code-block:: python
+
+    from omni.isaac.vlnce.utils.traversability import load_traversability_map
+
+    traversability = load_traversability_map(scene_id)
+    free = traversability.is_traversable(points)
+    goal = traversability.nearest_free(goal)
+    visible = traversability.line_of_sight(robot_pos, goal)
+
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy import ndimage
+
+from .episode_store import scene_key
+from .geodesic import SceneRasterizer
+
+TRAVERSABILITY_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../assets/traversability"))
+"""Default directory of the traversability maps."""
+
+_NO_FLOOR = np.iinfo(np.int16).min
+"""Stored height of the cells of a layer without floor."""
+
+
+class TraversabilityMap:
+    """Traversable cells and floor heights of the stacked floors of a scene.
+
+    A position is assigned to the highest floor of its cell at most one step height above it, i.e. positions can be
+    given on the floor or at the height of the robot base.
+    """
+
+    def __init__(
+        self, traversable: np.ndarray, floor_height: np.ndarray, origin: np.ndarray, resolution: float, step_height: float
+    ):
+        """Initializes the map.
+
+        Args:
+            traversable: Traversable cells of each layer, shape (L, H, W). The second axis corresponds to x, the third
+                to y.
+            floor_height: Floor height of the cells of each layer, shape (L, H, W). Not finite if the layer has no
+                floor in the cell.
+            origin: Position of the lower corner of the grid (x, y).
+            resolution: Size of a cell in meters.
+            step_height: Largest height difference between neighboring cells the robot can traverse.
+        """
+        self.traversable = np.asarray(traversable, dtype=bool)
+        self.floor_height = np.where(np.isfinite(floor_height), floor_height, np.nan).astype(np.float32)
+        self.origin = np.asarray(origin, dtype=np.float32)
+        self.resolution = float(resolution)
+        self.step_height = float(step_height)
+        # index of the closest traversable cell, computed on first use
+        self._nearest_free: Optional[np.ndarray] = None
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.traversable.shape[1:]
+
+    @property
+    def num_layers(self) -> int:
+        return self.traversable.shape[0]
+
+    """
+    Queries.
+    """
+
+    def get_cells(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the layer and cell of each position.
+
+        Positions without a floor below them are assigned to the floor closest in height.
+
+        Args:
+            points: Positions of shape (N, 3).
+
+        Returns:
+            The layer, x and y index of each position, each of shape (N,). Positions outside of the grid are clipped.
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        cells = np.floor((points[:, :2] - self.origin) / self.resolution).astype(np.int64)
+        x, y = np.clip(cells[:, 0], 0, self.shape[0] - 1), np.clip(cells[:, 1], 0, self.shape[1] - 1)
+
+        heights = self.floor_height[:, x, y]  # (L, N)
+        has_floor = np.isfinite(heights)
+        below = has_floor & (heights <= points[:, 2] + self.step_height)
+        layer_below = np.argmax(np.where(below, heights, -np.inf), axis=0)
+        layer_closest = np.argmin(np.where(has_floor, np.abs(heights - points[:, 2]), np.inf), axis=0)
+        return np.where(below.any(axis=0), layer_below, layer_closest), x, y
+
+    def is_traversable(self, points: np.ndarray) -> np.ndarray:
+        """Returns whether the robot can stand at the positions of shape (N, 3). Positions outside the grid are not."""
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        layer, x, y = self.get_cells(points)
+        inside = np.all((points[:, :2] >= self.origin) & (points[:, :2] < self.origin + self._extent), axis=1)
+        return self.traversable[layer, x, y] & inside
+
+    def height(self, points: np.ndarray) -> np.ndarray:
+        """Returns the floor height below the positions of shape (N, 3). NaN for cells without floor."""
+        layer, x, y = self.get_cells(points)
+        return self.floor_height[layer, x, y]
+
+    def nearest_free(self, points: np.ndarray) -> np.ndarray:
+        """Returns the center of the closest traversable cell on the same floor.
+
+        Args:
+            points: Positions of shape (N, 3).
+
+        Returns:
+            The cell centers on the floor, shape (N, 3). Positions on a traversable cell are moved to its center.
+        """
+        if self._nearest_free is None:
+            self._nearest_free = np.stack([
+                ndimage.distance_transform_edt(~layer, return_distances=False, return_indices=True)
+                for layer in self.traversable
+            ]).astype(np.int32)
+        layer, x, y = self.get_cells(points)
+        free_x, free_y = self._nearest_free[layer, 0, x, y], self._nearest_free[layer, 1, x, y]
+        return np.concatenate(
+            [self._cell_centers(free_x, free_y), self.floor_height[layer, free_x, free_y][:, None]], axis=1
+        )
+
+    def line_of_sight(self, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        """Returns whether the straight segments between the positions are traversable.
+
+        The segments are sampled every half cell. A segment is free if all samples are traversable and the floor
+        height changes by at most the step height between consecutive samples. The floor is followed from the start
+        position, such that segments over stairs are free, but segments that pass below or above another floor are
+        checked on the floor of the start.
+
+        Args:
+            start: Start positions of shape (N, 3).
+            end: End positions of shape (N, 3).
+
+        Returns:
+            Whether each segment is free, shape (N,).
+        """
+        start = np.asarray(start, dtype=np.float32).reshape(-1, 3)
+        end = np.asarray(end, dtype=np.float32).reshape(-1, 3)
+        length = np.linalg.norm(end[:, :2] - start[:, :2], axis=1)
+        num_samples = int(np.ceil(length.max(initial=0.0) / (0.5 * self.resolution))) + 1
+
+        free = self.is_traversable(start)
+        current = start.copy()
+        current[:, 2] = self.height(start)
+        for t in np.linspace(0.0, 1.0, num_samples)[1:]:
+            sample = start + t * (end - start)
+            sample[:, 2] = current[:, 2]
+            layer, x, y = self.get_cells(sample)
+            sample_height = self.floor_height[layer, x, y]
+            free &= self.is_traversable(sample) & (np.abs(sample_height - current[:, 2]) <= self.step_height)
+            current[:, 2] = np.where(free, sample_height, current[:, 2])
+        return free
+
+    def sample_free(self, num_samples: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """Samples positions on the traversable floor uniformly over the cells.
+
+        Returns:
+            The positions on the floor, shape (N, 3).
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        layer, x, y = np.nonzero(self.traversable)
+        idx = rng.integers(0, len(layer), size=num_samples)
+        offset = rng.uniform(-0.5, 0.5, size=(num_samples, 2)) * self.resolution
+        xy = self._cell_centers(x[idx], y[idx]) + offset
+        return np.concatenate([xy, self.floor_height[layer[idx], x[idx], y[idx]][:, None]], axis=1)
+
+    """
+    Operations.
+    """
+
+    def save(self, file_path: str):
+        """Saves the map to a compressed ``.npz`` file."""
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        floor_height_mm = np.where(
+            np.isfinite(self.floor_height), np.round(np.nan_to_num(self.floor_height) * 1000.0), _NO_FLOOR
+        ).astype(np.int16)
+        np.savez_compressed(
+            file_path,
+            traversable=np.packbits(self.traversable, axis=None),
+            floor_height_mm=floor_height_mm,
+            origin=self.origin,
+            resolution=self.resolution,
+            step_height=self.step_height,
+        )
+
+    @staticmethod
+    def load(file_path: str) -> "TraversabilityMap":
+        """Loads a map written by :meth:`save`."""
+        data = np.load(file_path)
+        floor_height_mm = data["floor_height_mm"]
+        traversable = np.unpackbits(data["traversable"], count=floor_height_mm.size).reshape(floor_height_mm.shape)
+        floor_height = np.where(floor_height_mm == _NO_FLOOR, np.nan, floor_height_mm / 1000.0)
+        return TraversabilityMap(
+            traversable, floor_height, data["origin"], float(data["resolution"]), float(data["step_height"])
+        )
+
+    """
+    Helper functions.
+    """
+
+    @property
+    def _extent(self) -> np.ndarray:
+        return np.array(self.shape, dtype=np.float32) * self.resolution
+
+    def _cell_centers(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        return self.origin + (np.stack([x, y], axis=1) + 0.5) * self.resolution
+
+
+def compute_traversability_map(
+    rasterizer: SceneRasterizer, max_layers: int = 4, min_area: float = 1.0
+) -> TraversabilityMap:
+    """Computes the traversability map of a scene.
+
+    Args:
+        rasterizer: The rasterizer of the scene mesh.
+        max_layers: Maximum number of floors stacked in a cell. Defaults to 4.
+        min_area: Traversable regions smaller than this area in square meters are removed, e.g. the tops of
+            furniture above the clearance height. Defaults to 1.0.
+
+    Returns:
+        The traversability map.
+    """
+    traversable, floor_height = rasterizer.rasterize_layers(max_layers)
+    min_cells = int(np.ceil(min_area / rasterizer.resolution**2))
+    for layer in traversable:
+        labels, num_labels = ndimage.label(layer, structure=np.ones((3, 3), dtype=bool))
+        region_size = np.bincount(labels.ravel(), minlength=num_labels + 1)
+        layer &= (region_size >= min_cells)[labels]
+    return TraversabilityMap(traversable, floor_height, rasterizer.origin, rasterizer.resolution, rasterizer.step_height)
+
+
+def get_traversability_file(scene_id: str, map_dir: Optional[str] = None) -> str:
+    """Returns the path of the traversability map of a scene, given as scene name or dataset scene id."""
+    if map_dir is None:
+        map_dir = TRAVERSABILITY_DIR
+    return os.path.join(map_dir, f"{scene_key(scene_id)}.npz")
+
+
+def load_traversability_map(scene_id: str, map_dir: Optional[str] = None) -> TraversabilityMap:
+    """Loads the traversability map of a scene.
+
+    The maps are computed offline with ``scripts/compute_traversability.py``.
+    """
+    file_path = get_traversability_file(scene_id, map_dir)
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(
+            f"No traversability map found for scene {scene_key(scene_id)}: {file_path}. Please run"
+            " scripts/compute_traversability.py first."
+        )
+    return TraversabilityMap.load(file_path)
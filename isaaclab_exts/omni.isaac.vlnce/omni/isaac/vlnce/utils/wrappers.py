@@ -16,6 +16,9 @@ The following example shows how to wrap an environment for RSL-RL:
 """
 
 
+import time
+from collections import deque
+
 import gymnasium as gym
 import torch
 import numpy as np
@@ -25,7 +28,7 @@ from rsl_rl.env import VecEnv
 from omni.isaac.lab.envs import DirectRLEnv, ManagerBasedRLEnv
 from omni.isaac.lab_tasks.utils.wrappers.rsl_rl import RslRlVecEnvWrapper
 
-from .measures import add_measurement
+from .measures import BatchMeasures
 
 
 def get_proprio_obs_dim(env: ManagerBasedRLEnv) -> int:
@@ -33,6 +36,41 @@ def get_proprio_obs_dim(env: ManagerBasedRLEnv) -> int:
     return env.unwrapped.observation_manager.compute_group("proprio").shape[1]
 
 
+def get_warmup_steps(task_name: str) -> int:
+    """Returns the number of zero-command steps to let the robot settle after a reset."""
+    if "go2" in task_name:
+        return 100
+    elif "h1" in task_name or "g1" in task_name:
+        return 200
+    else:
+        return 50
+
+
+def get_start_height_offset(task_name: str) -> float:
+    """Returns the height offset added to the dataset start position to spawn the robot above the floor."""
+    if "go2" in task_name:
+        return 0.4
+    elif "h1" in task_name:
+        return 1.0
+    else:
+        return 0.5
+
+
+def request_high_level_frame(env: ManagerBasedRLEnv, group_name: str) -> None:
+    """Requests the observations of a lazy observation group to be computed in the next step."""
+    observation_manager = env.unwrapped.observation_manager
+    if hasattr(observation_manager, "request_groups"):
+        observation_manager.request_groups([group_name])
+
+
+def is_high_level_frame_updated(env: ManagerBasedRLEnv, group_name: str) -> bool:
+    """Returns whether the observations of an observation group were computed in the last step."""
+    observation_manager = env.unwrapped.observation_manager
+    if hasattr(observation_manager, "is_updated"):
+        return observation_manager.is_updated(group_name)
+    return True
+
+
 class RslRlVecEnvHistoryWrapper(RslRlVecEnvWrapper):
     """Wraps around Isaac Lab environment for RSL-RL to add history buffer to the proprioception observations.
 
@@ -52,14 +90,27 @@ class RslRlVecEnvHistoryWrapper(RslRlVecEnvWrapper):
 
         self.history_length = history_length
         self.proprio_obs_dim = get_proprio_obs_dim(env)
-        self.proprio_obs_buf = torch.zeros(self.num_envs, self.history_length, self.proprio_obs_dim,
-                                                    dtype=torch.float, device=self.unwrapped.device)
-        
+        # circular history buffer: the next observation is written at the write pointer, which also points to the
+        # oldest entry of the history
+        self.history_buf = torch.zeros(self.num_envs, self.history_length, self.proprio_obs_dim,
+                                       dtype=torch.float, device=self.unwrapped.device)
+        self.history_ptr = 0
+
         self.clip_actions = 20.0
 
     """
     Properties
     """
+
+    @property
+    def proprio_obs_buf(self) -> torch.Tensor:
+        """The proprioception history ordered from the oldest to the newest entry, shape (num_envs, history_length,
+        proprio_obs_dim).
+
+        This is a copy of the circular history buffer. Use :meth:`update_command` to modify the newest entry.
+        """
+        return torch.roll(self.history_buf, -self.history_ptr, dims=1)
+
     def get_observations(self) -> tuple[torch.Tensor, dict]:
         """Returns the current observations of the environment."""
         if hasattr(self.unwrapped, "observation_manager"):
@@ -67,9 +118,9 @@ class RslRlVecEnvHistoryWrapper(RslRlVecEnvWrapper):
         else:
             obs_dict = self.unwrapped._get_observations()
         proprio_obs, obs = obs_dict["proprio"], obs_dict["policy"]
-        self.proprio_obs_buf = torch.cat([proprio_obs.unsqueeze(1)] * self.history_length, dim=1)
-        proprio_obs_history = self.proprio_obs_buf.view(self.num_envs, -1)
-        curr_obs = torch.cat([obs, proprio_obs_history], dim=1)
+        self.history_buf[:] = proprio_obs.unsqueeze(1)
+        self.history_ptr = 0
+        curr_obs = self._get_policy_obs(obs)
         obs_dict["policy"] = curr_obs
 
         return curr_obs, {"observations": obs_dict}
@@ -77,10 +128,10 @@ class RslRlVecEnvHistoryWrapper(RslRlVecEnvWrapper):
     def reset(self) -> tuple[torch.Tensor, dict]:
         """Resets the environment."""
         obs_dict, infos = self.env.reset()
-        proprio_obs, obs = obs_dict["proprio"], obs_dict["policy"]
-        self.proprio_obs_buf = torch.stack([torch.zeros_like(proprio_obs)] * self.history_length, dim=1)
-        proprio_obs_history = self.proprio_obs_buf.view(self.num_envs, -1)
-        curr_obs = torch.cat([obs, proprio_obs_history], dim=1)
+        obs = obs_dict["policy"]
+        self.history_buf.zero_()
+        self.history_ptr = 0
+        curr_obs = self._get_policy_obs(obs)
         infos["observations"] = obs_dict
 
         return curr_obs, infos
@@ -104,28 +155,39 @@ class RslRlVecEnvHistoryWrapper(RslRlVecEnvWrapper):
             extras["time_outs"] = truncated
 
         # update obsservation history buffer & reset the history buffer for done environments
-        self.proprio_obs_buf = torch.where(
-            (self.episode_length_buf < 1)[:, None, None], 
-            torch.stack([torch.zeros_like(proprio_obs)] * self.history_length, dim=1),
-            torch.cat([
-                self.proprio_obs_buf[:, 1:],
-                proprio_obs.unsqueeze(1)
-            ], dim=1)
-        )
-        proprio_obs_history = self.proprio_obs_buf.view(self.num_envs, -1)
-        curr_obs = torch.cat([obs, proprio_obs_history], dim=1)
+        self.history_buf[:, self.history_ptr] = proprio_obs
+        self.history_ptr = (self.history_ptr + 1) % self.history_length
+        self.history_buf.mul_((self.episode_length_buf >= 1)[:, None, None])
+        curr_obs = self._get_policy_obs(obs)
         extras["observations"]["policy"] = curr_obs
 
         # return the step information
         return curr_obs, rew, dones, extras
 
     def update_command(self, command: torch.Tensor) -> None:
-        """Updates the command for the environment."""
-        self.proprio_obs_buf[:, -1, 6:9] = command
+        """Updates the command in the newest entry of the history buffer."""
+        self.history_buf[:, self.history_ptr - 1, 6:9] = command
+
+    def reset_history(self, env_ids: torch.Tensor) -> None:
+        """Clears the proprioception history of the given environments, e.g. after they were reset outside of
+        :meth:`step`."""
+        self.history_buf[env_ids] = 0.0
 
     def close(self):  # noqa: D102
         return self.env.close()
 
+    """
+    Helper functions.
+    """
+
+    def _get_policy_obs(self, obs: torch.Tensor) -> torch.Tensor:
+        """Concatenates the policy observations with the ordered (oldest first) proprioception history."""
+        return torch.cat([
+            obs,
+            self.history_buf[:, self.history_ptr:].reshape(self.num_envs, -1),
+            self.history_buf[:, :self.history_ptr].reshape(self.num_envs, -1),
+        ], dim=1)
+
 
 class VLNEnvWrapper:
     """Wrapper to configure an :class:`ManagerBasedRLEnv` instance to VLN environment."""
@@ -133,7 +195,8 @@ class VLNEnvWrapper:
     def __init__(self, env: ManagerBasedRLEnv, 
                  low_level_policy, task_name, 
                  episode, max_length=10000, high_level_obs_key="camera_obs",
-                 measure_names=["PathLength", "DistanceToGoal", "Success", "SPL", "OracleNavigationError", "OracleSuccess"]
+                 measure_names=["PathLength", "DistanceToGoal", "Success", "SPL", "OracleNavigationError", "OracleSuccess"],
+                 field_dir=None
         ):
         self.env = env
         self.task_name = task_name
@@ -150,7 +213,11 @@ class VLNEnvWrapper:
         self.low_level_action = None
 
         self.curr_pos, self.prev_pos = None, None
-        self.is_stop_called = False
+        self.is_stop_called = torch.zeros(1, dtype=torch.bool, device=self.env.unwrapped.device)
+
+        # metrics of the episode, kept on the simulation device and read back when the episode ends
+        self.measures = BatchMeasures(self.env, 1, self.env.unwrapped.device, measure_names, field_dir)
+        self._measure_mask = torch.ones(1, dtype=torch.bool, device=self.env.unwrapped.device)
 
     @property
     def unwrapped(self) -> ManagerBasedRLEnv:
@@ -160,8 +227,20 @@ class VLNEnvWrapper:
         """
         return self.env.unwrapped
 
+    def set_episode(self, episode) -> None:
+        """Set the episode that is evaluated after the next reset.
+
+        The robot has to be placed at the start of the episode before calling :meth:`reset`.
+        """
+        self.episode = episode
+
     def set_measures(self):
-        self.measure_manager = add_measurement(self.env, self.episode, self.measure_names)
+        self.measures.set_episodes([0], [self.episode])
+        self.measures.reset([0], self.is_stop_called)
+
+    def get_measurements_cpu(self) -> dict[str, float]:
+        """Returns the metrics of the episode as python floats, e.g. at the end of the episode."""
+        return self.measures.get_measurements_cpu([0])[0]
 
     def reset(self) -> tuple[torch.Tensor, dict]:
         """Reset the environment."""
@@ -169,16 +248,14 @@ class VLNEnvWrapper:
         self.low_level_obs = low_level_obs
         zero_cmd = torch.tensor([0., 0., 0.], device=low_level_obs.device)
 
-        if "go2" in self.task_name:
-            warmup_steps = 100
-        elif "h1" or "g1" in self.task_name:
-            warmup_steps = 200
-        else:
-            warmup_steps = 50
+        warmup_steps = get_warmup_steps(self.task_name)
 
         for i in range(warmup_steps):
             if i % 100 == 0 or i == warmup_steps - 1:
                 print(f"Warmup step {i}/{warmup_steps}...")
+            if i == warmup_steps - 1:
+                # the returned high-level observation is taken at the end of the warmup
+                self.request_frame()
 
             self.update_command(zero_cmd)
             actions = self.low_level_policy(self.low_level_obs)
@@ -189,9 +266,7 @@ class VLNEnvWrapper:
         self.env_step, self.same_pos_count = 0, 0
         
         self.set_measures()
-        self.measure_manager.reset_measures()
-        measurements = self.measure_manager.get_measurements()
-        infos["measurements"] = measurements
+        infos["measurements"] = self.measures.get_measurements()
 
         self.prev_pos = self.env.unwrapped.scene["robot"].data.root_pos_w[0].detach()
 
@@ -207,7 +282,7 @@ class VLNEnvWrapper:
 
         if isinstance(self.env, RslRlVecEnvHistoryWrapper):
             self.low_level_obs[:, 6:9] = command
-            self.env.proprio_obs_buf[:, -1, 6:9] = command
+            self.env.update_command(command)
         
         else:
             self.low_level_obs[:, 9:12] = command
@@ -236,13 +311,13 @@ class VLNEnvWrapper:
         obs = info["observations"][self.high_level_obs_key]
         self.env_step += 1
 
-        self.measure_manager.update_measures()
-        measurements = self.measure_manager.get_measurements()
-        info["measurements"] = measurements
+        self.measures.update(self._measure_mask, self.is_stop_called)
 
         # Check if the robot has stayed in the same location for 1000 steps or env has reached max length
         same_pos = self.check_same_pos()
         done = done[0] or same_pos or self.env_step >= self.max_length
+        # the metrics are tensors on the device during the episode and python floats at its end
+        info["measurements"] = self.get_measurements_cpu() if done else self.measures.get_measurements()
 
         return obs, reward, done, info
     
@@ -264,9 +339,268 @@ class VLNEnvWrapper:
 
     def set_stop_called(self, is_stop_called: bool) -> None:
         """Set the stop called flag."""
-        self.env.is_stop_called = is_stop_called
+        self.is_stop_called[0] = is_stop_called
+
+    def request_frame(self) -> None:
+        """Request a new high-level observation for the next :meth:`step`.
+
+        Only has an effect if the high-level observation group is lazy (see :class:`VLNEnvCfg`). Otherwise, a new
+        frame is computed in each step anyway.
+        """
+        request_high_level_frame(self.env, self.high_level_obs_key)
+
+    def is_frame_updated(self) -> bool:
+        """Whether the high-level observation was computed in the last step, i.e. is not the cached frame."""
+        return is_high_level_frame_updated(self.env, self.high_level_obs_key)
+    
+    def close(self) -> None:
+        self.env.close()
+
     
+
+class VLNBatchEnvWrapper:
+    """Wrapper to evaluate VLN episodes in parallel, one episode per environment of a :class:`ManagerBasedRLEnv`.
+
+    The episodes are taken from a queue. Whenever the episode of an environment is finished, its measurements are
+    reported in the ``finished_episodes`` entry of the step information and the next episode of the queue is assigned
+    to the environment. The environment is then reset individually and warmed up with zero commands while the other
+    environments keep evaluating their episodes. Environments without remaining episodes stay idle.
+
+    All environments have to share the same scene, i.e. the episodes have to be from the same scene.
+    """
+
+    def __init__(self, env: ManagerBasedRLEnv,
+                 low_level_policy, task_name,
+                 episodes, max_length=10000, high_level_obs_key="camera_obs",
+                 measure_names=["PathLength", "DistanceToGoal", "Success", "SPL", "OracleNavigationError", "OracleSuccess"],
+                 field_dir=None
+        ):
+        self.env = env
+        self.task_name = task_name
+        self.measure_names = measure_names
+        self.num_envs = self.env.num_envs
+        self.device = self.env.unwrapped.device
+
+        self.max_length = max_length
+        self.warmup_steps = get_warmup_steps(task_name)
+
+        self.high_level_obs_key = high_level_obs_key
+        assert high_level_obs_key in self.env.observation_space.spaces.keys()
+
+        self.low_level_policy = low_level_policy
+        self.low_level_action = None
+
+        # episode queue and per-env episode state
+        self.episode_queue = deque(episodes)
+        self.episodes = [None] * self.num_envs
+        self.episode_start_time = np.zeros(self.num_envs)
+        self.env_step = np.zeros(self.num_envs, dtype=np.int64)
+        self.warmup_counter = np.zeros(self.num_envs, dtype=np.int64)
+        # envs that currently evaluate an episode (i.e. have an episode and finished the warmup)
+        self.is_running = np.zeros(self.num_envs, dtype=bool)
+        self._is_running = torch.zeros(self.num_envs, dtype=torch.bool, device=self.device)
+        self.is_stop_called = torch.zeros(self.num_envs, dtype=torch.bool, device=self.device)
+        self._end_requested = torch.zeros(self.num_envs, dtype=torch.bool, device=self.device)
+
+        self.same_pos_count = torch.zeros(self.num_envs, dtype=torch.long, device=self.device)
+        self.prev_pos = torch.zeros(self.num_envs, 3, device=self.device)
+
+        # metrics of all envs, kept on the simulation device
+        self.measures = BatchMeasures(self.env, self.num_envs, self.device, measure_names, field_dir)
+
+    @property
+    def unwrapped(self) -> ManagerBasedRLEnv:
+        """Returns the base environment of the wrapper.
+
+        This will be the bare :class:`gymnasium.Env` environment, underneath all layers of wrappers.
+        """
+        return self.env.unwrapped
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether all episodes of the queue have been evaluated."""
+        return len(self.episode_queue) == 0 and all(episode is None for episode in self.episodes)
+
+    def reset(self) -> tuple[torch.Tensor, dict]:
+        """Assign the first episodes to all environments and reset them."""
+        for env_id in range(self.num_envs):
+            self._assign_next_episode(env_id)
+        low_level_obs, infos = self.env.reset()
+        self.low_level_obs = low_level_obs
+
+        zero_cmd = torch.zeros(self.num_envs, 3, device=self.device)
+        for i in range(self.warmup_steps):
+            if i % 100 == 0 or i == self.warmup_steps - 1:
+                print(f"Warmup step {i}/{self.warmup_steps}...")
+            if i == self.warmup_steps - 1:
+                self.request_frame()
+            _, _, _, infos = self._step_low_level(zero_cmd)
+        self.warmup_counter[:] = 0
+
+        infos["started_env_ids"] = self._start_episodes(
+            [env_id for env_id in range(self.num_envs) if self.episodes[env_id] is not None]
+        )
+        infos["measurements"] = self.measures.get_measurements()
+        infos["finished_episodes"] = []
+
+        obs = infos["observations"][self.high_level_obs_key]
+        return obs, infos
+
+    def update_command(self, command) -> None:
+        """Update the commands of the low-level policy. The command has shape (num_envs, 3)."""
+
+        # make sure command is a tensor on the same device as low_level_obs
+        if not torch.is_tensor(command):
+            command = torch.tensor(command, device=self.device)
+
+        if isinstance(self.env, RslRlVecEnvHistoryWrapper):
+            self.low_level_obs[:, 6:9] = command
+            self.env.update_command(command)
+        else:
+            self.low_level_obs[:, 9:12] = command
+
+    def step(self, action) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor, dict]:
+        """Take a step in all environments.
+
+        Args:
+            action: The actions of the high-level planner, which should be velocity commands of shape (num_envs, 3).
+                Commands of environments that are warming up or idle are ignored.
+
+        Returns:
+            obs: The observation of the high-level planner.
+            reward: The reward of the environment.
+            done: Whether the episode of each environment finished in this step, shape (num_envs,).
+            info: Additional information of the environment. The entry ``finished_episodes`` holds the results of the
+                episodes finished in this step and ``started_env_ids`` the environments that started a new episode.
+        """
+        if not torch.is_tensor(action):
+            action = torch.tensor(action, device=self.device)
+        action = action.view(self.num_envs, 3) * self._is_running.unsqueeze(1)
+        running = self.is_running.copy()
+
+        low_level_obs, reward, done, info = self._step_low_level(action)
+        obs = info["observations"][self.high_level_obs_key]
+
+        # update measures of the running episodes
+        self.env_step[running] += 1
+        self.measures.update(self._is_running, self.is_stop_called)
+        info["measurements"] = self.measures.get_measurements()
+
+        # check for finished episodes, the finished mask is the only transfer to the host
+        finished = self._is_running & (done.bool() | self.check_same_pos() | self.is_stop_called | self._end_requested)
+        finished = finished.cpu().numpy() | (running & (self.env_step >= self.max_length))
+        self._end_requested[:] = False
+
+        info["finished_episodes"] = []
+        reset_env_ids = []
+        finished_env_ids = np.flatnonzero(finished).tolist()
+        finished_measurements = self.measures.get_measurements_cpu(finished_env_ids) if finished_env_ids else []
+        self._is_running[finished_env_ids] = False
+        for env_id, measurements in zip(finished_env_ids, finished_measurements):
+            info["finished_episodes"].append({
+                "env_id": env_id,
+                "episode": self.episodes[env_id],
+                "measurements": measurements,
+                "num_steps": int(self.env_step[env_id]),
+                "eval_time": time.time() - self.episode_start_time[env_id],
+            })
+            self.is_running[env_id] = False
+            if self._assign_next_episode(env_id):
+                reset_env_ids.append(env_id)
+        if len(reset_env_ids) > 0:
+            self._reset_envs(torch.tensor(reset_env_ids, dtype=torch.long, device=self.device))
+
+        # start the episodes of the envs that finished their warmup
+        warming_up = self.warmup_counter > 0
+        self.warmup_counter[warming_up & ~finished] -= 1
+        info["started_env_ids"] = self._start_episodes(np.flatnonzero(warming_up & (self.warmup_counter == 0)))
+
+        return obs, reward, torch.from_numpy(finished).to(self.device), info
+
+    def check_same_pos(self) -> torch.Tensor:
+        """Returns which robots have stayed in the same location for 1000 steps."""
+        curr_pos = self.env.unwrapped.scene["robot"].data.root_pos_w.detach()
+        robot_vel = torch.norm(self.env.unwrapped.scene["robot"].data.root_vel_w.detach(), dim=1)
+        same_pos = (torch.norm(curr_pos - self.prev_pos, dim=1) < 0.01) & (robot_vel < 0.1)
+        self.same_pos_count = torch.where(same_pos, self.same_pos_count + 1, torch.zeros_like(self.same_pos_count))
+        self.prev_pos = curr_pos.clone()
+
+        return self.same_pos_count >= 1000
+
+    def set_stop_called(self, is_stop_called) -> None:
+        """Set the stop called flags of all environments, shape (num_envs,)."""
+        self.is_stop_called[:] = torch.as_tensor(is_stop_called, device=self.device)
+
+    def request_frame(self) -> None:
+        """Request a new high-level observation for the next :meth:`step`."""
+        request_high_level_frame(self.env, self.high_level_obs_key)
+
+    def end_episodes(self, env_mask) -> None:
+        """End the episodes of the given environments after the next step, e.g. when the robot fell over."""
+        self._end_requested |= torch.as_tensor(env_mask, dtype=torch.bool, device=self.device)
+
     def close(self) -> None:
         self.env.close()
 
-    
\ No newline at end of file
+    """
+    Helper functions.
+    """
+
+    def _step_low_level(self, command: torch.Tensor):
+        self.update_command(command)
+        low_level_action = self.low_level_policy(self.low_level_obs)
+        self.low_level_action = low_level_action
+
+        low_level_obs, reward, done, info = self.env.step(low_level_action)
+        self.low_level_obs = low_level_obs
+        return low_level_obs, reward, done, info
+
+    def _reset_envs(self, env_ids: torch.Tensor):
+        """Reset the given envs after the step and refresh their low-level observations."""
+        # note: resets the managers and applies the reset events (i.e. places the robot at its new start)
+        self.env.unwrapped._reset_idx(env_ids)
+        # the step already returned the observations before the reset, which must not be fed to the policy
+        policy_obs = self.env.unwrapped.observation_manager.compute_group("policy")
+        if isinstance(self.env, RslRlVecEnvHistoryWrapper):
+            self.env.reset_history(env_ids)
+            policy_obs = self.env._get_policy_obs(policy_obs)
+        self.low_level_obs[env_ids] = policy_obs[env_ids]
+
+    def _assign_next_episode(self, env_id: int) -> bool:
+        """Assign the next episode of the queue to an env and set its start pose as the robot's default root state.
+
+        The robot is placed on the next reset of the env. Returns whether an episode was assigned.
+        """
+        if len(self.episode_queue) == 0:
+            self.episodes[env_id] = None
+            return False
+
+        episode = self.episode_queue.popleft()
+        self.episodes[env_id] = episode
+        self.warmup_counter[env_id] = self.warmup_steps
+        self.episode_start_time[env_id] = time.time()
+
+        # the reset event adds the env origin to the default root state
+        robot = self.env.unwrapped.scene["robot"]
+        start_pos = torch.tensor(episode["start_position"], dtype=torch.float, device=self.device)
+        start_pos[2] += get_start_height_offset(self.task_name)
+        robot.data.default_root_state[env_id, :3] = start_pos - self.env.unwrapped.scene.env_origins[env_id]
+        robot.data.default_root_state[env_id, 3:7] = torch.tensor(
+            episode["start_rotation"], dtype=torch.float, device=self.device
+        )
+        robot.data.default_root_state[env_id, 7:] = 0.0
+        return True
+
+    def _start_episodes(self, env_ids) -> list[int]:
+        """Start measuring the episodes of the given envs."""
+        env_ids = [int(env_id) for env_id in env_ids]
+        if len(env_ids) == 0:
+            return env_ids
+        self.env_step[env_ids] = 0
+        self.is_running[env_ids] = True
+        self._is_running[env_ids] = True
+        self.same_pos_count[env_ids] = 0
+        self.prev_pos[env_ids] = self.env.unwrapped.scene["robot"].data.root_pos_w[env_ids].detach()
+        self.measures.set_episodes(env_ids, [self.episodes[env_id] for env_id in env_ids])
+        self.measures.reset(env_ids, self.is_stop_called)
+        return env_ids
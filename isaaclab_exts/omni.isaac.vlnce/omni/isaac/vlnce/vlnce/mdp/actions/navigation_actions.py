@@ -15,6 +15,7 @@ from omni.isaac.lab.envs import ManagerBasedRLEnv
 from omni.isaac.lab.managers.action_manager import ActionTerm, ActionTermCfg
 from omni.isaac.lab.utils import configclass
 from omni.isaac.lab.utils.assets import check_file_path, read_file
+from rsl_rl.utils import CudaGraphPolicy
 
 # class DepthImageProcessor(nn.Module):
 #     def __init__(self, image_height, image_width, num_output_units):
@@ -59,6 +60,8 @@ class NavigationAction(ActionTerm):
         # # # load policies
         self.low_level_policy = torch.jit.load(file_bytes, map_location=self.device)
         self.low_level_policy = torch.jit.freeze(self.low_level_policy.eval())
+        if self.cfg.use_cuda_graph:
+            self.low_level_policy = CudaGraphPolicy(self.low_level_policy)
 
         # prepare joint position actions
         self.low_level_action_term: ActionTerm = self.cfg.low_level_action.class_type(cfg.low_level_action, env)
@@ -138,6 +141,8 @@ class NavigationActionCfg(ActionTermCfg):
     """Configuration of the low level action term."""
     low_level_policy_file: str = MISSING
     """Path to the low level policy file."""
+    use_cuda_graph: bool = False
+    """Whether to replay the low level policy as captured CUDA graph. Ignored on the CPU."""
     path_length: int = 51
     """Length of the path to be followed."""
     # low_level_agent_cfg: dict = {}
@@ -0,0 +1,133 @@
+# Copyright (c) 2023-2024, ETH Zurich (Robotics Systems Lab)
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING
+
+import torch
+from omni.isaac.lab.envs import ManagerBasedRLEnv
+from omni.isaac.lab.managers import ObservationManager
+from omni.isaac.matterport.domains import MatterportRayCaster, MatterportRayCasterCamera
+
+if TYPE_CHECKING:
+    from .vln_env_cfg import VLNEnvCfg
+
+
+class LazyObservationManager(ObservationManager):
+    """Observation manager that computes the lazy observation groups only when a high-level frame is due.
+
+    A frame is due every :attr:`VLNEnvCfg.high_level_decimation` environment steps, on reset, or when the group was
+    requested with :meth:`request_groups`. Otherwise, the last computed observations of the group are returned.
+    """
+
+    _env: VLNManagerBasedRLEnv
+
+    def __init__(self, cfg: object, env: VLNManagerBasedRLEnv):
+        super().__init__(cfg, env)
+        self.lazy_groups = [group_name for group_name in env.cfg.lazy_obs_groups if group_name in self._group_obs_term_names]
+        self.high_level_decimation = env.cfg.high_level_decimation
+
+        self._requested_groups: set[str] = set(self.lazy_groups)
+        self._lazy_obs_buffer: dict[str, torch.Tensor | dict[str, torch.Tensor]] = {}
+        self._updated_groups: set[str] = set()
+
+    """
+    Operations.
+    """
+
+    def request_groups(self, group_names: list[str] | None = None):
+        """Request the lazy groups to be computed on the next call of :meth:`compute`.
+
+        Args:
+            group_names: The groups to compute. Defaults to all lazy groups.
+        """
+        self._requested_groups.update(self.lazy_groups if group_names is None else group_names)
+
+    def is_updated(self, group_name: str) -> bool:
+        """Whether the observations of the group were computed in the last call of :meth:`compute`."""
+        return group_name not in self.lazy_groups or group_name in self._updated_groups
+
+    def compute(self) -> dict[str, torch.Tensor | dict[str, torch.Tensor]]:
+        """Compute the observations of all groups, where the lazy groups are only computed if a frame is due."""
+        obs_buffer = dict()
+        self._updated_groups.clear()
+        frame_due = self.high_level_decimation > 0 and self._env.common_step_counter % self.high_level_decimation == 0
+        for group_name in self._group_obs_term_names:
+            if group_name not in self.lazy_groups:
+                obs_buffer[group_name] = self.compute_group(group_name)
+            elif frame_due or group_name in self._requested_groups or group_name not in self._lazy_obs_buffer:
+                self._env.render_cameras()
+                obs_buffer[group_name] = self.compute_group(group_name)
+                self._lazy_obs_buffer[group_name] = obs_buffer[group_name]
+                self._updated_groups.add(group_name)
+                self._requested_groups.discard(group_name)
+            else:
+                # return the last frame
+                obs_buffer[group_name] = self._lazy_obs_buffer[group_name]
+        self._obs_buffer = obs_buffer
+        return obs_buffer
+
+
+class VLNManagerBasedRLEnv(ManagerBasedRLEnv):
+    """Manager-based RL environment with on-demand camera observations.
+
+    The observation groups in :attr:`VLNEnvCfg.lazy_obs_groups` are computed by the :class:`LazyObservationManager`.
+    Without GUI, the scene is also only rendered for the high-level frames (or on request), which skips the render
+    cost of the cameras for the locomotion steps in between.
+    """
+
+    cfg: VLNEnvCfg
+
+    def __init__(self, cfg: VLNEnvCfg, render_mode: str | None = None, **kwargs):
+        super().__init__(cfg, render_mode, **kwargs)
+        self._last_render_counter = -1
+
+        if len(self.cfg.lazy_obs_groups) > 0 and not self.sim.has_gui():
+            if self.cfg.high_level_decimation > 0:
+                self.cfg.sim.render_interval = self.cfg.decimation * self.cfg.high_level_decimation
+            else:
+                self.cfg.sim.render_interval = sys.maxsize
+
+    def load_managers(self):
+        if len(self.cfg.lazy_obs_groups) == 0:
+            super().load_managers()
+            return
+        # the base classes create the observation manager without terms, such that each term is only created once, by
+        # the lazy observation manager
+        observations_cfg, self.cfg.observations = self.cfg.observations, {}
+        try:
+            super().load_managers()
+        finally:
+            self.cfg.observations = observations_cfg
+        self.observation_manager = LazyObservationManager(self.cfg.observations, self)
+        print("[INFO] Observation Manager:", self.observation_manager)
+        print("[INFO] Lazy Observation Manager:", self.observation_manager.lazy_groups)
+        # the spaces were configured from the empty observation manager
+        self._configure_gym_env_spaces()
+
+    def reset(self, seed: int | None = None, options: dict | None = None):
+        if isinstance(self.observation_manager, LazyObservationManager):
+            self.observation_manager.request_groups()
+        return super().reset(seed, options)
+
+    def close(self):
+        if not self._is_closed:
+            # release the shared meshes explicitly, the sensors of a closed environment are not guaranteed to be
+            # garbage collected
+            for sensor in self.scene.sensors.values():
+                if isinstance(sensor, (MatterportRayCaster, MatterportRayCasterCamera)):
+                    sensor.release_meshes()
+        super().close()
+
+    def render_cameras(self):
+        """Render the scene for the cameras if it was not rendered in the current environment step."""
+        counter = self._sim_step_counter
+        interval = self.cfg.sim.render_interval
+        rendered = counter // interval != (counter - self.cfg.decimation) // interval
+        if not rendered and self._last_render_counter != counter and self.sim.has_rtx_sensors():
+            self.sim.render()
+            self._last_render_counter = counter
@@ -0,0 +1,30 @@
+# Copyright (c) 2023-2024, ETH Zurich (Robotics Systems Lab)
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+from __future__ import annotations
+
+from dataclasses import field
+
+from omni.isaac.lab.envs import ManagerBasedRLEnvCfg
+from omni.isaac.lab.utils import configclass
+
+
+@configclass
+class VLNEnvCfg(ManagerBasedRLEnvCfg):
+    """Configuration for the VLN environment with on-demand camera observations."""
+
+    lazy_obs_groups: list[str] = field(default_factory=list)
+    """Observation groups that are only computed at the high-level frame rate or on request. Defaults to empty.
+
+    Between two frames, the last computed observations of these groups are returned, such that locomotion steps
+    in between skip the rendering and the readback of the cameras.
+    """
+
+    high_level_decimation: int = 1
+    """Number of environment steps per high-level frame. Defaults to 1 (every step).
+
+    If 0, the lazy observation groups are only computed on request (see
+    :meth:`LazyObservationManager.request_groups`) and on reset.
+    """
@@ -0,0 +1,84 @@
+"""Benchmark the return computation of the rollout storage, step-wise loop vs. scripted recursion.
+
+.. code-block:: bash
+
+    python scripts/benchmarks/benchmark_gae.py --num_steps 24 48 --num_envs 1024 4096 16384
+
+The previous implementation is timed on the same random rollout, and both results are checked for equality.
+"""
+
+import argparse
+import time
+
+import torch
+from rsl_rl.storage import RolloutStorage
+
+parser = argparse.ArgumentParser(description="Benchmark the GAE computation.")
+parser.add_argument("--num_steps", default=[24, 48, 96], type=int, nargs="+", help="Rollout lengths to benchmark.")
+parser.add_argument("--num_envs", default=[1024, 4096, 16384], type=int, nargs="+", help="Batch sizes to benchmark.")
+parser.add_argument("--num_iters", default=100, type=int, help="Number of timed iterations.")
+parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu", type=str)
+args_cli = parser.parse_args()
+
+GAMMA = 0.99
+LAM = 0.95
+
+
+def legacy_compute_returns(storage, last_values, gamma, lam):
+    """The previous implementation of :meth:`RolloutStorage.compute_returns`."""
+    advantage = 0
+    for step in reversed(range(storage.num_transitions_per_env)):
+        if step == storage.num_transitions_per_env - 1:
+            next_values = last_values
+        else:
+            next_values = storage.values[step + 1]
+        next_is_not_terminal = 1.0 - storage.dones[step].float()
+        delta = storage.rewards[step] + next_is_not_terminal * gamma * next_values - storage.values[step]
+        advantage = delta + next_is_not_terminal * gamma * lam * advantage
+        storage.returns[step] = advantage + storage.values[step]
+
+    storage.advantages = storage.returns - storage.values
+    storage.advantages = (storage.advantages - storage.advantages.mean()) / (storage.advantages.std() + 1e-8)
+
+
+def sample_storage(num_steps, num_envs, device):
+    """Returns a storage filled with a random rollout and the values of the last observation."""
+    storage = RolloutStorage(num_envs, num_steps, [1], [None], [1], device=device)
+    storage.rewards.normal_()
+    storage.values.normal_()
+    storage.dones.copy_(torch.rand(num_steps, num_envs, 1, device=device) < 0.02)
+    return storage, torch.randn(num_envs, 1, device=device)
+
+
+def time_fn(fn):
+    """Returns the mean latency of a call in microseconds."""
+    for _ in range(10):
+        fn()
+    if args_cli.device.startswith("cuda"):
+        torch.cuda.synchronize()
+    start_time = time.perf_counter()
+    for _ in range(args_cli.num_iters):
+        fn()
+    if args_cli.device.startswith("cuda"):
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start_time) / args_cli.num_iters * 1e6
+
+
+if __name__ == "__main__":
+    print(f"[INFO]: Device: {args_cli.device}")
+    print(f"{'num_steps':>10} {'num_envs':>10} {'previous [us]':>14} {'scripted [us]':>14} {'speedup':>8} {'equal':>6}")
+    for num_steps in args_cli.num_steps:
+        for num_envs in args_cli.num_envs:
+            storage, last_values = sample_storage(num_steps, num_envs, args_cli.device)
+
+            legacy_compute_returns(storage, last_values, GAMMA, LAM)
+            legacy_returns, legacy_advantages = storage.returns.clone(), storage.advantages.clone()
+            storage.compute_returns(last_values, GAMMA, LAM)
+            equal = torch.equal(legacy_returns, storage.returns) and torch.equal(legacy_advantages, storage.advantages)
+
+            legacy_time = time_fn(lambda: legacy_compute_returns(storage, last_values, GAMMA, LAM))
+            scripted_time = time_fn(lambda: storage.compute_returns(last_values, GAMMA, LAM))
+            print(
+                f"{num_steps:>10} {num_envs:>10} {legacy_time:>14.1f} {scripted_time:>14.1f}"
+                f" {legacy_time / scripted_time:>8.2f} {str(equal):>6}"
+            )
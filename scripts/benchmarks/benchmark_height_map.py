@@ -0,0 +1,141 @@
+"""Benchmark the lidar height map observation, previous implementation vs. fixed-shape voxelizer.
+
+.. code-block:: bash
+
+    python scripts/benchmarks/benchmark_height_map.py --num_envs 1 8 64 --channels 16 32 64
+
+The lidar hits are sampled randomly around the sensor with the pattern of the go2 vision lidar (horizontal resolution
+of 4 degrees). On GPU, the voxelizer is additionally timed as replayed CUDA graph.
+"""
+
+import argparse
+import time
+
+from omni.isaac.lab.app import AppLauncher
+
+parser = argparse.ArgumentParser(description="Benchmark the lidar height map observation.")
+parser.add_argument("--num_envs", default=[1, 8, 64, 256], type=int, nargs="+", help="Batch sizes to benchmark.")
+parser.add_argument("--channels", default=[16, 32, 64], type=int, nargs="+", help="Numbers of lidar channels.")
+parser.add_argument("--horizontal_res", default=4.0, type=float, help="Horizontal resolution of the lidar in degrees.")
+parser.add_argument("--num_iters", default=200, type=int, help="Number of timed iterations.")
+AppLauncher.add_app_launcher_args(parser)
+args_cli = parser.parse_args()
+args_cli.headless = True
+
+app_launcher = AppLauncher(args_cli)
+simulation_app = app_launcher.app
+
+import torch
+import torch.nn.functional as F
+
+import omni.isaac.lab.utils.math as math_utils
+
+from omni.isaac.vlnce.utils.height_map import RANGE_X, RANGE_Y, RANGE_Z, VOXEL_SIZE_XY, HeightMapVoxelizer
+
+
+def legacy_height_map(ray_hits_w, sensor_pos_w, base_quat_w, offset=0.5):
+    """The previous implementation of :func:`height_map_lidar`, with dynamic shapes."""
+    hit_vec = ray_hits_w - sensor_pos_w.unsqueeze(1)
+    hit_vec[torch.isinf(hit_vec)] = 0.0
+    hit_vec[torch.isnan(hit_vec)] = 0.0
+
+    hit_vec_shape = hit_vec.shape
+    hit_vec = hit_vec.view(-1, hit_vec.shape[-1])
+    sensor_quat_default = torch.tensor([-0.131, 0.0, -0.991, 0.0], device=base_quat_w.device).unsqueeze(0).repeat(hit_vec_shape[0], 1)
+    sensor_quat_w = math_utils.quat_mul(base_quat_w, sensor_quat_default)
+    quat_w_dup = (sensor_quat_w.unsqueeze(1).repeat(1, hit_vec_shape[1], 1)).view(-1, sensor_quat_w.shape[-1])
+    hit_vec_lidar_frame = math_utils.quat_rotate_inverse(quat_w_dup, hit_vec).view(hit_vec_shape)
+
+    num_envs = hit_vec_lidar_frame.shape[0]
+    x_bins = torch.arange(RANGE_X[0], RANGE_X[1], VOXEL_SIZE_XY, device=hit_vec_lidar_frame.device)
+    y_bins = torch.arange(RANGE_Y[0], RANGE_Y[1], VOXEL_SIZE_XY, device=hit_vec_lidar_frame.device)
+
+    x = hit_vec_lidar_frame[..., 0]
+    y = hit_vec_lidar_frame[..., 1]
+    z = hit_vec_lidar_frame[..., 2]
+    valid_indices = (x > RANGE_X[0]) & (x <= RANGE_X[1]) & (y > RANGE_Y[0]) & (y <= RANGE_Y[1]) & \
+                    (z >= RANGE_Z[0]) & (z <= RANGE_Z[1])
+
+    x_indices = torch.bucketize(x[valid_indices], x_bins) - 1
+    y_indices = torch.bucketize(y[valid_indices], y_bins) - 1
+    env_indices = torch.arange(num_envs, device=hit_vec_lidar_frame.device).unsqueeze(1).expand_as(valid_indices)
+    flat_env_indices = env_indices[valid_indices]
+
+    map_2_5D = torch.full((num_envs, len(x_bins), len(y_bins)), float("inf"), device=hit_vec_lidar_frame.device)
+    linear_indices = flat_env_indices * len(x_bins) * len(y_bins) + x_indices * len(y_bins) + y_indices
+    map_2_5D = map_2_5D.view(-1).scatter_reduce_(0, linear_indices, z[valid_indices], reduce="amin") - offset
+    map_2_5D = torch.where(map_2_5D < 0.05, torch.tensor(0.0, device=map_2_5D.device), map_2_5D)
+    map_2_5D = torch.where(torch.isinf(map_2_5D), torch.tensor(0.0, device=map_2_5D.device), map_2_5D)
+    map_2_5D = map_2_5D.view(num_envs, len(x_bins), len(y_bins))
+    return F.max_pool2d(map_2_5D, kernel_size=3, stride=1, padding=1).view(num_envs, -1)
+
+
+def sample_lidar_data(num_envs, num_rays, device):
+    """Returns random hits around the sensors, including invalid hits, and random robot orientations."""
+    sensor_pos_w = torch.randn(num_envs, 3, device=device)
+    ray_hits_w = sensor_pos_w.unsqueeze(1) + 2.0 * torch.randn(num_envs, num_rays, 3, device=device)
+    ray_hits_w[torch.rand(num_envs, num_rays, device=device) < 0.05] = float("inf")
+    base_quat_w = math_utils.quat_from_euler_xyz(
+        0.1 * torch.randn(num_envs, device=device),
+        0.1 * torch.randn(num_envs, device=device),
+        torch.rand(num_envs, device=device) * 2 * torch.pi,
+    )
+    return ray_hits_w, sensor_pos_w, base_quat_w
+
+
+def time_fn(fn, device):
+    """Returns the mean latency of a call in microseconds."""
+    for _ in range(10):
+        fn()
+    if device == "cuda":
+        torch.cuda.synchronize()
+    start_time = time.perf_counter()
+    for _ in range(args_cli.num_iters):
+        fn()
+    if device == "cuda":
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start_time) / args_cli.num_iters * 1e6
+
+
+def capture_graph(fn):
+    """Captures the function as CUDA graph and returns its replay."""
+    stream = torch.cuda.Stream()
+    stream.wait_stream(torch.cuda.current_stream())
+    with torch.cuda.stream(stream):
+        for _ in range(3):
+            fn()
+    torch.cuda.current_stream().wait_stream(stream)
+    graph = torch.cuda.CUDAGraph()
+    with torch.cuda.graph(graph):
+        fn()
+    return graph.replay
+
+
+if __name__ == "__main__":
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    num_rays_per_channel = int(360.0 / args_cli.horizontal_res)
+
+    print(f"[INFO]: Device: {device}")
+    print(f"{'num_envs':>10} {'channels':>10} {'previous [us]':>14} {'fused [us]':>12} {'graph [us]':>12} {'speedup':>8}")
+    for num_envs in args_cli.num_envs:
+        for channels in args_cli.channels:
+            ray_hits_w, sensor_pos_w, base_quat_w = sample_lidar_data(num_envs, channels * num_rays_per_channel, device)
+            voxelizer = HeightMapVoxelizer(num_envs, ray_hits_w.shape[1], device=device)
+
+            def fused():
+                return voxelizer.compute(ray_hits_w, sensor_pos_w, base_quat_w)
+
+            max_error = (legacy_height_map(ray_hits_w, sensor_pos_w, base_quat_w) - fused()).abs().max().item()
+            if max_error > 1e-4:
+                print(f"[WARN]: Height maps differ by {max_error:.2e} for {num_envs} envs and {channels} channels.")
+
+            legacy_time = time_fn(lambda: legacy_height_map(ray_hits_w, sensor_pos_w, base_quat_w), device)
+            fused_time = time_fn(fused, device)
+            graph_time = time_fn(capture_graph(fused), device) if device == "cuda" else float("nan")
+            best_time = fused_time if device != "cuda" else min(fused_time, graph_time)
+            print(
+                f"{num_envs:>10} {channels:>10} {legacy_time:>14.1f} {fused_time:>12.1f} {graph_time:>12.1f}"
+                f" {legacy_time / best_time:>8.2f}"
+            )
+
+    simulation_app.close()
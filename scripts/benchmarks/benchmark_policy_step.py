@@ -0,0 +1,64 @@
+"""Benchmark the latency of the low-level policy per control tick, eager vs. captured CUDA graph.
+
+.. code-block:: bash
+
+    python scripts/benchmarks/benchmark_policy_step.py --policy logs/rsl_rl/go2_base/2024-12-10_21-44-44/exported/policy.jit
+
+Without ``--policy``, a randomly initialized actor with the dimensions of the go2 base policy is used.
+"""
+
+import argparse
+import time
+
+import torch
+from rsl_rl.modules import ActorCritic, EmpiricalNormalization
+from rsl_rl.utils import CudaGraphPolicy
+
+parser = argparse.ArgumentParser(description="Benchmark the low-level policy step.")
+parser.add_argument("--policy", default=None, type=str, help="Exported (jit) policy file.")
+parser.add_argument("--num_obs", default=235, type=int, help="Observation dimension of the random policy.")
+parser.add_argument("--num_actions", default=12, type=int, help="Action dimension of the random policy.")
+parser.add_argument("--num_envs", default=[1, 8, 64], type=int, nargs="+", help="Batch sizes to benchmark.")
+parser.add_argument("--num_iters", default=1000, type=int, help="Number of timed iterations.")
+parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu", type=str)
+args_cli = parser.parse_args()
+
+
+def load_policy(device):
+    """Returns the policy and its observation dimension."""
+    if args_cli.policy is not None:
+        policy = torch.jit.load(args_cli.policy, map_location=device).eval()
+        # the input dimension of the first linear layer
+        num_obs = next(param for param in policy.parameters() if param.dim() == 2).shape[1]
+        return torch.jit.freeze(policy), num_obs
+    actor_critic = ActorCritic(args_cli.num_obs, args_cli.num_obs, args_cli.num_actions).to(device).eval()
+    normalizer = EmpiricalNormalization(shape=[args_cli.num_obs]).to(device).eval()
+    return lambda x: actor_critic.act_inference(normalizer(x)), args_cli.num_obs  # noqa: E731
+
+
+def time_policy(policy, obs):
+    """Returns the mean latency of a policy call in microseconds."""
+    for _ in range(10):
+        policy(obs)
+    if obs.is_cuda:
+        torch.cuda.synchronize()
+    start_time = time.perf_counter()
+    for _ in range(args_cli.num_iters):
+        policy(obs)
+    if obs.is_cuda:
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start_time) / args_cli.num_iters * 1e6
+
+
+if __name__ == "__main__":
+    policy, num_obs = load_policy(args_cli.device)
+
+    print(f"[INFO]: Device: {args_cli.device}")
+    print(f"{'num_envs':>10} {'eager [us]':>12} {'graph [us]':>12} {'speedup':>8}")
+    for num_envs in args_cli.num_envs:
+        obs = torch.randn(num_envs, num_obs, device=args_cli.device)
+        graph_policy = CudaGraphPolicy(policy)
+        with torch.no_grad():
+            eager_time = time_policy(policy, obs)
+        graph_time = time_policy(graph_policy, obs)
+        print(f"{num_envs:>10} {eager_time:>12.1f} {graph_time:>12.1f} {eager_time / graph_time:>8.2f}")
@@ -0,0 +1,94 @@
+"""Benchmark the PPO update of the depth CNN actor-critic in fp32 and mixed precision.
+
+.. code-block:: bash
+
+    python scripts/benchmarks/benchmark_ppo_amp.py --num_envs 1024 4096 --precisions fp32 bf16 fp16
+
+The rollout storage is filled with random observations of the go2 vision policy (proprioception and a depth image),
+and :meth:`PPO.update` is timed for each precision.
+"""
+
+import argparse
+import time
+
+import torch
+from rsl_rl.algorithms import PPO
+from rsl_rl.modules import ActorCriticDepthCNN
+
+parser = argparse.ArgumentParser(description="Benchmark the PPO update in mixed precision.")
+parser.add_argument("--num_envs", default=[1024, 4096], type=int, nargs="+", help="Batch sizes to benchmark.")
+parser.add_argument("--num_steps", default=24, type=int, help="Rollout length.")
+parser.add_argument("--num_prop", default=48, type=int, help="Proprioceptive observation dimension.")
+parser.add_argument("--depth_shape", default=[24, 32], type=int, nargs=2, help="Depth image shape.")
+parser.add_argument("--num_actions", default=12, type=int, help="Action dimension.")
+parser.add_argument("--precisions", default=["fp32", "bf16", "fp16"], type=str, nargs="+", help="Precisions to benchmark.")
+parser.add_argument("--fused_optimizer", action="store_true", default=False, help="Use the fused Adam kernel.")
+parser.add_argument("--num_iters", default=5, type=int, help="Number of timed updates.")
+parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu", type=str)
+args_cli = parser.parse_args()
+
+AMP_DTYPES = {"fp32": None, "bf16": "bfloat16", "fp16": "float16"}
+
+
+def create_ppo(num_envs, precision):
+    """Returns a PPO instance with a storage filled with a random rollout."""
+    num_obs = args_cli.num_prop + args_cli.depth_shape[0] * args_cli.depth_shape[1]
+    actor_critic = ActorCriticDepthCNN(
+        num_obs,
+        num_obs,
+        args_cli.num_actions,
+        num_actor_obs_prop=args_cli.num_prop,
+        obs_depth_shape=tuple(args_cli.depth_shape),
+    )
+    ppo = PPO(
+        actor_critic,
+        num_learning_epochs=5,
+        num_mini_batches=4,
+        amp=precision != "fp32",
+        amp_dtype=AMP_DTYPES[precision] or "bfloat16",
+        fused_optimizer=args_cli.fused_optimizer,
+        device=args_cli.device,
+    )
+    ppo.init_storage(num_envs, args_cli.num_steps, [num_obs], [num_obs], [args_cli.num_actions])
+    storage = ppo.storage
+    storage.observations.uniform_()
+    storage.privileged_observations.copy_(storage.observations)
+    storage.actions.normal_()
+    storage.values.normal_()
+    storage.returns.normal_()
+    storage.advantages.normal_()
+    storage.actions_log_prob.normal_()
+    storage.mu.normal_()
+    storage.sigma.fill_(1.0)
+    return ppo
+
+
+def time_update(ppo):
+    """Returns the mean duration of an update in milliseconds."""
+    # the storage is cleared by the update, but its contents are kept
+    ppo.update()
+    if args_cli.device.startswith("cuda"):
+        torch.cuda.synchronize()
+    start_time = time.perf_counter()
+    for _ in range(args_cli.num_iters):
+        ppo.update()
+    if args_cli.device.startswith("cuda"):
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start_time) / args_cli.num_iters * 1e3
+
+
+if __name__ == "__main__":
+    print(f"[INFO]: Device: {args_cli.device}")
+    print(f"{'num_envs':>10} {'precision':>10} {'update [ms]':>12} {'speedup':>8} {'value loss':>11}")
+    for num_envs in args_cli.num_envs:
+        reference_time = None
+        for precision in args_cli.precisions:
+            torch.manual_seed(0)
+            ppo = create_ppo(num_envs, precision)
+            update_time = time_update(ppo)
+            value_loss, _ = ppo.update()
+            reference_time = reference_time or update_time
+            print(
+                f"{num_envs:>10} {precision:>10} {update_time:>12.1f} {reference_time / update_time:>8.2f}"
+                f" {value_loss:>11.4f}"
+            )
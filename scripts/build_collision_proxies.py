@@ -0,0 +1,60 @@
+"""Build the simplified collision meshes of the Matterport scenes.
+
+.. code-block:: bash
+
+    python scripts/build_collision_proxies.py --scene_ids 5q7pvUzZiYa --tolerance 0.05
+
+The proxy of each scene is written next to its visual USD as ``<usd_dir>/<scene>/<scene>_collision.usd`` and is used
+by the Matterport importer for the physics.
+"""
+
+import argparse
+import os
+import time
+
+# omni-isaaclab
+from omni.isaac.lab.app import AppLauncher
+
+# add argparse arguments
+parser = argparse.ArgumentParser(description="Build the collision proxies of the Matterport scenes.")
+parser.add_argument("--scene_ids", default=None, type=str, nargs="+", help="Scenes to process. Defaults to all scenes.")
+parser.add_argument("--ply_dir", default=None, type=str, help="Directory with the matterport meshes <ply_dir>/<scene>/<scene>.ply.")
+parser.add_argument("--usd_dir", default=None, type=str, help="Directory with the matterport USDs <usd_dir>/<scene>/<scene>.usd.")
+parser.add_argument("--tolerance", default=0.05, type=float, help="Maximum deviation of the proxy from the mesh in meters.")
+parser.add_argument("--overwrite", action="store_true", default=False, help="Rebuild proxies that are newer than the mesh.")
+AppLauncher.add_app_launcher_args(parser)
+args_cli = parser.parse_args()
+args_cli.headless = True
+
+# launch omniverse app
+app_launcher = AppLauncher(args_cli)
+simulation_app = app_launcher.app
+
+from omni.isaac.matterport.domains.collision_proxy import build_collision_proxy, get_collision_proxy_path
+from omni.isaac.vlnce.utils import ASSETS_DIR
+
+
+if __name__ == "__main__":
+    ply_dir = args_cli.ply_dir if args_cli.ply_dir is not None else os.path.join(ASSETS_DIR, "matterport_ply")
+    usd_dir = args_cli.usd_dir if args_cli.usd_dir is not None else os.path.join(ASSETS_DIR, "matterport_usd")
+    scene_ids = args_cli.scene_ids if args_cli.scene_ids is not None else sorted(os.listdir(usd_dir))
+
+    for scene_id in scene_ids:
+        mesh_path = os.path.join(ply_dir, scene_id, f"{scene_id}.ply")
+        usd_path = os.path.join(usd_dir, scene_id, f"{scene_id}.usd")
+        proxy_path = get_collision_proxy_path(usd_path)
+        if not os.path.isfile(mesh_path) or not os.path.isfile(usd_path):
+            print(f"[WARN]: Mesh or USD of scene {scene_id} not found, skipping.")
+            continue
+        if not args_cli.overwrite and os.path.isfile(proxy_path) and os.path.getmtime(proxy_path) >= os.path.getmtime(mesh_path):
+            print(f"[INFO]: Collision proxy of scene {scene_id} exists, skipping.")
+            continue
+
+        start_time = time.time()
+        stats = build_collision_proxy(mesh_path, proxy_path, tolerance=args_cli.tolerance)
+        print(
+            f"[INFO]: Built collision proxy of scene {scene_id} in {time.time() - start_time:.1f}s:"
+            f" {stats['num_faces']} -> {stats['num_proxy_faces']} faces, max. deviation {stats['max_error']:.3f}m."
+        )
+
+    simulation_app.close()
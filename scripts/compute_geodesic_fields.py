@@ -0,0 +1,48 @@
+import argparse
+import os
+import time
+
+# omni-isaaclab
+from omni.isaac.lab.app import AppLauncher
+
+# add argparse arguments
+parser = argparse.ArgumentParser(description="Precompute the geodesic distance fields of the VLN-CE episodes.")
+parser.add_argument("--scene_ids", default=None, type=str, nargs="+", help="Scenes to process. Defaults to all scenes.")
+parser.add_argument("--ply_dir", default=None, type=str, help="Directory with the matterport meshes <ply_dir>/<scene>/<scene>.ply.")
+parser.add_argument("--field_dir", default=None, type=str, help="Output directory of the distance fields.")
+parser.add_argument("--resolution", default=0.1, type=float, help="Grid resolution in meters.")
+parser.add_argument("--overwrite", action="store_true", default=False, help="Recompute existing fields.")
+AppLauncher.add_app_launcher_args(parser)
+args_cli = parser.parse_args()
+args_cli.headless = True
+
+# launch omniverse app
+app_launcher = AppLauncher(args_cli)
+simulation_app = app_launcher.app
+
+from omni.isaac.vlnce.utils import ASSETS_DIR, load_episode_store
+from omni.isaac.vlnce.utils.geodesic import SceneRasterizer, get_field_file, get_floor_height_band
+
+
+if __name__ == "__main__":
+    episode_store = load_episode_store(os.path.join(ASSETS_DIR, "vln_ce_isaac_v1.json.gz"))
+    ply_dir = args_cli.ply_dir if args_cli.ply_dir is not None else os.path.join(ASSETS_DIR, "matterport_ply")
+    scene_ids = args_cli.scene_ids if args_cli.scene_ids is not None else episode_store.scene_ids
+
+    for scene_id in scene_ids:
+        episodes = episode_store.get_scene_episodes(scene_id)
+        if not args_cli.overwrite:
+            episodes = [episode for episode in episodes if not os.path.isfile(get_field_file(episode, args_cli.field_dir))]
+        if len(episodes) == 0:
+            print(f"[INFO]: All fields of scene {scene_id} exist, skipping.")
+            continue
+
+        start_time = time.time()
+        rasterizer = SceneRasterizer(os.path.join(ply_dir, scene_id, f"{scene_id}.ply"), resolution=args_cli.resolution)
+        for episode in episodes:
+            goal = episode["reference_path"][-1]
+            field = rasterizer.compute_field(goal, *get_floor_height_band(episode, rasterizer.step_height))
+            field.save(get_field_file(episode, args_cli.field_dir))
+        print(f"[INFO]: Computed {len(episodes)} fields of scene {scene_id} in {time.time() - start_time:.1f}s.")
+
+    simulation_app.close()
@@ -0,0 +1,58 @@
+import argparse
+import os
+import time
+
+# omni-isaaclab
+from omni.isaac.lab.app import AppLauncher
+
+# add argparse arguments
+parser = argparse.ArgumentParser(description="Precompute the traversability maps of the Matterport scenes.")
+parser.add_argument("--scene_ids", default=None, type=str, nargs="+", help="Scenes to process. Defaults to all scenes.")
+parser.add_argument("--ply_dir", default=None, type=str, help="Directory with the matterport meshes <ply_dir>/<scene>/<scene>.ply.")
+parser.add_argument("--map_dir", default=None, type=str, help="Output directory of the traversability maps.")
+parser.add_argument("--resolution", default=0.1, type=float, help="Grid resolution in meters.")
+parser.add_argument("--max_slope", default=30.0, type=float, help="Maximum floor slope in degrees.")
+parser.add_argument("--step_height", default=0.3, type=float, help="Maximum step height in meters.")
+parser.add_argument("--clearance_height", default=1.0, type=float, help="Free height above the floor in meters.")
+parser.add_argument("--overwrite", action="store_true", default=False, help="Recompute existing maps.")
+AppLauncher.add_app_launcher_args(parser)
+args_cli = parser.parse_args()
+args_cli.headless = True
+
+# launch omniverse app
+app_launcher = AppLauncher(args_cli)
+simulation_app = app_launcher.app
+
+import numpy as np
+
+from omni.isaac.vlnce.utils import ASSETS_DIR
+from omni.isaac.vlnce.utils.geodesic import SceneRasterizer
+from omni.isaac.vlnce.utils.traversability import compute_traversability_map, get_traversability_file
+
+
+if __name__ == "__main__":
+    ply_dir = args_cli.ply_dir if args_cli.ply_dir is not None else os.path.join(ASSETS_DIR, "matterport_ply")
+    scene_ids = args_cli.scene_ids if args_cli.scene_ids is not None else sorted(os.listdir(ply_dir))
+
+    for scene_id in scene_ids:
+        map_file = get_traversability_file(scene_id, args_cli.map_dir)
+        if not args_cli.overwrite and os.path.isfile(map_file):
+            print(f"[INFO]: Traversability map of scene {scene_id} exists, skipping.")
+            continue
+
+        start_time = time.time()
+        rasterizer = SceneRasterizer(
+            os.path.join(ply_dir, scene_id, f"{scene_id}.ply"),
+            resolution=args_cli.resolution,
+            max_slope=np.deg2rad(args_cli.max_slope),
+            step_height=args_cli.step_height,
+            clearance_height=args_cli.clearance_height,
+        )
+        traversability = compute_traversability_map(rasterizer)
+        traversability.save(map_file)
+        print(
+            f"[INFO]: Computed traversability map of scene {scene_id} with {traversability.num_layers} layers and"
+            f" {traversability.traversable.sum()} free cells in {time.time() - start_time:.1f}s."
+        )
+
+    simulation_app.close()
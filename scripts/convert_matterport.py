@@ -0,0 +1,61 @@
+"""Convert the Matterport ``.obj`` meshes of all scenes to ``.usd`` without the GUI.
+
+.. code-block:: bash
+
+    python scripts/convert_matterport.py --matterport_dir <path>/v1/scans --num_workers 4
+
+Scenes whose ``.usd`` is newer than the ``.obj`` are skipped, such that an interrupted run can be restarted. Timings
+and file sizes of each scene are written to ``<usd_dir>/conversion_manifest.json``.
+"""
+
+import argparse
+import asyncio
+import os
+
+# omni-isaaclab
+from omni.isaac.lab.app import AppLauncher
+
+# add argparse arguments
+parser = argparse.ArgumentParser(description="Convert the Matterport meshes to USD.")
+parser.add_argument("--matterport_dir", required=True, type=str, help="Directory with the scenes <scene>/matterport_mesh/<id>/<id>.obj.")
+parser.add_argument("--usd_dir", default=None, type=str, help="Output directory <usd_dir>/<scene>/<scene>.usd.")
+parser.add_argument("--scene_ids", default=None, type=str, nargs="+", help="Scenes to convert. Defaults to all scenes.")
+parser.add_argument("--num_workers", default=4, type=int, help="Maximum number of concurrent conversions.")
+parser.add_argument("--manifest", default=None, type=str, help="Manifest file. Defaults to <usd_dir>/conversion_manifest.json.")
+parser.add_argument("--overwrite", action="store_true", default=False, help="Convert scenes whose USD is up to date.")
+AppLauncher.add_app_launcher_args(parser)
+args_cli = parser.parse_args()
+args_cli.headless = True
+
+# launch omniverse app
+app_launcher = AppLauncher(args_cli)
+simulation_app = app_launcher.app
+
+from omni.isaac.matterport.config.importer_cfg import asset_converter_cfg
+from omni.isaac.matterport.domains.usd_conversion import convert_scenes, find_conversion_jobs
+from omni.isaac.vlnce.utils import ASSETS_DIR
+
+
+if __name__ == "__main__":
+    usd_dir = args_cli.usd_dir if args_cli.usd_dir is not None else os.path.join(ASSETS_DIR, "matterport_usd")
+    manifest_path = args_cli.manifest if args_cli.manifest is not None else os.path.join(usd_dir, "conversion_manifest.json")
+
+    jobs = find_conversion_jobs(args_cli.matterport_dir, usd_dir, args_cli.scene_ids)
+    print(f"[INFO]: Found {len(jobs)} scenes in {args_cli.matterport_dir}.")
+
+    # the converter tasks only progress while the app is updated
+    task = asyncio.ensure_future(
+        convert_scenes(jobs, asset_converter_cfg, args_cli.num_workers, manifest_path, args_cli.overwrite)
+    )
+    while not task.done():
+        simulation_app.update()
+    records = task.result()
+
+    num_failed = sum(record.status == "failed" for record in records)
+    num_converted = sum(record.status == "converted" for record in records)
+    print(
+        f"[INFO]: Converted {num_converted}, skipped {len(records) - num_converted - num_failed}, failed {num_failed}"
+        f" scenes. Manifest: {manifest_path}"
+    )
+
+    simulation_app.close()
@@ -3,7 +3,8 @@ import os
 import cv2
 import time
 import math
-import gzip, json
+import json
+import threading
 import numpy as np
 
 # omni-isaaclab
@@ -14,6 +15,10 @@ import cli_args
 # add argparse arguments
 parser = argparse.ArgumentParser(description="This script demonstrates how to collect data from the matterport dataset.")
 parser.add_argument("--episode_index", default=0, type=int, help="Episode index.")
+parser.add_argument("--episode_indices", default=None, type=int, nargs="+", help="Episode indices to evaluate in one run.")
+parser.add_argument("--scene_ids", default=None, type=str, nargs="+", help="Evaluate all episodes of these scenes.")
+parser.add_argument("--max_episodes_per_scene", default=None, type=int, help="Maximum number of episodes per scene.")
+parser.add_argument("--results_file", default=None, type=str, help="File to append per-episode measurements (jsonl).")
 
 parser.add_argument("--task", type=str, default="go2_matterport", help="Name of the task.")
 parser.add_argument("--num_envs", type=int, default=1, help="Number of environments to simulate.")
@@ -24,6 +29,11 @@ parser.add_argument("--history_length", default=0, type=int, help="Length of his
 parser.add_argument("--use_cnn", action="store_true", default=None, help="Name of the run folder to resume from.")
 parser.add_argument("--arm_fixed", action="store_true", default=False, help="Fix the robot's arms.")
 parser.add_argument("--use_rnn", action="store_true", default=False, help="Use RNN in the actor-critic model.")
+parser.add_argument("--high_level_decimation", type=int, default=None, help="Env steps per camera frame (0: only on request).")
+parser.add_argument("--use_cuda_graph", action="store_true", default=False, help="Replay the low-level policy as CUDA graph.")
+parser.add_argument("--frames_dir", default=None, type=str, help="Directory to save the rgb frames of the high-level loop.")
+parser.add_argument("--prefetch_scenes", default=1, type=int, help="Number of upcoming scenes to prefetch (0: disabled).")
+parser.add_argument("--scene_cache_dir", default=None, type=str, help="Local directory to cache the prefetched scenes in.")
 
 cli_args.add_rsl_rl_args(parser)
 AppLauncher.add_app_launcher_args(parser)
@@ -36,6 +46,7 @@ app_launcher = AppLauncher(args_cli)
 simulation_app = app_launcher.app
 
 import omni.isaac.core.utils.prims as prim_utils
+import omni.isaac.core.utils.stage as stage_utils
 import torch
 from omni.isaac.core.objects import VisualCuboid
 
@@ -52,8 +63,10 @@ from omni.isaac.lab_tasks.utils.wrappers.rsl_rl import (
     RslRlVecEnvWrapper,
 )
 
+from omni.isaac.matterport.domains import MESH_REGISTRY
 from omni.isaac.vlnce.config import *
-from omni.isaac.vlnce.utils import ASSETS_DIR, RslRlVecEnvHistoryWrapper, VLNEnvWrapper
+from omni.isaac.vlnce.utils import ASSETS_DIR, FrameExporter, RslRlVecEnvHistoryWrapper, ScenePrefetcher, VLNBatchEnvWrapper, VLNEnvWrapper, load_episode_store
+from omni.isaac.vlnce.utils.wrappers import get_start_height_offset
 
 
 def quat2eulers(q0, q1, q2, q3):
@@ -94,15 +107,31 @@ class Planner:
         self.identity_quat = torch.tensor([1.0, 0.0, 0.0, 0.0], device=self.env.unwrapped.device).repeat(1, 1)
         self.data_npy = []
 
-        for i in range(self.env_cfg.expert_path_length):
-            expert_point_visualizer = VisualizationMarkers(self.marker_cfg)
-            expert_point_visualizer.set_visibility(True)
-
-            point = np.array(self.env_cfg.expert_path[i]).reshape(1, 3)
-            default_scale = expert_point_visualizer.cfg.markers["cuboid"].scale
-            # import ipdb; ipdb.set_trace()
-            larger_scale = 2.0*torch.tensor(default_scale, device=self.env.unwrapped.device).repeat(1, 1)
-            expert_point_visualizer.visualize(point, self.identity_quat,larger_scale)
+        # one marker instance per expert waypoint, re-used across episodes of the same scene
+        self.expert_path_visualizer = VisualizationMarkers(self.marker_cfg)
+        self.expert_path_visualizer.set_visibility(True)
+        self.visualize_expert_path()
+
+        # rgb frames are copied to the host asynchronously and consumed by a separate thread
+        self.frame_exporter = None
+        if self.args_cli.frames_dir is not None:
+            self.frame_exporter = FrameExporter(device=self.env.unwrapped.device, rotation=-1, dtype=torch.uint8)
+            self.frame_writer = threading.Thread(target=save_frames, args=(self.frame_exporter, self.args_cli.frames_dir), daemon=True)
+            self.frame_writer.start()
+
+    def close(self):
+        """Write the remaining frames and stop the frame writer."""
+        if self.frame_exporter is not None:
+            self.frame_exporter.close()
+            self.frame_writer.join()
+            self.frame_exporter = None
+
+    def visualize_expert_path(self):
+        """Visualize the expert path of the current episode."""
+        points = np.array(self.env_cfg.expert_path).reshape(-1, 3)
+        default_scale = self.expert_path_visualizer.cfg.markers["cuboid"].scale
+        larger_scale = 2.0*torch.tensor(default_scale, device=self.env.unwrapped.device).repeat(len(points), 1)
+        self.expert_path_visualizer.visualize(points, self.identity_quat.repeat(len(points), 1), larger_scale)
 
     def pid_control(self, current_position, target_position, error_sum, prev_error, dt=0.2, Kp=0.5, Ki=0.00, Kd=0.000):
         """PID controller to compute velocity correction."""
@@ -124,6 +153,9 @@ class Planner:
     def start_loop(self):
         """Start the simulation loop."""
 
+        # Reset the environment, which places the robot at the start of the episode
+        obs, infos = self.env.reset()
+
         # Set the camera view
         robot_pos_w = self.env.unwrapped.scene["robot"].data.root_pos_w[0].detach().cpu().numpy()
         robot_quat_w = self.env.unwrapped.scene["robot"].data.root_quat_w[0].detach().cpu().numpy()
@@ -132,9 +164,6 @@ class Planner:
         cam_target = (robot_pos_w[0], robot_pos_w[1], robot_pos_w[2])
         self.env.unwrapped.sim.set_camera_view(eye=cam_eye, target=cam_target)
 
-        # Reset the environment and apply zero velocity command
-        obs, infos = self.env.reset()
-
         # Simulate physics
         start_it = 1
         it = 1
@@ -157,12 +186,9 @@ class Planner:
         reached_goal_time = 0
 
         while self.simulation_app.is_running(): # 20hz
-            # Save depth image
-            rgb_image = infos['observations']['camera_obs'][0,:,:,:3].clone().detach()
-            # save_path_rgb = os.path.join(os.getcwd(), "rgb_image"+str(it-start_it)+".png")
-            rgb_image_np = rgb_image.cpu().numpy()
-            rgb_image_np = cv2.rotate(rgb_image_np, cv2.ROTATE_90_CLOCKWISE)
-            proprio_go2 = infos['observations']['policy'].clone().detach().cpu().numpy()
+            # Export the rgb image without waiting for the copy, cached frames of the lazy camera group are skipped
+            if self.frame_exporter is not None and self.env.is_frame_updated():
+                self.frame_exporter.submit(infos['observations']['camera_obs'][0,:,:,:3], step=f"{self.env.episode['episode_id']}_{it-start_it}")
 
             robot_pos_w = self.env.unwrapped.scene["robot"].data.root_pos_w[0].detach().cpu().numpy()
             
@@ -178,7 +204,7 @@ class Planner:
             # print("robot orientation: ", robot_ori_full_rpy)
             if abs(robot_ori_full_rpy[0].numpy()) > 0.6 or abs(robot_ori_full_rpy[1].numpy()) > 0.6:
                 print("Large orientation: ", robot_ori_full_rpy[0], " ", robot_ori_full_rpy[1])
-                return
+                return self.env.get_measurements_cpu()
             
             self.robot_yaw_angle = math_utils.euler_xyz_from_quat(robot_yaw_quat)[2].numpy() - self.init_yaw_angle
             robot_yaw_w = math_utils.euler_xyz_from_quat(robot_yaw_quat)[2].numpy()
@@ -230,7 +256,11 @@ class Planner:
             start_t = time.time()
             it += 1
             sim_t += planner_dt
-            self.expert_vel_idx = min(int(sim_t / self.traj_dt), env_cfg.expert_path_length - 1)
+            expert_vel_idx = min(int(sim_t / self.traj_dt), env_cfg.expert_path_length - 1)
+            if expert_vel_idx != self.expert_vel_idx:
+                # take a new frame when the planner moves on to the next waypoint
+                self.env.request_frame()
+            self.expert_vel_idx = expert_vel_idx
 
             if np.linalg.norm(robot_pos_w[:2] - env_cfg.expert_path[-1][:2]) < 0.5:
                 reached_goal = True
@@ -243,95 +273,314 @@ class Planner:
                 break
         
         # Print measurements
+        measurements = self.env.get_measurements_cpu()
         print("\n============================== Episode Measurements ==============================")
-        for key, value in infos["measurements"].items():
+        for key, value in measurements.items():
             print(f"{key}: {value}")
 
+        return measurements
 
-if __name__ == "__main__":
-    # parse configuration
-    env_cfg = parse_env_cfg(args_cli.task, num_envs=args_cli.num_envs)
-    vel_command = torch.tensor([0, 0, 0])
 
-    episode_idx = args_cli.episode_index
-    dataset_file_name = os.path.join(ASSETS_DIR, "vln_ce_isaac_v1.json.gz")
-    # scene_id = None
-    with gzip.open(dataset_file_name, "rt") as f:
-        deserialized = json.loads(f.read())
-        episode = deserialized["episodes"][episode_idx]
-        if "go2" in args_cli.task:
-            env_cfg.scene.robot.init_state.pos = (episode["start_position"][0], episode["start_position"][1], episode["start_position"][2]+0.4)
-        elif "h1" in args_cli.task:
-            env_cfg.scene.robot.init_state.pos = (episode["start_position"][0], episode["start_position"][1], episode["start_position"][2]+1.0)
-        else:
-            env_cfg.scene.robot.init_state.pos = (episode["start_position"][0], episode["start_position"][1], episode["start_position"][2]+0.5)
-
-        env_cfg.scene.disk_1.init_state.pos = (episode["start_position"][0], episode["start_position"][1], episode["start_position"][2]+2.5)
-        env_cfg.scene.disk_2.init_state.pos = (episode["reference_path"][-1][0], episode["reference_path"][-1][1], episode["reference_path"][-1][2]+2.5)
-        wxyz_rot = episode["start_rotation"]
-        init_rot = wxyz_rot
-        # habitat2isaacsim_rot=math_utils.quat_from_euler_xyz(torch.tensor(0),torch.tensor(0),torch.tensor(0))
-        # wxyz_rot = torch.tensor([episode["start_rotation"][3], episode["start_rotation"][0], episode["start_rotation"][1], episode["start_rotation"][2]])
-        # convert from quaternion to euler angles
-        # init_rot = math_utils.euler_xyz_from_quat(wxyz_rot)
-        # euler_y_rotation = math_utils.euler_xyz_from_quat(wxyz_rot.unsqueeze(0))[1]
-        # init_rot = math_utils.quat_from_euler_xyz(torch.tensor(0),torch.tensor(0),torch.tensor(euler_y_rotation))[0,:]
-        # init_rot = episode["start_rotation"]
-        # init_rot = [1.0,0.0,0.0,0.0]
-        # init_rot=(init_rot[3], init_rot[0], init_rot[1], init_rot[2])
-        env_cfg.scene.robot.init_state.rot = (init_rot[0], init_rot[1], init_rot[2], init_rot[3])
-        # import ipdb; ipdb.set_trace()
-        env_cfg.goals = episode["goals"]
-        env_cfg.episode_id = episode["episode_id"]
-        env_cfg.scene_id = episode["scene_id"].split('/')[1]
-        env_cfg.traj_id = episode["trajectory_id"]
-        env_cfg.instruction_text = episode["instruction"]["instruction_text"]
-        env_cfg.instruction_tokens = episode["instruction"]["instruction_tokens"]
-        env_cfg.reference_path = np.array(episode["reference_path"])
-        expert_locations = np.array(episode["gt_locations"])
-        # expert_locations=expert_locations[:,[0,2,1]]
-        # expert_locations[:,1] = -expert_locations[:,1]
-        # import ipdb; ipdb.set_trace()
-        env_cfg.expert_path = expert_locations
-        env_cfg.expert_path_length = len(env_cfg.expert_path)
-        env_cfg.expert_time = np.arange(env_cfg.expert_path_length)*1.0
-    # scene_id = "1LXtFkjw3qL"
-
-    udf_file = os.path.join(ASSETS_DIR, f"matterport_usd/{env_cfg.scene_id}/{env_cfg.scene_id}.usd")
-    if os.path.exists(udf_file):
-        env_cfg.scene.terrain.obj_filepath = udf_file
-    else:
-        raise ValueError(f"No USD file found in scene directory: {udf_file}")  
+class BatchPlanner:
+    """Expert path follower for :class:`VLNBatchEnvWrapper`, which evaluates one episode per environment.
 
-    print("scene_id: ", env_cfg.scene_id)
-    print("robot_init_pos: ", env_cfg.scene.robot.init_state.pos)
-    
-    # initialize environment and low-level policy
-    env = gym.make(args_cli.task, cfg=env_cfg, render_mode=None)
+    Same controller as :class:`Planner`, computed for all environments at once.
+    """
+
+    def __init__(self, env: VLNBatchEnvWrapper, env_cfg, simulation_app):
+        self.env = env
+        self.env_cfg = env_cfg
+        self.simulation_app = simulation_app
+        self.device = self.env.unwrapped.device
+        self.num_envs = self.env.num_envs
+
+        self.planner_dt = self.env_cfg.decimation * self.env_cfg.sim.dt
+        self.traj_dt = 1.0
+
+        self.sim_t = torch.zeros(self.num_envs, device=self.device)
+        self.reached_goal_time = torch.zeros(self.num_envs, dtype=torch.long, device=self.device)
+        self.expert_paths = torch.zeros(self.num_envs, 1, 3, device=self.device)
+        self.expert_path_lengths = torch.ones(self.num_envs, dtype=torch.long, device=self.device)
+
+    def set_expert_paths(self, env_ids):
+        """Load the expert paths of the episodes newly assigned to the given envs."""
+        for env_id in env_ids:
+            path = torch.tensor(np.asarray(self.env.episodes[env_id]["gt_locations"]), dtype=torch.float, device=self.device)
+            if len(path) > self.expert_paths.shape[1]:
+                # pad all paths to the longest one
+                padding = self.expert_paths[:, -1:].repeat(1, len(path) - self.expert_paths.shape[1], 1)
+                self.expert_paths = torch.cat([self.expert_paths, padding], dim=1)
+            self.expert_paths[env_id, :len(path)] = path
+            self.expert_paths[env_id, len(path):] = path[-1]
+            self.expert_path_lengths[env_id] = len(path)
+            self.sim_t[env_id] = 0.0
+            self.reached_goal_time[env_id] = 0
+
+    def compute_command(self):
+        """Compute the velocity commands of all envs from their expert paths."""
+        robot = self.env.unwrapped.scene["robot"]
+        robot_pos_w = robot.data.root_pos_w
+        robot_yaw_quat = math_utils.yaw_quat(robot.data.root_quat_w)
+        robot_yaw_w = math_utils.euler_xyz_from_quat(robot_yaw_quat)[2]
+
+        env_ids = torch.arange(self.num_envs, device=self.device)
+        expert_idx = torch.minimum((self.sim_t / self.traj_dt).long(), self.expert_path_lengths - 1)
+        next_idx = torch.minimum(expert_idx + 1, self.expert_path_lengths - 1)
+        expert_pos = self.expert_paths[env_ids, expert_idx]
+        next_pos = self.expert_paths[env_ids, next_idx]
+
+        expert_pos_body_frame = math_utils.quat_rotate_inverse(robot_yaw_quat, expert_pos - robot_pos_w)
+        vel_command = torch.zeros(self.num_envs, 3, device=self.device)
+        vel_command[:, 0] = torch.clamp(0.5 * expert_pos_body_frame[:, 0], min=0.0, max=0.5)
+
+        delta_position = next_pos - expert_pos
+        target_yaw = torch.atan2(delta_position[:, 1], delta_position[:, 0])
+        yaw_diff = math_utils.wrap_to_pi(target_yaw - robot_yaw_w)
+        vel_command[:, 2] = torch.clamp(0.1 * yaw_diff / self.planner_dt, -0.5, 0.5)
+        return vel_command
+
+    def check_large_orientation(self):
+        """Returns which robots have a roll or pitch above the threshold, e.g. because they fell over."""
+        roll, pitch, _ = math_utils.euler_xyz_from_quat(self.env.unwrapped.scene["robot"].data.root_quat_w)
+        return (math_utils.wrap_to_pi(roll).abs() > 0.6) | (math_utils.wrap_to_pi(pitch).abs() > 0.6)
 
-    if args_cli.history_length > 0:
-        env = RslRlVecEnvHistoryWrapper(env, history_length=args_cli.history_length)
+    def start_loop(self):
+        """Evaluate all episodes of the wrapper's episode queue.
+
+        Returns:
+            The finished episodes with their measurements, see :meth:`VLNBatchEnvWrapper.step`.
+        """
+        obs, infos = self.env.reset()
+        self.set_expert_paths(infos["started_env_ids"])
+
+        finished_episodes = []
+        while self.simulation_app.is_running() and not self.env.is_finished:
+            vel_command = self.compute_command()
+            self.env.set_stop_called(self.reached_goal_time >= 10)
+            self.env.end_episodes(self.check_large_orientation())
+            obs, _, done, infos = self.env.step(vel_command)
+
+            for result in infos["finished_episodes"]:
+                print(f"[INFO]: Episode {result['episode']['episode_id']} in env {result['env_id']} done: {result['measurements']}")
+            finished_episodes += infos["finished_episodes"]
+            self.set_expert_paths(infos["started_env_ids"])
+
+            self.sim_t += self.planner_dt
+            robot_pos_w = self.env.unwrapped.scene["robot"].data.root_pos_w
+            goal_pos = self.expert_paths[torch.arange(self.num_envs, device=self.device), self.expert_path_lengths - 1]
+            reached_goal = torch.norm(robot_pos_w[:, :2] - goal_pos[:, :2], dim=1) < 0.5
+            self.reached_goal_time = torch.where(reached_goal, self.reached_goal_time + 1, torch.zeros_like(self.reached_goal_time))
+
+        return finished_episodes
+
+
+def save_frames(frame_exporter: FrameExporter, frames_dir: str):
+    """Write the frames of the exporter to disk until the exporter is closed."""
+    os.makedirs(frames_dir, exist_ok=True)
+    while (frame := frame_exporter.get()) is not None:
+        with frame:
+            image_bgr = cv2.cvtColor(frame.image, cv2.COLOR_RGB2BGR)
+            cv2.imwrite(os.path.join(frames_dir, f"rgb_image{frame.step}.png"), image_bgr)
+
+
+def configure_episode(env_cfg, episode, task_name):
+    """Write the episode information into the environment configuration."""
+    height_offset = get_start_height_offset(task_name)
+    env_cfg.scene.robot.init_state.pos = (episode["start_position"][0], episode["start_position"][1], episode["start_position"][2]+height_offset)
+
+    env_cfg.scene.disk_1.init_state.pos = (episode["start_position"][0], episode["start_position"][1], episode["start_position"][2]+2.5)
+    env_cfg.scene.disk_2.init_state.pos = (episode["reference_path"][-1][0], episode["reference_path"][-1][1], episode["reference_path"][-1][2]+2.5)
+    wxyz_rot = episode["start_rotation"]
+    init_rot = wxyz_rot
+    # habitat2isaacsim_rot=math_utils.quat_from_euler_xyz(torch.tensor(0),torch.tensor(0),torch.tensor(0))
+    # wxyz_rot = torch.tensor([episode["start_rotation"][3], episode["start_rotation"][0], episode["start_rotation"][1], episode["start_rotation"][2]])
+    # convert from quaternion to euler angles
+    # init_rot = math_utils.euler_xyz_from_quat(wxyz_rot)
+    # euler_y_rotation = math_utils.euler_xyz_from_quat(wxyz_rot.unsqueeze(0))[1]
+    # init_rot = math_utils.quat_from_euler_xyz(torch.tensor(0),torch.tensor(0),torch.tensor(euler_y_rotation))[0,:]
+    # init_rot = episode["start_rotation"]
+    # init_rot = [1.0,0.0,0.0,0.0]
+    # init_rot=(init_rot[3], init_rot[0], init_rot[1], init_rot[2])
+    env_cfg.scene.robot.init_state.rot = (init_rot[0], init_rot[1], init_rot[2], init_rot[3])
+    env_cfg.goals = episode["goals"]
+    env_cfg.episode_id = episode["episode_id"]
+    env_cfg.scene_id = episode["scene_id"].split('/')[1]
+    env_cfg.traj_id = episode["trajectory_id"]
+    env_cfg.instruction_text = episode["instruction"]["instruction_text"]
+    env_cfg.instruction_tokens = episode["instruction"]["instruction_tokens"]
+    env_cfg.reference_path = np.array(episode["reference_path"])
+    expert_locations = np.array(episode["gt_locations"])
+    # expert_locations=expert_locations[:,[0,2,1]]
+    # expert_locations[:,1] = -expert_locations[:,1]
+    env_cfg.expert_path = expert_locations
+    env_cfg.expert_path_length = len(env_cfg.expert_path)
+    env_cfg.expert_time = np.arange(env_cfg.expert_path_length)*1.0
+
+
+def place_episode(env, episode, task_name):
+    """Move the robot and the lights of an already created environment to the start of a new episode.
+
+    The robot is placed through its default root state, which is applied by the reset event on the next
+    environment reset. This avoids re-creating the environment (and re-loading the scene) for each episode.
+    """
+    scene = env.unwrapped.scene
+    device = env.unwrapped.device
+
+    start_pos = torch.tensor(episode["start_position"], dtype=torch.float, device=device)
+    goal_pos = torch.tensor(episode["reference_path"][-1], dtype=torch.float, device=device)
+    up = torch.tensor([0.0, 0.0, 1.0], device=device)
+
+    robot = scene["robot"]
+    robot.data.default_root_state[:, :3] = start_pos + get_start_height_offset(task_name) * up
+    robot.data.default_root_state[:, 3:7] = torch.tensor(episode["start_rotation"], dtype=torch.float, device=device)
+    robot.data.default_root_state[:, 7:] = 0.0
+
+    scene.extras["disk_1"].set_world_poses(positions=(start_pos + 2.5 * up).unsqueeze(0))
+    scene.extras["disk_2"].set_world_poses(positions=(goal_pos + 2.5 * up).unsqueeze(0))
+
+
+def select_episodes(episode_store, args_cli):
+    """Select the episode indices to evaluate, grouped by scene.
+
+    Returns:
+        A dictionary mapping each scene to the episode indices evaluated in it (in order of evaluation).
+    """
+    if args_cli.scene_ids is not None:
+        episode_indices = []
+        for scene_id in args_cli.scene_ids:
+            episode_indices += episode_store.get_scene_indices(scene_id)
+    elif args_cli.episode_indices is not None:
+        episode_indices = args_cli.episode_indices
     else:
-        env = RslRlVecEnvWrapper(env)
-    
-    agent_cfg: RslRlOnPolicyRunnerCfg = cli_args.parse_rsl_rl_cfg(args_cli.task, args_cli)
+        episode_indices = [args_cli.episode_index]
+
+    scene_episodes = {}
+    for episode_idx in episode_indices:
+        scene_id = episode_store[episode_idx]["scene_id"].split('/')[1]
+        scene_episodes.setdefault(scene_id, []).append(episode_idx)
+    if args_cli.max_episodes_per_scene is not None:
+        scene_episodes = {scene_id: indices[:args_cli.max_episodes_per_scene] for scene_id, indices in scene_episodes.items()}
+    return scene_episodes
+
+
+def write_results(results_file, episode_idx, episode, measurements, eval_time):
+    """Append the measurements of an episode to the results file."""
+    if results_file is None:
+        return
+    result = {
+        "episode_index": episode_idx,
+        "episode_id": episode["episode_id"],
+        "scene_id": episode["scene_id"].split('/')[1],
+        "eval_time": eval_time,
+        "measurements": {key: float(value) for key, value in measurements.items()},
+    }
+    results_file.write(json.dumps(result) + "\n")
+    results_file.flush()
 
-    log_root_path = os.path.join(os.path.dirname(__file__),"../logs", "rsl_rl", agent_cfg.experiment_name)
-    log_root_path = os.path.abspath(log_root_path)
-    # import pdb; pdb.set_trace()
-    resume_path = get_checkpoint_path(log_root_path, args_cli.load_run, agent_cfg.load_checkpoint)
 
-    ppo_runner = OnPolicyRunner(env, agent_cfg.to_dict(), log_dir=None, device=agent_cfg.device)  # Adjust device as needed
-    ppo_runner.load(resume_path)
+if __name__ == "__main__":
+    dataset_file_name = os.path.join(ASSETS_DIR, "vln_ce_isaac_v1.json.gz")
+    # only the requested episodes are read from the (once converted) episode store
+    episode_store = load_episode_store(dataset_file_name)
+    scene_episodes = select_episodes(episode_store, args_cli)
+
+    results_file = open(args_cli.results_file, "a") if args_cli.results_file is not None else None
+    low_level_policy = None
+    # read the assets of the next scenes while the current scene is evaluated
+    scene_prefetcher = None
+    if args_cli.prefetch_scenes > 0 and len(scene_episodes) > 1:
+        scene_prefetcher = ScenePrefetcher(list(scene_episodes), cache_dir=args_cli.scene_cache_dir,
+                                           lookahead=args_cli.prefetch_scenes)
+
+    # each scene is loaded once and all of its episodes are evaluated in the same environment
+    for scene_count, (scene_id, episode_indices) in enumerate(scene_episodes.items()):
+        if not simulation_app.is_running():
+            break
+        if scene_count > 0:
+            # start from an empty stage for the next scene
+            stage_utils.create_new_stage()
+
+        # parse configuration
+        env_cfg = parse_env_cfg(args_cli.task, num_envs=args_cli.num_envs)
+        episode = episode_store[episode_indices[0]]
+        configure_episode(env_cfg, episode, args_cli.task)
+        if args_cli.high_level_decimation is not None:
+            env_cfg.high_level_decimation = args_cli.high_level_decimation
+
+        assets_dir = scene_prefetcher.get_scene(scene_id) if scene_prefetcher is not None else ASSETS_DIR
+        udf_file = os.path.join(assets_dir, f"matterport_usd/{env_cfg.scene_id}/{env_cfg.scene_id}.usd")
+        if os.path.exists(udf_file):
+            env_cfg.scene.terrain.obj_filepath = udf_file
+        else:
+            raise ValueError(f"No USD file found in scene directory: {udf_file}")
 
-    low_level_policy = ppo_runner.get_inference_policy(device=env.unwrapped.device)
+        print("scene_id: ", env_cfg.scene_id)
+        print("robot_init_pos: ", env_cfg.scene.robot.init_state.pos)
 
-    all_measures = ["PathLength", "DistanceToGoal", "Success", "SPL", "OracleNavigationError", "OracleSuccess"]
-    env = VLNEnvWrapper(env, low_level_policy, args_cli.task, episode, high_level_obs_key="camera_obs",
-                        measure_names=all_measures)
+        # initialize environment and low-level policy
+        env = gym.make(args_cli.task, cfg=env_cfg, render_mode=None)
 
-    planner = Planner(env, env_cfg, args_cli, simulation_app)
-    planner.start_loop()
+        if args_cli.history_length > 0:
+            env = RslRlVecEnvHistoryWrapper(env, history_length=args_cli.history_length)
+        else:
+            env = RslRlVecEnvWrapper(env)
+
+        if low_level_policy is None:
+            agent_cfg: RslRlOnPolicyRunnerCfg = cli_args.parse_rsl_rl_cfg(args_cli.task, args_cli)
+
+            log_root_path = os.path.join(os.path.dirname(__file__),"../logs", "rsl_rl", agent_cfg.experiment_name)
+            log_root_path = os.path.abspath(log_root_path)
+            resume_path = get_checkpoint_path(log_root_path, args_cli.load_run, agent_cfg.load_checkpoint)
+
+            ppo_runner = OnPolicyRunner(env, agent_cfg.to_dict(), log_dir=None, device=agent_cfg.device)  # Adjust device as needed
+            ppo_runner.load(resume_path)
+
+            low_level_policy = ppo_runner.get_inference_policy(device=env.unwrapped.device, use_cuda_graph=args_cli.use_cuda_graph)
+
+        all_measures = ["PathLength", "DistanceToGoal", "Success", "SPL", "OracleNavigationError", "OracleSuccess"]
+        if args_cli.num_envs > 1:
+            # evaluate the episodes of the scene in parallel, one episode per environment
+            episodes = [episode_store[episode_idx] for episode_idx in episode_indices]
+            env = VLNBatchEnvWrapper(env, low_level_policy, args_cli.task, episodes, high_level_obs_key="camera_obs",
+                                     measure_names=all_measures)
+            planner = BatchPlanner(env, env_cfg, simulation_app)
+            for result in planner.start_loop():
+                episode = result["episode"]
+                write_results(results_file, episode_store.get_index(episode["episode_id"]), episode,
+                              result["measurements"], result["eval_time"])
+            env.close()
+            # free the meshes of the closed scene on the device
+            MESH_REGISTRY.evict_unused()
+            continue
+
+        env = VLNEnvWrapper(env, low_level_policy, args_cli.task, episode, high_level_obs_key="camera_obs",
+                            measure_names=all_measures)
+
+        planner = Planner(env, env_cfg, args_cli, simulation_app)
+        for episode_count, episode_idx in enumerate(episode_indices):
+            if not simulation_app.is_running():
+                break
+            if episode_count > 0:
+                episode = episode_store[episode_idx]
+                configure_episode(env_cfg, episode, args_cli.task)
+                place_episode(env, episode, args_cli.task)
+                env.set_episode(episode)
+                planner.visualize_expert_path()
+
+            print(f"[INFO]: Evaluating episode {episode_idx} ({episode_count + 1}/{len(episode_indices)}) in scene {scene_id}")
+            start_time = time.time()
+            measurements = planner.start_loop()
+            write_results(results_file, episode_idx, episode, measurements, time.time() - start_time)
+
+        planner.close()
+        env.close()
+        MESH_REGISTRY.evict_unused()
+
+    if scene_prefetcher is not None:
+        print(f"[INFO]: {scene_prefetcher}")
+        scene_prefetcher.close()
+    if results_file is not None:
+        results_file.close()
     # Close the simulator
     simulation_app.close()
-    print("closed!!!")
\ No newline at end of file
+    print("closed!!!")
@@ -29,6 +29,10 @@ class PPO:
         use_clipped_value_loss=True,
         schedule="fixed",
         desired_kl=0.01,
+        packed_storage=False,
+        amp=False,
+        amp_dtype="bfloat16",
+        fused_optimizer=False,
         device="cpu",
     ):
         self.device = device
@@ -41,7 +45,14 @@ class PPO:
         self.actor_critic = actor_critic
         self.actor_critic.to(self.device)
         self.storage = None  # initialized later
-        self.optimizer = optim.Adam(self.actor_critic.parameters(), lr=learning_rate)
+        self.parameters = list(self.actor_critic.parameters())
+        # Adam and the gradient norm use the multi-tensor kernels, which process all parameters in a few launches, or
+        # the fused Adam kernel, which updates all parameters in one launch. Both are only available on CUDA.
+        self.foreach = torch.device(device).type == "cuda"
+        if fused_optimizer and self.foreach:
+            self.optimizer = optim.Adam(self.parameters, lr=learning_rate, fused=True)
+        else:
+            self.optimizer = optim.Adam(self.parameters, lr=learning_rate, foreach=self.foreach)
         self.transition = RolloutStorage.Transition()
 
         # PPO parameters
@@ -54,10 +65,27 @@ class PPO:
         self.lam = lam
         self.max_grad_norm = max_grad_norm
         self.use_clipped_value_loss = use_clipped_value_loss
+        # pack the rollout into one buffer that is reshuffled every epoch (feed-forward policies only)
+        self.packed_storage = packed_storage and not actor_critic.is_recurrent
+
+        # Mixed precision: the forward passes of the update run under autocast, while the weights, the optimizer
+        # state and the loss and KL reductions stay in fp32. Gradients are scaled for fp16 only.
+        self.amp = amp
+        self.amp_dtype = {"bfloat16": torch.bfloat16, "float16": torch.float16}[amp_dtype]
+        self.amp_device_type = torch.device(device).type
+        self.scaler = torch.amp.GradScaler(
+            "cuda", enabled=amp and self.amp_dtype == torch.float16 and self.amp_device_type == "cuda"
+        )
 
     def init_storage(self, num_envs, num_transitions_per_env, actor_obs_shape, critic_obs_shape, action_shape):
         self.storage = RolloutStorage(
-            num_envs, num_transitions_per_env, actor_obs_shape, critic_obs_shape, action_shape, self.device
+            num_envs,
+            num_transitions_per_env,
+            actor_obs_shape,
+            critic_obs_shape,
+            action_shape,
+            self.device,
+            packed=self.packed_storage,
         )
 
     def test_mode(self):
@@ -99,8 +127,8 @@ class PPO:
         self.storage.compute_returns(last_values, self.gamma, self.lam)
 
     def update(self):
-        mean_value_loss = 0
-        mean_surrogate_loss = 0
+        # sums of the value and surrogate losses over the mini-batches
+        loss_sums = torch.zeros(2, device=self.device)
         if self.actor_critic.is_recurrent:
             generator = self.storage.reccurent_mini_batch_generator(self.num_mini_batches, self.num_learning_epochs)
         else:
@@ -118,14 +146,17 @@ class PPO:
             hid_states_batch,
             masks_batch,
         ) in generator:
-            self.actor_critic.act(obs_batch, masks=masks_batch, hidden_states=hid_states_batch[0])
-            actions_log_prob_batch = self.actor_critic.get_actions_log_prob(actions_batch)
-            value_batch = self.actor_critic.evaluate(
-                critic_obs_batch, masks=masks_batch, hidden_states=hid_states_batch[1]
-            )
-            mu_batch = self.actor_critic.action_mean
-            sigma_batch = self.actor_critic.action_std
-            entropy_batch = self.actor_critic.entropy
+            with torch.autocast(device_type=self.amp_device_type, dtype=self.amp_dtype, enabled=self.amp):
+                self.actor_critic.act(obs_batch, masks=masks_batch, hidden_states=hid_states_batch[0])
+                value_batch = self.actor_critic.evaluate(
+                    critic_obs_batch, masks=masks_batch, hidden_states=hid_states_batch[1]
+                )
+            # the distribution, losses and KL are evaluated in fp32
+            actions_log_prob_batch = self.actor_critic.get_actions_log_prob(actions_batch).float()
+            value_batch = value_batch.float()
+            mu_batch = self.actor_critic.action_mean.float()
+            sigma_batch = self.actor_critic.action_std.float()
+            entropy_batch = self.actor_critic.entropy.float()
 
             # KL
             if self.desired_kl is not None and self.schedule == "adaptive":
@@ -170,16 +201,18 @@ class PPO:
 
             # Gradient step
             self.optimizer.zero_grad()
-            loss.backward()
-            nn.utils.clip_grad_norm_(self.actor_critic.parameters(), self.max_grad_norm)
-            self.optimizer.step()
+            self.scaler.scale(loss).backward()
+            # clip the unscaled gradients, steps with inf or nan gradients are skipped by the scaler
+            self.scaler.unscale_(self.optimizer)
+            nn.utils.clip_grad_norm_(self.parameters, self.max_grad_norm, foreach=self.foreach)
+            self.scaler.step(self.optimizer)
+            self.scaler.update()
 
-            mean_value_loss += value_loss.item()
-            mean_surrogate_loss += surrogate_loss.item()
+            # accumulate on the device, the statistics are read back once after the update
+            loss_sums += torch.stack([value_loss.detach(), surrogate_loss.detach()])
 
         num_updates = self.num_learning_epochs * self.num_mini_batches
-        mean_value_loss /= num_updates
-        mean_surrogate_loss /= num_updates
+        mean_value_loss, mean_surrogate_loss = (loss_sums / num_updates).tolist()
         self.storage.clear()
 
         return mean_value_loss, mean_surrogate_loss
@@ -14,7 +14,7 @@ import rsl_rl
 from rsl_rl.algorithms import PPO
 from rsl_rl.env import VecEnv
 from rsl_rl.modules import ActorCritic, ActorCriticRecurrent, ActorCriticDepthCNN, ActorCriticDepthCNNRecurrent, EmpiricalNormalization
-from rsl_rl.utils import store_code_state
+from rsl_rl.utils import CudaGraphPolicy, store_code_state
 
 
 class OnPolicyRunner:
@@ -276,6 +276,8 @@ class OnPolicyRunner:
         if self.empirical_normalization:
             saved_dict["obs_norm_state_dict"] = self.obs_normalizer.state_dict()
             saved_dict["critic_obs_norm_state_dict"] = self.critic_obs_normalizer.state_dict()
+        if self.alg.scaler.is_enabled():
+            saved_dict["grad_scaler_state_dict"] = self.alg.scaler.state_dict()
         torch.save(saved_dict, path)
 
         # Upload model to external logging service
@@ -290,10 +292,13 @@ class OnPolicyRunner:
             self.critic_obs_normalizer.load_state_dict(loaded_dict["critic_obs_norm_state_dict"])
         if load_optimizer:
             self.alg.optimizer.load_state_dict(loaded_dict["optimizer_state_dict"])
+            # the weights are kept in fp32, such that checkpoints are shared between fp32 and mixed precision runs
+            if self.alg.scaler.is_enabled() and "grad_scaler_state_dict" in loaded_dict:
+                self.alg.scaler.load_state_dict(loaded_dict["grad_scaler_state_dict"])
         self.current_learning_iteration = loaded_dict["iter"]
         return loaded_dict["infos"]
 
-    def get_inference_policy(self, device=None):
+    def get_inference_policy(self, device=None, use_cuda_graph=False):
         self.eval_mode()  # switch to evaluation mode (dropout for example)
         if device is not None:
             self.alg.actor_critic.to(device)
@@ -302,6 +307,9 @@ class OnPolicyRunner:
             if device is not None:
                 self.obs_normalizer.to(device)
             policy = lambda x: self.alg.actor_critic.act_inference(self.obs_normalizer(x))  # noqa: E731
+        if use_cuda_graph:
+            # capture normalizer and actor into one CUDA graph (falls back to eager mode on the CPU)
+            policy = CudaGraphPolicy(policy, enabled=not self.alg.actor_critic.is_recurrent)
         return policy
 
     def train_mode(self):
@@ -4,9 +4,32 @@
 
 from __future__ import annotations
 
+import math
+
 import torch
 
-from rsl_rl.utils import split_and_pad_trajectories
+from rsl_rl.utils import get_trajectory_layout, pad_trajectories
+
+
+@torch.jit.script
+def discounted_reverse_cumsum(values: torch.Tensor, discounts: torch.Tensor, out: torch.Tensor) -> torch.Tensor:
+    """Computes ``out[t] = values[t] + discounts[t] * out[t + 1]`` backwards in time, in place.
+
+    Scripted such that the recursion runs without Python overhead, with two kernels per time step.
+
+    Args:
+        values: The values to accumulate. Shape is (T, ...).
+        discounts: The discount of the next step. Shape is (T, ...).
+        out: The output. Shape is (T, ...).
+
+    Returns:
+        The output tensor.
+    """
+    out[-1].copy_(values[-1])
+    for step in range(values.shape[0] - 2, -1, -1):
+        torch.mul(discounts[step], out[step + 1], out=out[step])
+        out[step].add_(values[step])
+    return out
 
 
 class RolloutStorage:
@@ -26,35 +49,55 @@ class RolloutStorage:
         def clear(self):
             self.__init__()
 
-    def __init__(self, num_envs, num_transitions_per_env, obs_shape, privileged_obs_shape, actions_shape, device="cpu"):
+    def __init__(
+        self,
+        num_envs,
+        num_transitions_per_env,
+        obs_shape,
+        privileged_obs_shape,
+        actions_shape,
+        device="cpu",
+        packed=False,
+    ):
         self.device = device
 
         self.obs_shape = obs_shape
         self.privileged_obs_shape = privileged_obs_shape
         self.actions_shape = actions_shape
+        self.num_transitions_per_env = num_transitions_per_env
+        self.num_envs = num_envs
+
+        # Packed mode: the fields of the mini-batches are column views into one (T, N, D) buffer, such that the
+        # transitions are shuffled with a single gather and the mini-batches are slices of the shuffled buffer
+        self.packed = packed
+        self.transitions = None
+        self._field_slices = {}
+        self._num_packed_columns = 0
+        if packed:
+            num_obs = math.prod(obs_shape)
+            num_privileged_obs = math.prod(privileged_obs_shape) if privileged_obs_shape[0] is not None else 0
+            num_columns = num_obs + num_privileged_obs + 3 * math.prod(actions_shape) + 4
+            self.transitions = torch.zeros(num_transitions_per_env, num_envs, num_columns, device=self.device)
+            self._shuffled_transitions = torch.zeros_like(self.transitions).flatten(0, 1)
+            self._shuffle_indices = torch.zeros(num_envs * num_transitions_per_env, dtype=torch.long, device=self.device)
 
         # Core
-        self.observations = torch.zeros(num_transitions_per_env, num_envs, *obs_shape, device=self.device)
+        self.observations = self._allocate_field("observations", obs_shape)
         if privileged_obs_shape[0] is not None:
-            self.privileged_observations = torch.zeros(
-                num_transitions_per_env, num_envs, *privileged_obs_shape, device=self.device
-            )
+            self.privileged_observations = self._allocate_field("privileged_observations", privileged_obs_shape)
         else:
             self.privileged_observations = None
         self.rewards = torch.zeros(num_transitions_per_env, num_envs, 1, device=self.device)
-        self.actions = torch.zeros(num_transitions_per_env, num_envs, *actions_shape, device=self.device)
+        self.actions = self._allocate_field("actions", actions_shape)
         self.dones = torch.zeros(num_transitions_per_env, num_envs, 1, device=self.device).byte()
 
         # For PPO
-        self.actions_log_prob = torch.zeros(num_transitions_per_env, num_envs, 1, device=self.device)
-        self.values = torch.zeros(num_transitions_per_env, num_envs, 1, device=self.device)
-        self.returns = torch.zeros(num_transitions_per_env, num_envs, 1, device=self.device)
-        self.advantages = torch.zeros(num_transitions_per_env, num_envs, 1, device=self.device)
-        self.mu = torch.zeros(num_transitions_per_env, num_envs, *actions_shape, device=self.device)
-        self.sigma = torch.zeros(num_transitions_per_env, num_envs, *actions_shape, device=self.device)
-
-        self.num_transitions_per_env = num_transitions_per_env
-        self.num_envs = num_envs
+        self.actions_log_prob = self._allocate_field("actions_log_prob", [1])
+        self.values = self._allocate_field("values", [1])
+        self.returns = self._allocate_field("returns", [1])
+        self.advantages = self._allocate_field("advantages", [1])
+        self.mu = self._allocate_field("mu", actions_shape)
+        self.sigma = self._allocate_field("sigma", actions_shape)
 
         # rnn
         self.saved_hidden_states_a = None
@@ -78,6 +121,15 @@ class RolloutStorage:
         self._save_hidden_states(transition.hidden_states)
         self.step += 1
 
+    def _allocate_field(self, name, shape):
+        if self.transitions is None:
+            return torch.zeros(self.num_transitions_per_env, self.num_envs, *shape, device=self.device)
+        start = self._num_packed_columns
+        stop = start + math.prod(shape)
+        self._field_slices[name] = (start, stop, shape)
+        self._num_packed_columns = stop
+        return self.transitions[..., start:stop].view(self.num_transitions_per_env, self.num_envs, *shape)
+
     def _save_hidden_states(self, hidden_states):
         if hidden_states is None or hidden_states == (None, None):
             return
@@ -102,20 +154,18 @@ class RolloutStorage:
         self.step = 0
 
     def compute_returns(self, last_values, gamma, lam):
-        advantage = 0
-        for step in reversed(range(self.num_transitions_per_env)):
-            if step == self.num_transitions_per_env - 1:
-                next_values = last_values
-            else:
-                next_values = self.values[step + 1]
-            next_is_not_terminal = 1.0 - self.dones[step].float()
-            delta = self.rewards[step] + next_is_not_terminal * gamma * next_values - self.values[step]
-            advantage = delta + next_is_not_terminal * gamma * lam * advantage
-            self.returns[step] = advantage + self.values[step]
-
-        # Compute and normalize the advantages
-        self.advantages = self.returns - self.values
-        self.advantages = (self.advantages - self.advantages.mean()) / (self.advantages.std() + 1e-8)
+        # the TD errors and discounts of all steps at once, with the operation order of the step-wise recursion
+        next_is_not_terminal = 1.0 - self.dones.float()
+        next_values = torch.cat((self.values[1:], last_values.unsqueeze(0)), dim=0)
+        deltas = self.rewards + next_is_not_terminal * gamma * next_values - self.values
+        discounts = next_is_not_terminal * gamma * lam
+        # only the recursion over time remains sequential
+        discounted_reverse_cumsum(deltas, discounts, self.returns)
+        self.returns.add_(self.values)
+
+        # Compute and normalize the advantages, copied such that the views of the packed buffer stay valid
+        advantages = self.returns - self.values
+        self.advantages.copy_((advantages - advantages.mean()) / (advantages.std() + 1e-8))
 
     def get_statistics(self):
         done = self.dones
@@ -128,6 +178,10 @@ class RolloutStorage:
         return trajectory_lengths.float().mean(), self.rewards.mean()
 
     def mini_batch_generator(self, num_mini_batches, num_epochs=8):
+        if self.packed:
+            yield from self.packed_mini_batch_generator(num_mini_batches, num_epochs)
+            return
+
         batch_size = self.num_envs * self.num_transitions_per_env
         mini_batch_size = batch_size // num_mini_batches
         indices = torch.randperm(num_mini_batches * mini_batch_size, requires_grad=False, device=self.device)
@@ -166,27 +220,89 @@ class RolloutStorage:
                     None,
                 ), None
 
+    def packed_mini_batch_generator(self, num_mini_batches, num_epochs=8):
+        """Yields the mini-batches of the packed buffer, reshuffled in every epoch.
+
+        Each epoch gathers the transitions into a preallocated buffer in a new random order. The mini-batches are
+        slices of this buffer and their fields are column views, such that no further copies are made.
+        """
+        batch_size = self.num_envs * self.num_transitions_per_env
+        mini_batch_size = batch_size // num_mini_batches
+        transitions = self.transitions.flatten(0, 1)
+
+        for epoch in range(num_epochs):
+            torch.randperm(batch_size, out=self._shuffle_indices)
+            torch.index_select(transitions, 0, self._shuffle_indices, out=self._shuffled_transitions)
+            for i in range(num_mini_batches):
+                batch = self._shuffled_transitions[i * mini_batch_size : (i + 1) * mini_batch_size]
+                fields = {
+                    name: batch[:, start:stop].view(-1, *shape)
+                    for name, (start, stop, shape) in self._field_slices.items()
+                }
+                obs_batch = fields["observations"]
+                critic_observations_batch = fields.get("privileged_observations", obs_batch)
+                yield (
+                    obs_batch,
+                    critic_observations_batch,
+                    fields["actions"],
+                    fields["values"],
+                    fields["advantages"],
+                    fields["returns"],
+                    fields["actions_log_prob"],
+                    fields["mu"],
+                    fields["sigma"],
+                    (None, None),
+                    None,
+                )
+
     # for RNNs only
     def reccurent_mini_batch_generator(self, num_mini_batches, num_epochs=8):
-        padded_obs_trajectories, trajectory_masks = split_and_pad_trajectories(self.observations, self.dones)
+        mini_batch_size = self.num_envs // num_mini_batches
+
+        # the padded trajectories and initial hidden states of the whole rollout, computed once on device
+        trajectory_ids, time_ids, trajectories_per_env = get_trajectory_layout(self.dones)
+        trajectory_offsets = torch.cat((trajectories_per_env.new_zeros(1), torch.cumsum(trajectories_per_env, dim=0)))
+        # first trajectory of each mini-batch and total number of trajectories, the only host sync of the rollout
+        trajectory_offsets = torch.cat(
+            (trajectory_offsets[: num_mini_batches * mini_batch_size + 1 : mini_batch_size], trajectory_offsets[-1:])
+        ).tolist()
+        num_trajectories = trajectory_offsets.pop()
+
+        padded_obs_trajectories = pad_trajectories(self.observations, trajectory_ids, time_ids, num_trajectories)
         if self.privileged_observations is not None:
-            padded_critic_obs_trajectories, _ = split_and_pad_trajectories(self.privileged_observations, self.dones)
+            padded_critic_obs_trajectories = pad_trajectories(
+                self.privileged_observations, trajectory_ids, time_ids, num_trajectories
+            )
         else:
             padded_critic_obs_trajectories = padded_obs_trajectories
+        trajectory_masks = pad_trajectories(
+            torch.ones(self.dones.shape[:2], dtype=torch.bool, device=self.device),
+            trajectory_ids,
+            time_ids,
+            num_trajectories,
+        )
+
+        # index of the first transition of each trajectory, in the order (num_envs, num_transitions_per_env)
+        transition_ids = torch.arange(trajectory_ids.shape[0], device=self.device)
+        start_ids = torch.full((num_trajectories,), trajectory_ids.shape[0], dtype=torch.long, device=self.device)
+        start_ids.scatter_reduce_(0, trajectory_ids, transition_ids, reduce="amin")
+        # reshape to [num_envs * time, num layers, hidden dim] (original shape: [time, num_layers, num_envs, hidden_dim]),
+        # take the states at the trajectory starts and reshape to [num_layers, num_trajectories, hidden_dim]
+        hid_a = [
+            saved_hidden_states.permute(2, 0, 1, 3).flatten(0, 1)[start_ids].transpose(1, 0)
+            for saved_hidden_states in self.saved_hidden_states_a
+        ]
+        hid_c = [
+            saved_hidden_states.permute(2, 0, 1, 3).flatten(0, 1)[start_ids].transpose(1, 0)
+            for saved_hidden_states in self.saved_hidden_states_c
+        ]
 
-        mini_batch_size = self.num_envs // num_mini_batches
         for ep in range(num_epochs):
-            first_traj = 0
             for i in range(num_mini_batches):
                 start = i * mini_batch_size
                 stop = (i + 1) * mini_batch_size
-
-                dones = self.dones.squeeze(-1)
-                last_was_done = torch.zeros_like(dones, dtype=torch.bool)
-                last_was_done[1:] = dones[:-1]
-                last_was_done[0] = True
-                trajectories_batch_size = torch.sum(last_was_done[:, start:stop])
-                last_traj = first_traj + trajectories_batch_size
+                first_traj = trajectory_offsets[i]
+                last_traj = trajectory_offsets[i + 1]
 
                 masks_batch = trajectory_masks[:, first_traj:last_traj]
                 obs_batch = padded_obs_trajectories[:, first_traj:last_traj]
@@ -200,22 +316,8 @@ class RolloutStorage:
                 values_batch = self.values[:, start:stop]
                 old_actions_log_prob_batch = self.actions_log_prob[:, start:stop]
 
-                # reshape to [num_envs, time, num layers, hidden dim] (original shape: [time, num_layers, num_envs, hidden_dim])
-                # then take only time steps after dones (flattens num envs and time dimensions),
-                # take a batch of trajectories and finally reshape back to [num_layers, batch, hidden_dim]
-                last_was_done = last_was_done.permute(1, 0)
-                hid_a_batch = [
-                    saved_hidden_states.permute(2, 0, 1, 3)[last_was_done][first_traj:last_traj]
-                    .transpose(1, 0)
-                    .contiguous()
-                    for saved_hidden_states in self.saved_hidden_states_a
-                ]
-                hid_c_batch = [
-                    saved_hidden_states.permute(2, 0, 1, 3)[last_was_done][first_traj:last_traj]
-                    .transpose(1, 0)
-                    .contiguous()
-                    for saved_hidden_states in self.saved_hidden_states_c
-                ]
+                hid_a_batch = [states[:, first_traj:last_traj].contiguous() for states in hid_a]
+                hid_c_batch = [states[:, first_traj:last_traj].contiguous() for states in hid_c]
                 # remove the tuple for GRU
                 hid_a_batch = hid_a_batch[0] if len(hid_a_batch) == 1 else hid_a_batch
                 hid_c_batch = hid_c_batch[0] if len(hid_c_batch) == 1 else hid_c_batch
@@ -224,5 +326,3 @@ class RolloutStorage:
                     hid_a_batch,
                     hid_c_batch,
                 ), masks_batch
-
-                first_traj = last_traj
@@ -3,4 +3,11 @@
 
 """Helper functions."""
 
-from .utils import split_and_pad_trajectories, store_code_state, unpad_trajectories
+from .utils import (
+    CudaGraphPolicy,
+    get_trajectory_layout,
+    pad_trajectories,
+    split_and_pad_trajectories,
+    store_code_state,
+    unpad_trajectories,
+)
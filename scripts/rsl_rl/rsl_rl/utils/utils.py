@@ -26,28 +26,59 @@ def split_and_pad_trajectories(tensor, dones):
 
     Assumes that the inputy has the following dimension order: [time, number of envs, additional dimensions]
     """
-    dones = dones.clone()
-    dones[-1] = 1
-    # Permute the buffers to have order (num_envs, num_transitions_per_env, ...), for correct reshaping
-    flat_dones = dones.transpose(1, 0).reshape(-1, 1)
-
-    # Get length of trajectory by counting the number of successive not done elements
-    done_indices = torch.cat((flat_dones.new_tensor([-1], dtype=torch.int64), flat_dones.nonzero()[:, 0]))
-    trajectory_lengths = done_indices[1:] - done_indices[:-1]
-    trajectory_lengths_list = trajectory_lengths.tolist()
-    # Extract the individual trajectories
-    trajectories = torch.split(tensor.transpose(1, 0).flatten(0, 1), trajectory_lengths_list)
-    # add at least one full length trajectory
-    trajectories = trajectories + (torch.zeros(tensor.shape[0], tensor.shape[-1], device=tensor.device),)
-    # pad the trajectories to the length of the longest trajectory
-    padded_trajectories = torch.nn.utils.rnn.pad_sequence(trajectories)
-    # remove the added tensor
-    padded_trajectories = padded_trajectories[:, :-1]
-
-    trajectory_masks = trajectory_lengths > torch.arange(0, tensor.shape[0], device=tensor.device).unsqueeze(1)
+    trajectory_ids, time_ids, trajectories_per_env = get_trajectory_layout(dones)
+    # the number of trajectories is the only value read back to the host
+    num_trajectories = int(trajectories_per_env.sum())
+    padded_trajectories = pad_trajectories(tensor, trajectory_ids, time_ids, num_trajectories)
+    trajectory_masks = pad_trajectories(
+        torch.ones(tensor.shape[:2], dtype=torch.bool, device=tensor.device), trajectory_ids, time_ids, num_trajectories
+    )
     return padded_trajectories, trajectory_masks
 
 
+def get_trajectory_layout(dones):
+    """Computes the position of each transition in the padded layout of :func:`split_and_pad_trajectories` on device.
+
+    A trajectory starts at the first step of the rollout and after every done. The trajectories are numbered in the
+    order of the environments, and in order of time within an environment.
+
+    Args:
+        dones: The dones of the rollout, shape (T, N) or (T, N, 1).
+
+    Returns:
+        The trajectory index of each transition, in the order (num_envs, num_transitions_per_env), shape (N * T,).
+        The time step of each transition within its trajectory, shape (N * T,).
+        The number of trajectories of each environment, shape (N,).
+    """
+    dones = dones.view(dones.shape[0], dones.shape[1])
+    starts = torch.ones_like(dones, dtype=torch.bool)
+    starts[1:] = dones[:-1].bool()
+    starts = starts.transpose(1, 0).reshape(-1)
+
+    trajectory_ids = torch.cumsum(starts, dim=0) - 1
+    step_ids = torch.arange(starts.shape[0], device=dones.device)
+    start_ids = torch.cummax(torch.where(starts, step_ids, torch.zeros_like(step_ids)), dim=0).values
+    trajectories_per_env = starts.view(dones.shape[1], dones.shape[0]).sum(dim=1)
+    return trajectory_ids, step_ids - start_ids, trajectories_per_env
+
+
+def pad_trajectories(tensor, trajectory_ids, time_ids, num_trajectories):
+    """Scatters the transitions of a rollout into padded trajectories with the layout of :func:`get_trajectory_layout`.
+
+    Args:
+        tensor: The rollout data, shape (T, N, ...).
+        trajectory_ids: The trajectory index of each transition, shape (N * T,).
+        time_ids: The time step of each transition within its trajectory, shape (N * T,).
+        num_trajectories: The number of trajectories.
+
+    Returns:
+        The padded trajectories, shape (T, num_trajectories, ...). Padding is zero.
+    """
+    padded_trajectories = tensor.new_zeros(tensor.shape[0], num_trajectories, *tensor.shape[2:])
+    padded_trajectories[time_ids, trajectory_ids] = tensor.transpose(1, 0).flatten(0, 1)
+    return padded_trajectories
+
+
 def unpad_trajectories(trajectories, masks):
     """Does the inverse operation of  split_and_pad_trajectories()"""
     # Need to transpose before and after the masking to have proper reshaping
@@ -85,3 +116,53 @@ def store_code_state(logdir, repositories) -> list:
         # add the file path to the list of files to be uploaded
         file_paths.append(diff_file_name)
     return file_paths
+
+
+class CudaGraphPolicy:
+    """Wraps an inference policy to replay its forward pass as a captured CUDA graph.
+
+    Evaluating a small MLP for few environments is dominated by the kernel launch overhead. The first call
+    captures all kernels of the policy (e.g. the observation normalizer and the actor) into a CUDA graph with static
+    input and output buffers. Subsequent calls only copy the observations into the static input and replay the graph.
+    The graph is re-captured if the shape of the observations changes.
+
+    On the CPU (or if CUDA graphs are disabled), the policy is called directly.
+
+    .. note::
+        The returned actions are the static output buffer of the graph, which is overwritten by the next call.
+        The policy has to be stateless, i.e. recurrent policies are not supported.
+    """
+
+    def __init__(self, policy, enabled: bool = True, num_warmup_iters: int = 3):
+        self.policy = policy
+        self.enabled = enabled and torch.cuda.is_available()
+        self.num_warmup_iters = num_warmup_iters
+
+        self.graph = None
+        self.static_obs = None
+        self.static_actions = None
+
+    def __call__(self, obs: torch.Tensor) -> torch.Tensor:
+        if not self.enabled or not obs.is_cuda:
+            with torch.no_grad():
+                return self.policy(obs)
+
+        if self.static_obs is None or self.static_obs.shape != obs.shape or self.static_obs.device != obs.device:
+            self._capture(obs)
+        self.static_obs.copy_(obs)
+        self.graph.replay()
+        return self.static_actions
+
+    def _capture(self, obs: torch.Tensor):
+        self.static_obs = obs.detach().clone()
+        # warm up on a side stream (as required for the capture), e.g. to initialize the cuBLAS handles
+        stream = torch.cuda.Stream(device=obs.device)
+        stream.wait_stream(torch.cuda.current_stream(obs.device))
+        with torch.cuda.stream(stream), torch.no_grad():
+            for _ in range(self.num_warmup_iters):
+                self.policy(self.static_obs)
+        torch.cuda.current_stream(obs.device).wait_stream(stream)
+
+        self.graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(self.graph), torch.no_grad():
+            self.static_actions = self.policy(self.static_obs)